@@ -1,32 +1,65 @@
 from llm.groq_client import GroqClient
 from utils.prompts import BUSINESS_PROMPT
 from storage.vector_store import IPOVectorStore
+from utils.telemetry import traced
+from utils.context_builder import ContextBuilder, CONTEXT_BUILDER, page_label
+from storage.reranker import CrossEncoderReranker
 
 class BusinessAgent:
-    def __init__(self, llm_client: GroqClient, vector_store: IPOVectorStore):
+    def __init__(self, llm_client: GroqClient, vector_store: IPOVectorStore, context_builder: ContextBuilder = None,
+                 reranker: CrossEncoderReranker = None):
         self.llm = llm_client
         self.vector_store = vector_store
+        # Dedupes, merges and trims retrieved chunks to the BUSINESS token budget
+        self.context_builder = context_builder or CONTEXT_BUILDER
+        # Optional cross-encoder stage over an over-fetched candidate set (see RERANK_SETTINGS)
+        self.reranker = reranker
 
-    def handle(self, query: str) -> str:
+    @traced("agent.business.handle")
+    def handle(self, query: str, stream=False):
         """
         Handles business-related queries.
         Searches 'BUSINESS_OVERVIEW' and 'USE_OF_PROCEEDS' (if possible) or generl search.
+        With stream=True, returns a generator of text deltas instead of a string.
+        """
+        return self.answer(query, self.retrieve(query), stream=stream)
+
+    @traced("agent.business.retrieve")
+    def retrieve(self, query: str) -> list:
+        """
+        Local retrieval only (no LLM call).
         """
         # Try specific section first
-        vector_results = self.vector_store.query(query, n_results=5, section_filter="BUSINESS_OVERVIEW")
+        vector_results = self._search(query, section_filter="BUSINESS_OVERVIEW")
         
         # Fallback to general search if no business section results (sometimes section detection fails)
         if not vector_results:
-            vector_results = self.vector_store.query(query, n_results=5) # No filter
+            vector_results = self._search(query) # No filter
+
+        return vector_results
 
-        context_text = ""
-        for res in vector_results:
-            context_text += f"-- Source (Page {res['metadata']['page']} - {res['metadata']['section']}): {res['text']}\n"
+    def _search(self, query: str, section_filter=None) -> list:
+        if self.reranker:
+            return self.reranker.retrieve(self.vector_store, query, "BUSINESS", n_results=5, section_filter=section_filter)
+        return self.vector_store.query(query, n_results=5, section_filter=section_filter)
+
+    @traced("agent.business.answer")
+    def answer(self, query: str, vector_results: list, stream=False):
+        """
+        Explains the business using the retrieved chunks.
+        """
+        context_text = self.context_builder.build(
+            vector_results, "BUSINESS",
+            format_passage=lambda res: f"-- Source ({page_label(res['metadata'])} - {res['metadata']['section']}): {res['text']}\n"
+        )["text"]
 
         messages = [
             {"role": "system", "content": BUSINESS_PROMPT.format(context=context_text, question=query)},
         ]
 
+        if stream:
+            return self.llm.chat_stream(messages, temperature=0.1)
+
         answer = self.llm.chat(messages, temperature=0.1)
         return answer
 
@@ -1,22 +1,76 @@
+from llm.errors import LLMError
 from llm.groq_client import GroqClient
 from storage.vector_store import IPOVectorStore
+from storage.financial_db import FinancialDatabase
+from ingestion.trend_data import TREND_SERIES, build_trend_data, validate_trend_data
+from utils.context_builder import CONTEXT_BUILDER
 import json
 import re
+import threading
 
 class ChartAgent:
-    def __init__(self, llm_client: GroqClient, vector_store: IPOVectorStore):
+    def __init__(self, llm_client: GroqClient, vector_store: IPOVectorStore, db: FinancialDatabase = None, max_periods=3):
         self.llm = llm_client
         self.vector_store = vector_store
+        self.db = db
+        self.max_periods = max_periods
+        # Background LLM fallback (see start_fallback)
+        self._fallback_thread = None
+        self._lock = threading.Lock()
 
     def get_trend_data(self) -> dict:
         """
         Extracts multi-year financial data for visualization.
-        Returns a dict: { "Revenue": {"2023": 100, "2024": 120}, ... }
+        Returns a dict: {"years": ["FY23", ...], "data": {"Revenue": [...], "Profit": [...], "Net Worth": [...]}}
+        Served from the dataset stored at ingestion when there is one (no LLM call);
+        otherwise extracted from the text by the LLM, validated and stored.
+        """
+        stored = self.get_stored_trend_data()
+        if stored:
+            return stored
+        return self.extract_trend_data_with_llm()
+
+    def get_stored_trend_data(self) -> dict:
+        """
+        The document's stored trend dataset, or None. Documents ingested before the
+        dataset was precomputed get it built (and stored) from their table records here.
+        """
+        if self.db is None:
+            return None
+        stored = self.db.get_chart_data()
+        if stored:
+            return stored
+        built = build_trend_data(self.db.get_records(metrics=list(TREND_SERIES.values()), dated_only=True), self.max_periods)
+        if built:
+            self.db.store_chart_data(built, source="tables")
+            return dict(built, source="tables")
+        return None
+
+    def start_fallback(self) -> bool:
+        """
+        Starts the LLM extraction in a background thread when nothing is stored yet,
+        so the chart view never blocks on it. Returns True if a run was started.
+        """
+        with self._lock:
+            if self.fallback_running or self.get_stored_trend_data():
+                return False
+            self._fallback_thread = threading.Thread(target=self.extract_trend_data_with_llm, daemon=True)
+            self._fallback_thread.start()
+            return True
+
+    @property
+    def fallback_running(self) -> bool:
+        return self._fallback_thread is not None and self._fallback_thread.is_alive()
+
+    def extract_trend_data_with_llm(self) -> dict:
+        """
+        LLM fallback: asks the model to rebuild the multi-year table from retrieved text.
+        Only a schema-valid result is returned (and stored for the document).
         """
         # 1. Get Context (Targeting Financial Statements)
         # We query for broader terms to get the full table context
         results = self.vector_store.query("Revenue Profit Net Worth for last 3 years", n_results=4, section_filter="FINANCIAL_STATEMENTS")
-        context = "\n".join([r['text'] for r in results])
+        context = CONTEXT_BUILDER.build(results, "CHART")["text"]
 
         # 2. Prompt for JSON extraction
         prompt = [
@@ -33,24 +87,34 @@ class ChartAgent:
                 }
             }
             - "years": Labels for the X-axis (e.g., "Mar-23", "Mar-24", "Sep-25"). Earliest to Latest.
-            - "data": Arrays of numbers corresponding to those years. Use 0.0 if missing.
+            - "data": Arrays of numbers corresponding to those years. Use null if missing.
             - STRICTLY OUTPUT JSON ONLY. NO MARKDOWN. NO EXPLANATION.
             """},
             {"role": "user", "content": f"Extract financial trends from this text:\n{context}"}
         ]
 
         # 3. Call LLM
-        response = self.llm.chat(prompt, temperature=0.0)
-        
-        # 4. Parse JSON
+        try:
+            response = self.llm.chat(prompt, temperature=0.0)
+        except LLMError as e:
+            print(f"❌ ChartAgent LLM error: {e}")
+            return None
+
+        # 4. Parse JSON and check it against the chart schema
         try:
             # Clean md blocks if present
             cleaned = response.replace("```json", "").replace("```", "").strip()
-            data = json.loads(cleaned)
-            return data
+            data = validate_trend_data(json.loads(cleaned))
         except json.JSONDecodeError:
             print(f"❌ ChartAgent JSON Error: {response}")
             return None
+        except ValueError as e:
+            print(f"❌ ChartAgent schema error: {e}")
+            return None
+
+        if self.db is not None:
+            self.db.store_chart_data(data, source="llm")
+        return dict(data, source="llm")
 
 if __name__ == "__main__":
     pass
@@ -1,9 +1,11 @@
 from llm.groq_client import GroqClient
+from utils.telemetry import traced
 
 class CitationAgent:
     def __init__(self, llm_client: GroqClient):
         self.llm = llm_client
 
+    @traced("agent.citation.verify")
     def verify(self, output: str) -> str:
         """
         Passive verification. 
@@ -18,5 +20,20 @@ class CitationAgent:
         
         return output
 
+    def verify_stream(self, tokens):
+        """
+        Streaming variant of verify(): passes tokens through unchanged and,
+        once the full text is known, yields whatever verify() would append.
+        """
+        parts = []
+        for token in tokens:
+            parts.append(token)
+            yield token
+
+        output = "".join(parts)
+        verified = self.verify(output)
+        if len(verified) > len(output):
+            yield verified[len(output):]
+
 if __name__ == "__main__":
     pass
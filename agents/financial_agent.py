@@ -2,28 +2,58 @@ from llm.groq_client import GroqClient
 from utils.prompts import FINANCIAL_PROMPT
 from storage.financial_db import FinancialDatabase
 from storage.vector_store import IPOVectorStore
+from utils.telemetry import traced
+from utils.context_builder import ContextBuilder, CONTEXT_BUILDER, page_label
+from storage.reranker import CrossEncoderReranker
 
 class FinancialAgent:
-    def __init__(self, llm_client: GroqClient, db: FinancialDatabase, vector_store: IPOVectorStore):
+    def __init__(self, llm_client: GroqClient, db: FinancialDatabase, vector_store: IPOVectorStore, context_builder: ContextBuilder = None,
+                 reranker: CrossEncoderReranker = None):
         self.llm = llm_client
         self.db = db
         self.vector_store = vector_store
+        # Dedupes, merges and trims retrieved chunks to the FINANCIAL token budget (metrics included)
+        self.context_builder = context_builder or CONTEXT_BUILDER
+        # Optional cross-encoder stage over an over-fetched candidate set (see RERANK_SETTINGS)
+        self.reranker = reranker
 
-    def handle(self, query: str) -> str:
+    @traced("agent.financial.handle")
+    def handle(self, query: str, stream=False):
         """
         Orchestrates extracting data and generating an answer.
+        With stream=True, returns a generator of text deltas instead of a string.
+        """
+        return self.answer(query, self.retrieve(query), stream=stream)
+
+    @traced("agent.financial.retrieve")
+    def retrieve(self, query: str) -> list:
+        """
+        Local retrieval only (no LLM call).
+        """
+        # Fetch context from Vector Store (search primarily for financial keywords)
+        # We can broaden the search to "FINANCIAL_STATEMENTS" section
+        # Line items ("Total Borrowings", "EPS") are exact terms: "auto" answers short ones
+        # from the keyword index and fuses keyword and vector rankings for the rest
+        if self.reranker:
+            return self.reranker.retrieve(self.vector_store, query, "FINANCIAL", n_results=3,
+                                          section_filter="FINANCIAL_STATEMENTS", mode="auto")
+        return self.vector_store.query(query, n_results=3, section_filter="FINANCIAL_STATEMENTS", mode="auto")
+
+    @traced("agent.financial.answer")
+    def answer(self, query: str, vector_results: list, stream=False):
+        """
+        Generates the answer from retrieved chunks plus the exact numbers in SQL.
         """
         # 1. Fetch exact numbers from SQL
         metrics = self.db.get_all_metrics()
         metrics_str = "\n".join([f"{k}: {v}" for k, v in metrics.items()])
         
-        # 2. Fetch context from Vector Store (search primarily for financial keywords)
-        # We can broaden the search to "FINANCIAL_STATEMENTS" section
-        vector_results = self.vector_store.query(query, n_results=3, section_filter="FINANCIAL_STATEMENTS")
-        
-        context_text = ""
-        for res in vector_results:
-            context_text += f"-- Text (Page {res['metadata']['page']}): {res['text']}\n"
+        # 2. Context from Vector Store (the metrics are always kept; text fills the rest of the budget)
+        context_text = self.context_builder.build(
+            vector_results, "FINANCIAL",
+            format_passage=lambda res: f"-- Text ({page_label(res['metadata'])}): {res['text']}\n",
+            reserved_text=metrics_str
+        )["text"]
 
         # 3. Construct Prompt
         full_context = f"Structured Data found in DB:\n{metrics_str}\n\nUnstructured Text Context:\n{context_text}"
@@ -33,6 +63,9 @@ class FinancialAgent:
         ]
 
         # 4. Generate Answer
+        if stream:
+            return self.llm.chat_stream(messages, temperature=0.1)
+
         answer = self.llm.chat(messages, temperature=0.1)
         return answer
 
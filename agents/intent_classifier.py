@@ -0,0 +1,130 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# High-precision keyword rules. A query matching the rules of exactly one
+# intent is routed without any model call.
+INTENT_RULES = {
+    "SUMMARY": [
+        r"\bsummar(y|ise|ize)\b", r"\boverview of (the )?(ipo|company|issue)\b",
+        r"\bshould i (invest|buy|apply|subscribe)\b", r"\bpros and cons\b", r"\bkey highlights\b",
+    ],
+    "RISK": [
+        r"\brisks?\b", r"\bthreats?\b", r"\blitigations?\b", r"\blegal (issues?|proceedings?|cases?)\b",
+        r"\bcontingent liabilit", r"\bred flags?\b", r"\bpending (cases?|proceedings?)\b",
+    ],
+    "FINANCIAL": [
+        r"\brevenue\b", r"\bprofit", r"\bpat\b", r"\beps\b", r"\bebitda\b", r"\bmargins?\b",
+        r"\bdebt\b", r"\bborrowings?\b", r"\bnet worth\b", r"\bvaluation\b", r"\bp/?e\b",
+        r"\bcash flows?\b", r"\bearnings\b", r"\b(roe|roce|ronw)\b", r"\bfinancials?\b", r"\bturnover\b",
+    ],
+    "BUSINESS": [
+        r"\bwhat does (the company|it|they) do\b", r"\bbusiness model\b", r"\bproducts?\b",
+        r"\bservices\b", r"\bcustomers?\b", r"\bindustry\b", r"\buse of proceeds\b",
+        r"\bobjects? of the (issue|offer)\b", r"\bpromoters?\b", r"\bmanufactur",
+    ],
+    "OUT_OF_SCOPE": [
+        r"\bcompare\b.*\bwith\b", r"\bstock market\b", r"\bnifty\b", r"\bsensex\b", r"\b(crypto|bitcoin)",
+        r"\bshare price (tomorrow|next week|prediction)\b", r"\bmutual funds?\b", r"\bweather\b",
+    ],
+}
+
+# Labelled example queries; their embedding centroids back up the rules.
+INTENT_EXAMPLES = {
+    "FINANCIAL": [
+        "What is the revenue from operations?", "How much profit did the company make last year?",
+        "What is the EPS?", "How much debt does the company have?", "What are the EBITDA margins?",
+        "Is revenue growing?", "What is the net worth of the company?", "What is the valuation of this IPO?",
+    ],
+    "RISK": [
+        "What are the key risks?", "What are the top risks?", "Are there any legal cases against the company?",
+        "What could go wrong for this business?", "Any red flags in the prospectus?",
+        "Is the company dependent on a few customers?", "What are the regulatory threats?",
+        "Are there pending litigations against promoters?",
+    ],
+    "BUSINESS": [
+        "What does the company do?", "Explain the business model simply.", "What products do they sell?",
+        "Who are their customers?", "Which industry is this company in?", "How will the IPO money be used?",
+        "What are the objects of the issue?", "Who are the promoters?",
+    ],
+    "SUMMARY": [
+        "Give me a summary of this IPO.", "Should I invest in this IPO?", "Summarise the prospectus.",
+        "What are the pros and cons?", "Give me an overview of the company.",
+        "Is this IPO good for a retail investor?", "Key highlights of the offer?", "Quick overview please",
+    ],
+    "OUT_OF_SCOPE": [
+        "Compare this with Zomato.", "Will the Nifty go up tomorrow?", "Which stock should I buy today?",
+        "What is the price of bitcoin?", "Tell me a joke.", "What's the weather like?",
+        "Which mutual fund is best?", "Predict the listing gains of all IPOs this year.",
+    ],
+}
+
+class IntentClassifier:
+    def __init__(self, embed_fn: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 rules: Dict[str, List[str]] = None, examples: Dict[str, List[str]] = None,
+                 min_similarity=0.55, min_margin=0.05):
+        """
+        On-box intent classifier placed in front of the LLM router.
+        1. Keyword/regex rules (microseconds).
+        2. Nearest-centroid over embeddings of labelled examples (needs `embed_fn`).
+        Returns no intent when neither is confident, so the caller can fall back to the LLM.
+        """
+        self.embed_fn = embed_fn
+        self.rules = {
+            intent: [re.compile(p, re.IGNORECASE) for p in patterns]
+            for intent, patterns in (rules or INTENT_RULES).items()
+        }
+        self.examples = examples or INTENT_EXAMPLES
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self._centroid_labels = None
+        self._centroids = None
+
+    def matching_intents(self, query: str) -> List[str]:
+        """
+        Every intent whose rules match the query, in rule order.
+        """
+        return [intent for intent, patterns in self.rules.items() if any(p.search(query) for p in patterns)]
+
+    def classify(self, query: str) -> Tuple[Optional[str], float, str]:
+        """
+        Returns (intent, confidence, method). intent is None when not confident;
+        method is "rule", "centroid" or "none".
+        """
+        matches = self.matching_intents(query)
+        if len(matches) == 1:
+            return matches[0], 1.0, "rule"
+
+        if self.embed_fn is None:
+            return None, 0.0, "none"
+
+        labels, centroids = self._get_centroids()
+        query_vec = self._normalize(np.asarray(self.embed_fn([query]), dtype=np.float32))[0]
+        similarities = centroids @ query_vec
+        order = np.argsort(similarities)[::-1]
+        best, second = similarities[order[0]], similarities[order[1]]
+
+        if best >= self.min_similarity and best - second >= self.min_margin:
+            return labels[order[0]], float(best), "centroid"
+        return None, float(best), "none"
+
+    def _get_centroids(self):
+        if self._centroids is None:
+            labels = list(self.examples)
+            centroids = []
+            for intent in labels:
+                vectors = self._normalize(np.asarray(self.embed_fn(self.examples[intent]), dtype=np.float32))
+                centroids.append(vectors.mean(axis=0))
+            self._centroid_labels = labels
+            self._centroids = self._normalize(np.vstack(centroids))
+        return self._centroid_labels, self._centroids
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+if __name__ == "__main__":
+    pass
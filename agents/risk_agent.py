@@ -1,31 +1,60 @@
 from llm.groq_client import GroqClient
 from utils.prompts import RISK_PROMPT
 from storage.vector_store import IPOVectorStore
+from utils.telemetry import traced
+from utils.context_builder import ContextBuilder, CONTEXT_BUILDER, page_label
+from storage.reranker import CrossEncoderReranker
 
 class RiskAgent:
-    def __init__(self, llm_client: GroqClient, vector_store: IPOVectorStore):
+    def __init__(self, llm_client: GroqClient, vector_store: IPOVectorStore, context_builder: ContextBuilder = None,
+                 reranker: CrossEncoderReranker = None):
         self.llm = llm_client
         self.vector_store = vector_store
+        # Dedupes, merges and trims retrieved chunks to the RISK token budget
+        self.context_builder = context_builder or CONTEXT_BUILDER
+        # Optional cross-encoder stage over an over-fetched candidate set (see RERANK_SETTINGS)
+        self.reranker = reranker
 
-    def handle(self, query: str) -> str:
+    @traced("agent.risk.handle")
+    def handle(self, query: str, stream=False):
         """
         Handles risk-related queries.
         STRICTLY searches only 'RISK_FACTORS' section.
+        With stream=True, returns a generator of text deltas instead of a string.
+        """
+        return self.answer(query, self.retrieve(query), stream=stream)
+
+    @traced("agent.risk.retrieve")
+    def retrieve(self, query: str) -> list:
+        """
+        Local retrieval only (no LLM call).
         """
         # Fetch context ONLY from Risk Factors
-        vector_results = self.vector_store.query(query, n_results=5, section_filter="RISK_FACTORS")
-        
+        if self.reranker:
+            return self.reranker.retrieve(self.vector_store, query, "RISK", n_results=5, section_filter="RISK_FACTORS")
+        return self.vector_store.query(query, n_results=5, section_filter="RISK_FACTORS")
+
+    @traced("agent.risk.answer")
+    def answer(self, query: str, vector_results: list, stream=False):
+        """
+        Summarizes the retrieved risk factors.
+        """
         if not vector_results:
-            return "No specific risks found in the 'Risk Factors' section for this query. Please check the document manually."
+            message = "No specific risks found in the 'Risk Factors' section for this query. Please check the document manually."
+            return iter([message]) if stream else message
 
-        context_text = ""
-        for res in vector_results:
-            context_text += f"-- Risk Source (Page {res['metadata']['page']}): {res['text']}\n"
+        context_text = self.context_builder.build(
+            vector_results, "RISK",
+            format_passage=lambda res: f"-- Risk Source ({page_label(res['metadata'])}): {res['text']}\n"
+        )["text"]
 
         messages = [
             {"role": "system", "content": RISK_PROMPT.format(context=context_text, question=query)},
         ]
 
+        if stream:
+            return self.llm.chat_stream(messages, temperature=0.2)
+
         answer = self.llm.chat(messages, temperature=0.2) # Slightly higher temp for better fluency, but still low
         return answer
 
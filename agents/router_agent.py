@@ -1,15 +1,82 @@
-from crewai import Agent, Task
+import re
+from collections import Counter
 from llm.groq_client import GroqClient
 from utils.prompts import ROUTER_PROMPT
+from agents.intent_classifier import IntentClassifier
+from utils.telemetry import TELEMETRY, traced
+
+# Intents that can be answered side by side for compound questions
+MULTI_INTENTS = ["FINANCIAL", "RISK", "BUSINESS"]
+CONJUNCTION_PATTERN = re.compile(r"\band\b|&|,|\balso\b|\bplus\b|\bas well as\b", re.IGNORECASE)
 
 class RouterAgent:
-    def __init__(self, llm_client: GroqClient):
+    def __init__(self, llm_client: GroqClient, classifier: IntentClassifier = None):
         self.llm = llm_client
+        # Local fast path; the LLM is only asked when the classifier is not confident
+        self.classifier = classifier
+
+        # Per-intent counters: resolved locally vs. sent to the LLM
+        self.hit_counts = Counter()
+        self.fallback_counts = Counter()
 
+    @traced("router.route")
     def route(self, query: str) -> str:
         """
         Determines the intent of the query.
         """
+        if self.classifier:
+            intent, confidence, method = self.classifier.classify(query)
+            if intent:
+                self.hit_counts[intent] += 1
+                print(f"⚡ Fast-path intent ({method}, confidence {confidence:.2f}): {intent}")
+                self._record(intent, method, confidence)
+                return intent
+
+        intent = self._route_with_llm(query)
+        self.fallback_counts[intent] += 1
+        self._record(intent, "llm")
+        return intent
+
+    @traced("router.route_multi")
+    def route_multi(self, query: str) -> list:
+        """
+        Like route(), but a compound question ("risks and revenue trend") that
+        clearly names several of MULTI_INTENTS returns all of them, in the order
+        they are checked. Anything else returns a single routed intent.
+        """
+        if self.classifier and CONJUNCTION_PATTERN.search(query):
+            matches = self.classifier.matching_intents(query)
+            if len(matches) > 1 and all(intent in MULTI_INTENTS for intent in matches):
+                for intent in matches:
+                    self.hit_counts[intent] += 1
+                    self._record(intent, "multi")
+                TELEMETRY.current_span().set(intent="+".join(matches))
+                print(f"⚡ Fast-path multi-intent: {matches}")
+                return matches
+
+        return [self.route(query)]
+
+    def get_stats(self) -> dict:
+        """
+        {"INTENT": {"fast_path": n, "llm_fallback": m}, ...}
+        """
+        intents = set(self.hit_counts) | set(self.fallback_counts)
+        return {
+            intent: {"fast_path": self.hit_counts[intent], "llm_fallback": self.fallback_counts[intent]}
+            for intent in sorted(intents)
+        }
+
+    @staticmethod
+    def _record(intent: str, method: str, confidence: float = None):
+        TELEMETRY.counter("router_intents_total", intent=intent, method=method)
+        span = TELEMETRY.current_span()
+        if span:
+            span.set(intent=intent, method=method, confidence=confidence)
+
+    def _route_with_llm(self, query: str) -> str:
+        """
+        Asks the LLM to classify the query (one Groq round trip).
+        """
         messages = [
             {"role": "system", "content": ROUTER_PROMPT},
             {"role": "user", "content": query}
@@ -2,28 +2,67 @@ from llm.groq_client import GroqClient
 from utils.prompts import SUMMARY_PROMPT
 from storage.vector_store import IPOVectorStore
 from storage.financial_db import FinancialDatabase
+from utils.telemetry import traced
+from utils.context_builder import ContextBuilder, CONTEXT_BUILDER
+from storage.reranker import CrossEncoderReranker
 
 class SummaryAgent:
-    def __init__(self, llm_client: GroqClient, vector_store: IPOVectorStore, db: FinancialDatabase):
+    def __init__(self, llm_client: GroqClient, vector_store: IPOVectorStore, db: FinancialDatabase, context_builder: ContextBuilder = None,
+                 reranker: CrossEncoderReranker = None):
         self.llm = llm_client
         self.vector_store = vector_store
         self.db = db
+        # Dedupes, merges and trims the excerpts to the SUMMARY token budget (metrics included)
+        self.context_builder = context_builder or CONTEXT_BUILDER
+        # Optional cross-encoder stage over an over-fetched candidate set (see RERANK_SETTINGS)
+        self.reranker = reranker
 
-    def handle(self) -> str:
+    @traced("agent.summary.handle")
+    def handle(self, query: str = None, stream=False):
         """
         Generates a comprehensive summary.
         Aggregates data from Financials, Risks, and Business sections.
+        The summary does not depend on the exact query wording.
+        With stream=True, returns a generator of text deltas instead of a string.
+        """
+        return self.answer(query, self.retrieve(query), stream=stream)
+
+    @traced("agent.summary.retrieve")
+    def retrieve(self, query: str = None) -> list:
+        """
+        Local retrieval only (no LLM call): top risk and business excerpts.
+        Two small local searches, run in turn: a thread pool per query would cost more than it saves.
+        """
+        # Get Top Risks (Broad search for 'risk')
+        risk_results = self._search("major risks", section_filter="RISK_FACTORS")
+
+        # Get Business Summary (Broad search for 'business model')
+        biz_results = self._search("business model company overview", section_filter="BUSINESS_OVERVIEW")
+        return risk_results + biz_results
+
+    def _search(self, query: str, section_filter=None) -> list:
+        if self.reranker:
+            return self.reranker.retrieve(self.vector_store, query, "SUMMARY", n_results=3, section_filter=section_filter)
+        return self.vector_store.query(query, n_results=3, section_filter=section_filter)
+
+    @traced("agent.summary.answer")
+    def answer(self, query: str, vector_results: list, stream=False):
+        """
+        Synthesizes the summary from the key financials and the retrieved excerpts.
         """
         # 1. Get Key Financials
         metrics = self.db.get_all_metrics()
         fin_text = "\n".join([f"{k}: {v}" for k, v in metrics.items()])
         
-        # 2. Get Top Risks (Broad search for 'risk')
-        risk_results = self.vector_store.query("major risks", n_results=3, section_filter="RISK_FACTORS")
+        # Excerpts that fit the budget, best-ranked first
+        vector_results = self.context_builder.build(vector_results, "SUMMARY", reserved_text=fin_text)["passages"]
+
+        # 2. Top Risks
+        risk_results = [r for r in vector_results if r['metadata']['section'] == "RISK_FACTORS"]
         risk_text = "\n".join([r['text'] for r in risk_results])
         
-        # 3. Get Business Summary (Broad search for 'business model')
-        biz_results = self.vector_store.query("business model company overview", n_results=3, section_filter="BUSINESS_OVERVIEW")
+        # 3. Business Summary
+        biz_results = [r for r in vector_results if r['metadata']['section'] == "BUSINESS_OVERVIEW"]
         biz_text = "\n".join([r['text'] for r in biz_results])
         
         full_context = f"""
@@ -41,6 +80,9 @@ class SummaryAgent:
             {"role": "system", "content": SUMMARY_PROMPT.format(context=full_context)},
         ]
 
+        if stream:
+            return self.llm.chat_stream(messages, temperature=0.2)
+
         answer = self.llm.chat(messages, temperature=0.2)
         return answer
 
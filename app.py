@@ -1,8 +1,12 @@
 import streamlit as st
+import hashlib
 import os
 import shutil
 import signal
+import subprocess
 import sys
+import threading
+import time
 
 # FIX: Windows Compatibility for CrewAI (Mock missing Unix signals)
 if sys.platform.startswith('win'):
@@ -18,14 +22,15 @@ if sys.platform.startswith('win'):
     safe_signal('SIGUSR1', 10) # User defined signal 1 (just in case)
     safe_signal('SIGUSR2', 12) # User defined signal 2 (just in case) 
 
-# Import Ingestion Logic
-from ingestion.pdf_parser import IPOParser
-from ingestion.chunker import IPOChunker
-from ingestion.financial_extractor import FinancialExtractor
+# Import Ingestion Logic (runs in the background worker, see ingestion/worker.py)
+from ingestion.job_queue import IngestionJobQueue
 
 # Import Storage Logic
-from storage.vector_store import IPOVectorStore
-from storage.financial_db import FinancialDatabase
+from storage.ingestion_cache import IngestionCache
+from storage.answer_cache import SHARED_ANSWER_CACHE
+from storage.vector_store import reopen_chroma_client
+from utils.telemetry import TELEMETRY
+from llm.errors import LLMError
 
 # Import Agent Logic
 from crew.crew_setup import IPOCrew
@@ -37,6 +42,72 @@ st.set_page_config(
     layout="wide"
 )
 
+UPLOAD_DIR = "uploads"
+# Documents ingested at the same time by the auto-started worker
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))
+
+@st.cache_resource
+def get_job_queue():
+    return IngestionJobQueue()
+
+@st.cache_resource
+def get_worker_handle():
+    # Shared by every session of this server, so at most one worker gets spawned
+    return {"process": None}
+
+def ensure_ingestion_worker():
+    """
+    Starts `python -m ingestion.worker` unless one is alive (spawned here or run by hand).
+    """
+    handle = get_worker_handle()
+    process = handle["process"]
+    if process is not None and process.poll() is None:
+        return
+    if get_job_queue().live_workers():
+        return
+    handle["process"] = subprocess.Popen([
+        sys.executable, "-m", "ingestion.worker",
+        "--workers", str(INGESTION_WORKERS),
+        # Split the cores between the documents being parsed at the same time
+        "--parse-workers", str(max(1, (os.cpu_count() or 1) // INGESTION_WORKERS)),
+    ])
+
+@st.cache_resource
+def get_loaded_jobs():
+    # doc_id -> last finished ingestion job whose index this server has reopened
+    return {"lock": threading.Lock(), "jobs": {}}
+
+def load_ingestion_result(job):
+    """
+    Picks up a finished ingestion job, once per job however many sessions watch it.
+    The worker wrote the chunks and invalidated answers in its own process only, so here:
+    - the Chroma client is reopened (it would keep serving the index it had loaded before),
+    - the document's cached answers are dropped (they may cite chunks the re-index pruned).
+    Sessions with a crew built before the job rebuild it (see crew_is_stale()).
+    """
+    loaded = get_loaded_jobs()
+    doc_id = job["result"]["doc_id"]
+    with loaded["lock"]:
+        if loaded["jobs"].get(doc_id) != job["id"]:
+            reopen_chroma_client()
+            SHARED_ANSWER_CACHE.invalidate(doc_id)
+            loaded["jobs"][doc_id] = job["id"]
+
+def crew_is_stale() -> bool:
+    """
+    True when the session's document was re-ingested (by any session) after its crew was built.
+    """
+    latest = get_loaded_jobs()["jobs"].get(st.session_state.doc_id)
+    return latest is not None and latest != st.session_state.crew_job_id
+
+@st.cache_resource
+def start_metrics_endpoint():
+    # Prometheus scrape target for this server's query path (off unless IPO_METRICS_PORT is set)
+    port = int(os.getenv("IPO_METRICS_PORT", "0"))
+    return TELEMETRY.serve(port) if port else None
+
+start_metrics_endpoint()
+
 st.title("📈 AI-Powered IPO Analyzer")
 st.markdown("### Retail-Safe Document Intelligence System")
 
@@ -47,54 +118,89 @@ if "ingested" not in st.session_state:
     st.session_state.ingested = False
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "doc_id" not in st.session_state:
+    st.session_state.doc_id = None
+if "job_id" not in st.session_state:
+    st.session_state.job_id = None
+if "crew_job_id" not in st.session_state:
+    st.session_state.crew_job_id = None
 
 # --- SIDEBAR: Ingestion ---
 with st.sidebar:
     st.header("Upload RHP")
     uploaded_file = st.file_uploader("Upload IPO PDF (Red Herring Prospectus)", type=["pdf"])
 
-    if uploaded_file and not st.session_state.ingested:
+    if uploaded_file and not st.session_state.ingested and st.session_state.job_id is None:
         if st.button("Start Analysis"):
-            with st.spinner("Step 1/4: Parsing PDF & Detecting Sections..."):
-                # Save temp file
-                temp_path = "temp_rhp.pdf"
-                with open(temp_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-                
-                parser = IPOParser(temp_path)
-                parsed_data = parser.parse()
-                st.success(f"Parsed {len(parsed_data)} pages.")
-
-            with st.spinner("Step 2/4: Chunking & Metadata..."):
-                chunker = IPOChunker()
-                chunks = chunker.chunk_document(parsed_data)
-                st.success(f"Created {len(chunks)} chunks.")
-
-            with st.spinner("Step 3/4: Extracting Financials..."):
-                extractor = FinancialExtractor()
-                financials = extractor.extract_metrics(chunks)
-                st.info(f"Extracted: {financials}")
-
-            with st.spinner("Step 4/4: Populating Databases..."):
-                # Vector DB
-                vector_store = IPOVectorStore()
-                # Clear old data? For now, we append. Ideally, reset collection for new IPO.
-                vector_store.add_chunks(chunks)
-                
-                # Financial DB
-                fin_db = FinancialDatabase()
-                fin_db.store_metrics(financials)
+            # Save under a content-derived name so queued uploads never overwrite each other
+            data = uploaded_file.getbuffer()
+            os.makedirs(UPLOAD_DIR, exist_ok=True)
+            pdf_path = os.path.join(UPLOAD_DIR, f"{hashlib.sha256(data).hexdigest()[:16]}.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(data)
 
+            ensure_ingestion_worker()
+            st.session_state.job_id = get_job_queue().enqueue(pdf_path)
+            st.rerun()
+
+    if st.session_state.job_id is not None and not st.session_state.ingested:
+        job = get_job_queue().get(st.session_state.job_id)
+
+        if job["status"] in ("queued", "running"):
+            # The worker does the work; this rerun only polls the queue and the stage checkpoints
+            ensure_ingestion_worker()
+            stages = IngestionCache().open_job(job["doc_id"]).summary()
+            done = sum(stage["status"] == "done" for stage in stages.values())
+            st.progress(done / len(stages), text=f"Ingesting document ({done}/{len(stages)} stages)")
+            for name, stage in stages.items():
+                if stage["status"] == "running":
+                    total = f"/{stage['total']}" if stage["total"] else ""
+                    st.caption(f"{name}: {stage['progress']}{total}")
+            st.write(job["message"])
+            time.sleep(1)
+            st.rerun()
+
+        elif job["status"] == "done":
+            result = job["result"]
+            if result["cached"]:
+                st.success(f"Reused cached analysis: {result['pages']} pages, {result['chunks']} chunks.")
+            else:
+                st.success(f"Parsed {result['pages']} pages and indexed {result['chunks']} chunks.")
+            st.info(f"Extracted: {result['financials']}")
+
+            load_ingestion_result(job)
             st.session_state.ingested = True
-            st.session_state.crew = IPOCrew() # Initialize Crew with new data
+            st.session_state.doc_id = result["doc_id"]
+            # A new crew, so its stores open the collection through the reopened client
+            st.session_state.crew = IPOCrew(doc_id=result["doc_id"])
+            st.session_state.crew_job_id = job["id"]
+            if not result["chart_data"]:
+                # Tables gave nothing to chart: let the LLM try in the background
+                st.session_state.crew.chart_agent.start_fallback()
             st.success("✅ Ingestion Complete! You can now ask questions.")
 
+        else:
+            # First line only; the traceback is in the queue DB and the worker's output
+            st.error(f"Ingestion failed: {(job['error'] or 'unknown error').splitlines()[0]}")
+            if st.button("Retry"):
+                # Completed stages are checkpointed, so a retry resumes where this attempt stopped
+                st.session_state.job_id = get_job_queue().enqueue(job["pdf_path"])
+                st.rerun()
+
     if st.session_state.ingested:
         st.success("System Ready")
         if st.button("Reset / New Upload"):
             st.session_state.ingested = False
+            st.session_state.job_id = None
             st.session_state.messages = []
-            st.experimental_rerun()
+            st.rerun()
+
+    show_debug = st.checkbox("Show debug panel", value=os.getenv("IPO_DEBUG_PANEL") == "1")
+
+# Another session re-ingested this document: the old crew's collection would serve pruned chunks
+if st.session_state.ingested and crew_is_stale():
+    st.session_state.crew = IPOCrew(doc_id=st.session_state.doc_id)
+    st.session_state.crew_job_id = get_loaded_jobs()["jobs"][st.session_state.doc_id]
 
 # --- MAIN: Chat Interface ---
 
@@ -122,45 +228,81 @@ else:
 
         # Generate Response
         with st.chat_message("assistant"):
-            with st.spinner("Agents are consulting the document..."):
-                try:
-                    response_text = st.session_state.crew.process_query(user_query)
-                    st.markdown(response_text)
-                    st.session_state.messages.append({"role": "assistant", "content": response_text})
-                except Exception as e:
-                    st.error(f"Error processing query: {e}")
+            try:
+                with st.spinner("Agents are consulting the document..."):
+                    # Routing + retrieval happen here; generation streams below
+                    token_stream = st.session_state.crew.process_query(user_query, stream=True)
+                # Render tokens as they arrive instead of waiting for the full answer
+                response_text = st.write_stream(token_stream)
+                st.session_state.messages.append({"role": "assistant", "content": response_text})
+            except LLMError as e:
+                st.error(f"The language model request failed: {e}")
+            except Exception as e:
+                st.error(f"Error processing query: {e}")
 
 # --- NEW: Financial Charts Section ---
 if st.session_state.ingested:
     with st.expander("📊 View Financial Trends (Charts)", expanded=False):
-        if st.button("Generate Charts"):
-            with st.spinner("Extracting trend data from document..."):
-                chart_data = st.session_state.crew.chart_agent.get_trend_data()
+        # Trend data is computed at ingestion, so this is a DB read, not an LLM call
+        chart_data = st.session_state.crew.chart_agent.get_stored_trend_data()
+
+        if chart_data and "years" in chart_data and "data" in chart_data:
+            import pandas as pd
+            years = chart_data["years"]
+            data = chart_data["data"]
+            
+            # 1. Revenue Chart
+            if "Revenue" in data:
+                st.subheader("Revenue Trend (in ₹)")
+                df_rev = pd.DataFrame({"Year": years, "Revenue": data["Revenue"]})
+                st.bar_chart(df_rev.set_index("Year"))
+            
+            # 2. Profit Chart
+            if "Profit" in data:
+                st.subheader("Profit (PAT) Trend (in ₹)")
+                df_pat = pd.DataFrame({"Year": years, "Profit": data["Profit"]})
+                st.bar_chart(df_pat.set_index("Year"), color="#00FF00") # Green for profit
                 
-                if chart_data and "years" in chart_data and "data" in chart_data:
-                    import pandas as pd
-                    years = chart_data["years"]
-                    data = chart_data["data"]
-                    
-                    # 1. Revenue Chart
-                    if "Revenue" in data:
-                        st.subheader("Revenue Trend (in ₹)")
-                        df_rev = pd.DataFrame({"Year": years, "Revenue": data["Revenue"]})
-                        st.bar_chart(df_rev.set_index("Year"))
-                    
-                    # 2. Profit Chart
-                    if "Profit" in data:
-                        st.subheader("Profit (PAT) Trend (in ₹)")
-                        df_pat = pd.DataFrame({"Year": years, "Profit": data["Profit"]})
-                        st.bar_chart(df_pat.set_index("Year"), color="#00FF00") # Green for profit
-                        
-                    # 3. Net Worth Chart
-                    if "Net Worth" in data:
-                        st.subheader("Net Worth Trend (in ₹)")
-                        df_nw = pd.DataFrame({"Year": years, "Net Worth": data["Net Worth"]})
-                        st.line_chart(df_nw.set_index("Year"))
-                else:
-                    st.warning("Could not extract sufficient data for charts.")
+            # 3. Net Worth Chart
+            if "Net Worth" in data:
+                st.subheader("Net Worth Trend (in ₹)")
+                df_nw = pd.DataFrame({"Year": years, "Net Worth": data["Net Worth"]})
+                st.line_chart(df_nw.set_index("Year"))
+
+            if chart_data.get("pages"):
+                st.caption(f"{chart_data.get('basis')} figures in ₹ {chart_data.get('unit')}, from page(s) {', '.join(map(str, chart_data['pages']))}")
+            elif chart_data.get("source") == "llm":
+                st.caption("Figures extracted by the LLM from the document text.")
+        elif st.session_state.crew.chart_agent.fallback_running:
+            st.info("No trend tables were found; extracting trend data from the text in the background...")
+            st.button("Refresh")
+        else:
+            st.warning("Could not extract sufficient data for charts.")
+            if st.button("Retry extraction"):
+                st.session_state.crew.chart_agent.start_fallback()
+                st.rerun()
+
+# --- Debug: where did the time go? ---
+if st.session_state.ingested and show_debug:
+    with st.expander("🛠️ Debug: per-query latency breakdown", expanded=True):
+        import pandas as pd
+        traces = [t for t in TELEMETRY.recent_traces(limit=50, name="query") if t["attrs"].get("doc_id") == st.session_state.doc_id][:5]
+        if not traces:
+            st.caption("No queries traced yet.")
+        for trace in traces:
+            attrs = trace["attrs"]
+            cache_note = " · answer cache hit" if attrs.get("cache_hit") else ""
+            st.markdown(f"**{attrs.get('query', '')}** — {attrs.get('intents', '?')}, {trace['duration_ms']:.0f} ms{cache_note}")
+            rows = [
+                {
+                    "span": "\u2003" * span["depth"] + span["name"],
+                    "ms": span["duration_ms"],
+                    "details": ", ".join(f"{k}={v}" for k, v in span["attrs"].items() if v is not None and k not in ("query", "doc_id")),
+                    "error": span["error"] or "",
+                }
+                for span in trace["spans"]
+            ]
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
 
 # Footer
 st.markdown("---")
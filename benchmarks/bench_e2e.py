@@ -0,0 +1,280 @@
+"""
+End-to-end benchmark: synthetic RHP -> parse -> chunk -> extract -> index -> query -> crew.
+
+    python -m benchmarks.bench_e2e --pages 300 --repeat 3 --report bench_report.json
+    python -m benchmarks.bench_e2e --pages 300 --baseline old_report.json
+
+Generates a synthetic RHP (benchmarks/synthetic_rhp.py, or --pdf for a real one)
+and times each stage in isolation:
+- parse    IPOParser.parse
+- chunk    IPOChunker.chunk_document
+- extract  FinancialExtractor.extract_metrics
+- index    IPOVectorStore.add_chunks (fresh collection and embedding cache every run)
+- query    IPOVectorStore.query, per query
+- rerank   (--rerank) over-fetch + cross-encoder re-ranking, per query, cold score cache
+- crew     IPOCrew.process_query, per query, against llm/mock_server.py (answer cache off)
+and writes a JSON report with p50/p95 latency and throughput per stage, with the git commit so runs can be compared across commits (--baseline).
+Memory comes from the process peak RSS (ru_maxrss), which only ever grows: each stage
+records the peak so far and how much the stage raised it, a lower bound on its own
+footprint (0 when it fit in memory an earlier stage had already used).
+Everything is written to a scratch directory; the real chroma_db / financials.db are untouched.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = [
+    "What are the key risks for investors?",
+    "What was the revenue from operations?",
+    "Explain the business model simply.",
+    "How will the IPO proceeds be used?",
+    "Are there outstanding legal proceedings?",
+    "What are the risks and the revenue trend?",
+]
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process so far (MB), or None where unsupported.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def summarize(latencies: List[float], items: int, unit: str) -> Dict[str, Any]:
+    """
+    p50/p95/mean latency (ms) plus throughput in `unit`/s, where one run handles `items` units.
+    """
+    latencies = np.asarray(latencies)
+    return {
+        "runs": len(latencies),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "mean_ms": float(latencies.mean() * 1000),
+        "items": items,
+        "throughput": float(items / np.median(latencies)) if np.median(latencies) else None,
+        "unit": f"{unit}/s",
+        "process_peak_rss_mb": peak_rss_mb(),
+    }
+
+def timed(fn: Callable[[], Any], repeat: int, quiet=True):
+    """
+    Runs `fn` `repeat` times; returns (latencies in seconds, last result).
+    The stages print progress, which would swamp the report, so stdout is swallowed.
+    """
+    latencies, result = [], None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            start = time.perf_counter()
+            result = fn()
+            latencies.append(time.perf_counter() - start)
+    return latencies, result
+
+def run(pages: int, repeat: int, pdf_path: str = None, parse_workers: int = 1, llm_latency: float = 0.05, seed: int = 0,
+        rerank: bool = False, chunk_mode: str = "page") -> Dict[str, Any]:
+    from benchmarks.synthetic_rhp import make_rhp
+    from ingestion.pdf_parser import IPOParser
+    from ingestion.chunker import IPOChunker
+    from ingestion.financial_extractor import FinancialExtractor
+    from llm.mock_server import MockLLMServer
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "parse_workers": parse_workers,
+            "rerank": rerank,
+            "chunk_mode": chunk_mode,
+        },
+        "stages": {},
+    }
+    stages = report["stages"]
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Stores use relative default paths (chroma_db, financials.db, ...): keep them in the scratch dir
+        os.chdir(workdir)
+        try:
+            if pdf_path:
+                pdf_path = os.path.join(cwd, pdf_path)
+            else:
+                start = time.perf_counter()
+                pdf_path = make_rhp(os.path.join(workdir, "synthetic_rhp.pdf"), pages, seed)
+                report["meta"]["generate_s"] = time.perf_counter() - start
+            report["meta"]["pdf"] = os.path.basename(pdf_path)
+
+            report["meta"]["start_peak_rss_mb"] = peak_rss_mb()
+            layout = chunk_mode == "layout"
+            latencies, parsed = timed(lambda: IPOParser(pdf_path, workers=parse_workers, layout=layout).parse(), repeat)
+            report["meta"]["pages"] = len(parsed)
+            stages["parse"] = summarize(latencies, len(parsed), "pages")
+
+            chunker = IPOChunker(mode=chunk_mode)
+            latencies, chunks = timed(lambda: chunker.chunk_document(parsed), repeat)
+            report["meta"]["chunks"] = len(chunks)
+            stages["chunk"] = summarize(latencies, len(chunks), "chunks")
+
+            extractor = FinancialExtractor()
+            latencies, financials = timed(lambda: extractor.extract_metrics(chunks), repeat)
+            stages["extract"] = summarize(latencies, len(chunks), "chunks")
+
+            store, doc_id = index_stage(stages, chunks, repeat)
+            latencies = []
+            for _ in range(repeat):
+                for query in QUERIES:
+                    latencies += timed(lambda: store.query(query, n_results=5), 1)[0]
+            stages["query"] = summarize(latencies, 1, "queries")
+
+            reranker = rerank_stage(stages, store, repeat) if rerank else None
+
+            with MockLLMServer(latency=llm_latency, reply="Mock answer grounded in the document [Source: Page 3]") as server:
+                stages["crew"] = crew_stage(server, doc_id, financials, repeat, reranker)
+        finally:
+            os.chdir(cwd)
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    add_rss_growth(report)
+    return report
+
+def add_rss_growth(report: Dict[str, Any]):
+    """
+    Sets each stage's "rss_growth_mb": how far the process peak rose while it ran.
+    Stages run one after another, so the previous stage's peak is this stage's starting point.
+    """
+    previous = report["meta"].get("start_peak_rss_mb")
+    for stage in report["stages"].values():
+        peak = stage["process_peak_rss_mb"]
+        stage["rss_growth_mb"] = peak - previous if peak is not None and previous is not None else None
+        previous = peak
+
+def index_stage(stages: Dict[str, Any], chunks: List[Dict[str, Any]], repeat: int):
+    """
+    Times IPOVectorStore.add_chunks into an empty collection with a cold embedding cache.
+    Returns the indexed store (for the query and crew stages) and its doc_id.
+    """
+    from storage.vector_store import IPOVectorStore
+    from storage.embedding_cache import EmbeddingCache
+
+    doc_id = "bench"
+    store = IPOVectorStore(doc_id=doc_id)
+    latencies = []
+    for run_number in range(repeat):
+        store.reset()
+        # A warm cache would turn every run after the first into lookups
+        store.embedding_cache = EmbeddingCache(os.path.join("embedding_cache", f"bench_{run_number}.db"))
+        latencies += timed(lambda: store.add_chunks(chunks), 1)[0]
+    stages["index"] = summarize(latencies, len(chunks), "chunks")
+    return store, doc_id
+
+def rerank_stage(stages: Dict[str, Any], store, repeat: int):
+    """
+    Times CrossEncoderReranker.retrieve (RISK settings) per query with an empty score cache.
+    Returns the re-ranker for the crew stage.
+    """
+    from storage.reranker import CrossEncoderReranker
+
+    reranker = CrossEncoderReranker()
+    latencies = []
+    for _ in range(repeat):
+        reranker.clear()
+        for query in QUERIES:
+            latencies += timed(lambda: reranker.retrieve(store, query, "RISK", n_results=5), 1)[0]
+    stages["rerank"] = summarize(latencies, 1, "queries")
+    stages["rerank"]["fetch_k"] = reranker.settings["RISK"]["fetch_k"]
+    return reranker
+
+def crew_stage(server, doc_id: str, financials: Dict[str, Any], repeat: int, reranker=None) -> Dict[str, Any]:
+    """
+    IPOCrew.process_query latency per query, LLM calls answered by the mock server.
+    """
+    # The Groq SDK appends /openai/v1 itself
+    os.environ["GROQ_BASE_URL"] = server.base_url[:-len("/openai/v1")]
+    os.environ.setdefault("GROQ_API_KEY", "mock-key")
+    # No client-side rate limit against the mock, so the stage measures the crew
+    os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "0")
+
+    from crew.crew_setup import IPOCrew
+    from storage.answer_cache import SemanticAnswerCache
+    from storage.financial_db import FinancialDatabase
+
+    FinancialDatabase(document_id=doc_id).store_metrics(financials)
+    # Threshold above any cosine similarity: every query is generated, never served from cache
+    crew = IPOCrew(doc_id=doc_id, answer_cache=SemanticAnswerCache(similarity_threshold=2.0), reranker=reranker)
+    latencies = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            latencies += timed(lambda: crew.process_query(query), 1)[0]
+    result = summarize(latencies, 1, "queries")
+    result["llm_requests"] = server.request_count
+    result["llm_latency_s"] = server.latency
+    return result
+
+def print_report(report: Dict[str, Any], baseline: Dict[str, Any] = None):
+    meta = report["meta"]
+    print(f"commit {meta['commit']}: {meta['pages']} pages, {meta['chunks']} chunks, {meta['repeat']} run(s) per stage")
+    if baseline and baseline["meta"].get("pages") != meta["pages"]:
+        print(f"  ⚠️ Baseline was run on {baseline['meta'].get('pages')} pages; latencies are not directly comparable")
+    print(f"  {'stage':<8} {'p50 ms':>10} {'p95 ms':>10} {'throughput':>18} {'RSS growth':>11} {'process peak':>13}" + ("   p50 vs baseline" if baseline else ""))
+    for name, stage in report["stages"].items():
+        line = (f"  {name:<8} {stage['p50_ms']:>10.1f} {stage['p95_ms']:>10.1f} "
+                f"{stage['throughput'] or 0:>10.1f} {stage['unit']:<7} {stage['rss_growth_mb'] or 0:>8.0f} MB {stage['process_peak_rss_mb'] or 0:>10.0f} MB")
+        before = (baseline or {}).get("stages", {}).get(name)
+        if before and before["p50_ms"]:
+            line += f"   {(stage['p50_ms'] / before['p50_ms'] - 1) * 100:+6.1f}% (was {before['p50_ms']:.1f} ms @ {baseline['meta'].get('commit')})"
+        print(line)
+    if report["peak_rss_mb"]:
+        print(f"  process peak RSS {report['peak_rss_mb']:.0f} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end ingestion and query benchmark.")
+    parser.add_argument("--pages", type=int, default=300, help="size of the synthetic RHP (100-1000 is typical)")
+    parser.add_argument("--pdf", help="benchmark this PDF instead of a synthetic one")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--parse-workers", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds the mock LLM waits per request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rerank", action="store_true", help="add the cross-encoder re-ranking stage (also used by the crew)")
+    parser.add_argument("--chunk-mode", choices=("page", "layout"), default="page", help="IPOChunker mode (layout also parses page layout)")
+    parser.add_argument("--report", default="bench_report.json", help="where to write the JSON report")
+    parser.add_argument("--baseline", help="earlier report to compare p50 latencies against")
+    args = parser.parse_args()
+
+    report = run(args.pages, args.repeat, args.pdf, args.parse_workers, args.llm_latency, args.seed, args.rerank, args.chunk_mode)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"Report written to {args.report}")
@@ -0,0 +1,161 @@
+"""
+Benchmark: single-pass FinancialExtractor vs the original one-regex-per-pattern implementation.
+
+    python -m benchmarks.bench_extractor --pages 300 --repeat 5
+
+Builds a synthetic FINANCIAL_STATEMENTS section (plus randomised edge cases:
+anchors split across chunk seams, overlapping anchors, unparseable numbers,
+Rupee symbols), checks that both implementations return identical metrics,
+then times them.
+"""
+import argparse
+import contextlib
+import io
+import random
+import re
+import time
+from typing import Dict, Any, List
+
+from ingestion.financial_extractor import FinancialExtractor
+
+def legacy_extract_metrics(patterns: Dict[str, List[str]], text_chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    The original extract_metrics(), kept verbatim as the reference implementation.
+    """
+    extracted_financials = {
+        "revenue": None,
+        "pat": None,
+        "eps": None,
+        "net_worth": None,
+        "total_borrowings": None
+    }
+    financial_chunks = [c for c in text_chunks if c['section'] == "FINANCIAL_STATEMENTS"]
+    if not financial_chunks:
+        financial_chunks = text_chunks
+    full_financial_text = " ".join([c['text'] for c in financial_chunks])
+    full_financial_text = full_financial_text.replace('₹', '').replace('Rs.', '')
+
+    for key, key_patterns in patterns.items():
+        for pattern in key_patterns:
+            match = re.search(pattern, full_financial_text, re.IGNORECASE)
+            if match:
+                value_str = match.group(1).replace(',', '').strip()
+                try:
+                    if value_str == '-':
+                        value = 0.0
+                    else:
+                        value = float(value_str)
+                    extracted_financials[key] = value
+                    break
+                except ValueError:
+                    continue
+    return extracted_financials
+
+FILLER = (
+    "The Company has prepared these restated consolidated financial statements in accordance with "
+    "Ind AS notified under the Companies Act. Figures for the previous year have been regrouped "
+    "wherever necessary to conform to the current year's classification. Trade receivables, "
+    "inventories and other current assets are stated at amortised cost less expected credit loss. "
+)
+
+LINES = [
+    "Revenue from operations {a} {b}",
+    "Total Income {a} {b}",
+    "Profit for the period/year {a} {b}",
+    "Net Profit for the period/year ₹ {a}",
+    "Profit After Tax Rs.{a}",
+    "Basic earnings per equity share (in ₹) {a}.45 {b}.10",
+    "Diluted earnings per equity share {a}.40",
+    "EPS (face value ₹10) {a}.12",
+    "Net Worth {a}",
+    "Total Borrowings - {a}",
+    "Non-current borrowings {a}",
+    "Total Debt , ,",
+    "Revenue from operations , , {a}",
+    "steps taken to improve EPS ratios",
+]
+
+def make_chunks(pages: int, seed: int = 0, chunk_size: int = 1000) -> List[Dict[str, Any]]:
+    """
+    ~3 chunks per page of filler with metric lines sprinkled in, mostly towards the end
+    (where the statements are), and some chunk boundaries cut through anchors on purpose.
+    """
+    rng = random.Random(seed)
+    chunks = []
+    for page in range(1, pages + 1):
+        text = FILLER * 3
+        if rng.random() < 0.05 + 0.5 * (page / pages) ** 4:
+            line = rng.choice(LINES).format(a=f"{rng.randint(1, 99999):,}", b=f"{rng.randint(1, 9999):,}")
+            at = rng.randint(0, len(text))
+            text = text[:at] + " " + line + " " + text[at:]
+        for start in range(0, len(text), chunk_size):
+            piece = text[start:start + chunk_size]
+            if rng.random() < 0.1:
+                # Cut this piece in the middle of a word to create a seam inside an anchor
+                cut = rng.randint(1, max(1, len(piece) - 1))
+                chunks.append({"text": piece[:cut], "section": "FINANCIAL_STATEMENTS", "page": page, "source": "RHP"})
+                piece = piece[cut:]
+            chunks.append({"text": piece, "section": "FINANCIAL_STATEMENTS", "page": page, "source": "RHP"})
+    return chunks
+
+def split_anchor_cases() -> List[List[Dict[str, Any]]]:
+    """
+    Hand-written edge cases, each a chunk list.
+    """
+    def chunks(*texts, section="FINANCIAL_STATEMENTS"):
+        return [{"text": t, "section": section, "page": 1, "source": "RHP"} for t in texts]
+    return [
+        chunks("Revenue from", "operations 1,234.5"),
+        chunks("Revenue from operati", "ons", "12"),
+        chunks("Net Profit for the period/", "year 77"),
+        chunks("EPS", "", "3.14"),
+        chunks("Total Borrowings", "-"),
+        chunks("Net Worth " + "x" * 120 + " 5", "Net Worth 6"),
+        chunks("Basic earnings per equity share " + "9" * 800 + ".5"),
+        chunks("EP\u017f 1.25"),  # long s matches "S" under re.IGNORECASE
+        chunks("\u0130 Total Income 40 \u2013 Net Worth 7"),  # lowercasing changes the length
+        chunks("nothing to see here"),
+        chunks(),
+        chunks("Revenue from operations 10", section="RISK_FACTORS"),
+    ]
+
+def run(pages: int, repeat: int, seed: int):
+    extractor = FinancialExtractor()
+    quiet = contextlib.redirect_stdout(io.StringIO())
+
+    cases = split_anchor_cases() + [make_chunks(20, seed=s, chunk_size=200) for s in range(50)]
+    with quiet:
+        for case in cases:
+            expected = legacy_extract_metrics(extractor.patterns, case)
+            actual = extractor.extract_metrics(case)
+            assert actual == expected, f"Mismatch: {actual} != {expected} for {case[:3]}"
+    print(f"✅ {len(cases)} equivalence cases match the legacy implementation")
+
+    chunks = make_chunks(pages, seed=seed)
+    timings = {}
+    for name, fn in (
+        ("legacy", lambda: legacy_extract_metrics(extractor.patterns, chunks)),
+        ("single-pass", lambda: extractor.extract_metrics(chunks)),
+    ):
+        best = float("inf")
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = fn()
+                best = min(best, time.perf_counter() - start)
+        timings[name] = (best, result)
+
+    assert timings["legacy"][1] == timings["single-pass"][1]
+    chars = sum(len(c["text"]) for c in chunks)
+    print(f"{pages} pages, {len(chunks)} chunks, {chars / 1e6:.1f}M chars -> {timings['legacy'][1]}")
+    for name, (best, _) in timings.items():
+        print(f"  {name:<12} {best * 1000:8.1f} ms  ({chars / best / 1e6:6.1f} M chars/s)")
+    print(f"  speed-up     {timings['legacy'][0] / timings['single-pass'][0]:8.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark FinancialExtractor against the legacy implementation.")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.pages, args.repeat, args.seed)
@@ -0,0 +1,108 @@
+"""
+Benchmark: app cold start and warm reruns.
+
+    python -m benchmarks.bench_startup --runs 3 --repeat 5
+
+Each run is a fresh interpreter (a cold server process) that:
+- imports what app.py imports (crew.crew_setup) and records which heavy modules it pulled in,
+- builds the first IPOCrew (loads the embedding model, opens Chroma / SQLite),
+- builds `--repeat` more crews, as a new session or a rerun on the warm server would,
+- builds `--repeat` crews with private (unshared) resources, i.e. what every crew cost before.
+Runs in a scratch directory, so no real chroma_db / financials.db is touched.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("chromadb", "groq", "crewai", "sentence_transformers", "torch", "fitz")
+
+def measure(repeat: int) -> dict:
+    """
+    Runs inside the child interpreter; returns timings in seconds.
+    """
+    start = time.perf_counter()
+    from crew.crew_setup import IPOCrew
+    import_s = time.perf_counter() - start
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    start = time.perf_counter()
+    IPOCrew(doc_id="bench")
+    first_crew_s = time.perf_counter() - start
+
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        IPOCrew(doc_id="bench")
+        warm.append(time.perf_counter() - start)
+
+    from llm.groq_client import GroqClient
+    from storage.vector_store import IPOVectorStore
+    from storage.financial_db import FinancialDatabase
+    from storage.embedding_engine import EmbeddingEngine
+    from storage.embedding_cache import EmbeddingCache
+    import chromadb
+    unshared = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        GroqClient()
+        IPOVectorStore(doc_id="bench", client=chromadb.PersistentClient(path="chroma_db"),
+                       engine=EmbeddingEngine(), embedding_cache=EmbeddingCache())
+        FinancialDatabase(document_id="bench")
+        unshared.append(time.perf_counter() - start)
+
+    return {
+        "import_s": import_s,
+        "first_crew_s": first_crew_s,
+        "warm_crew_s": statistics.median(warm),
+        "unshared_resources_s": statistics.median(unshared),
+        "loaded_at_import": loaded,
+    }
+
+def run(runs: int, repeat: int):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.getenv("PYTHONPATH")])))
+        for _ in range(runs):
+            start = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_startup", "--child", "--repeat", str(repeat)],
+                cwd=workdir, env=env, capture_output=True, text=True
+            )
+            wall_s = time.perf_counter() - start
+            if proc.returncode != 0:
+                raise RuntimeError(f"Benchmark child failed:\n{proc.stderr}")
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            result["process_s"] = wall_s
+            results.append(result)
+
+    def median(key):
+        return statistics.median(r[key] for r in results)
+
+    print(f"{runs} cold process(es), {repeat} warm crews each (medians)")
+    print(f"  import crew.crew_setup   {median('import_s') * 1000:8.1f} ms  (heavy modules loaded: {', '.join(results[0]['loaded_at_import']) or 'none'})")
+    print(f"  first IPOCrew (cold)     {median('first_crew_s') * 1000:8.1f} ms")
+    print(f"  next IPOCrew (warm)      {median('warm_crew_s') * 1000:8.1f} ms")
+    print(f"  unshared resources       {median('unshared_resources_s') * 1000:8.1f} ms  (per crew before sharing)")
+    print(f"  whole child process      {median('process_s') * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark app cold start and warm reruns.")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to measure")
+    parser.add_argument("--repeat", type=int, default=5, help="warm crews built per interpreter")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        import contextlib
+        import io
+        with contextlib.redirect_stdout(io.StringIO()):
+            timings = measure(args.repeat)
+        print(json.dumps(timings))
+    else:
+        run(args.runs, args.repeat)
@@ -0,0 +1,147 @@
+"""
+Synthetic RHP-style PDF generator for benchmarks.
+
+    python -m benchmarks.synthetic_rhp rhp_500.pdf --pages 500
+
+Lays out the sections IPOParser detects, in the usual RHP order and rough
+proportions (RISK FACTORS, OUR BUSINESS, RESTATED FINANCIAL INFORMATION with
+ruled multi-year tables, MANAGEMENT'S DISCUSSION AND ANALYSIS, ...), each page
+filled with ~3,000 characters of prospectus-like prose. Deterministic per seed.
+"""
+import argparse
+import random
+from typing import List, Tuple
+
+import fitz  # PyMuPDF
+
+# (header, share of the page count, sentences the prose is drawn from)
+SECTIONS: List[Tuple[str, float, List[str]]] = [
+    ("GENERAL INFORMATION", 0.04, [
+        "This Red Herring Prospectus is dated and filed with the Registrar of Companies.",
+        "The Book Running Lead Managers to the Offer are registered with SEBI as merchant bankers.",
+        "Bids can be submitted only through the ASBA process by all investors.",
+    ]),
+    ("RISK FACTORS", 0.22, [
+        "Any slowdown in demand for our products could adversely affect our revenue from operations.",
+        "We depend on a limited number of suppliers for our key raw materials.",
+        "Our inability to comply with environmental regulations may result in penalties.",
+        "Fluctuations in foreign exchange rates could adversely affect our results of operations.",
+        "We have contingent liabilities which, if materialised, may affect our financial condition.",
+        "Our Promoters will continue to hold a significant shareholding after the Offer.",
+        "There are outstanding legal proceedings involving our Company and our Directors.",
+    ]),
+    ("OUR BUSINESS", 0.18, [
+        "We are a leading manufacturer of speciality products with a pan-India distribution network.",
+        "Our manufacturing facilities are located in Gujarat and Maharashtra.",
+        "We serve customers across the automotive, pharmaceutical and consumer goods industries.",
+        "Our research and development team has developed over 120 products in the last three years.",
+        "We export to more than 30 countries, including the United States and Germany.",
+    ]),
+    ("USE OF PROCEEDS", 0.04, [
+        "The Net Proceeds are proposed to be used for repayment of certain outstanding borrowings.",
+        "A portion of the Net Proceeds will fund capital expenditure for the new manufacturing unit.",
+        "The deployment of funds will be monitored by a credit rating agency.",
+    ]),
+    ("RESTATED FINANCIAL INFORMATION", 0.22, [
+        "The restated consolidated financial information has been prepared in accordance with Ind AS.",
+        "Figures for the previous year have been regrouped wherever necessary.",
+        "Trade receivables are stated at amortised cost less expected credit loss.",
+        "Property, plant and equipment are stated at cost less accumulated depreciation.",
+    ]),
+    ("MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION", 0.15, [
+        "Our total income increased primarily due to higher sales volumes in the domestic market.",
+        "Finance costs decreased on account of repayment of term loans.",
+        "EBITDA margin improved due to better product mix and operating leverage.",
+    ]),
+    ("LEGAL AND OTHER INFORMATION", 0.15, [
+        "Except as disclosed, there are no outstanding criminal proceedings against our Company.",
+        "There are no material dues owed to micro, small and medium enterprises.",
+        "Our Company has obtained the material approvals required for its business.",
+    ]),
+]
+
+TABLE_METRICS = [
+    ("Revenue from operations", 1.0),
+    ("Total Income", 1.02),
+    ("Profit for the period/year", 0.11),
+    ("Basic earnings per equity share (₹)", None),
+    ("Net Worth", 0.45),
+    ("Total Borrowings", 0.2),
+]
+PAGE_CHARS = 3000
+
+def page_text(rng: random.Random, sentences: List[str], chars: int = PAGE_CHARS) -> str:
+    paragraphs, size = [], 0
+    while size < chars:
+        paragraph = " ".join(rng.choice(sentences) for _ in range(rng.randint(3, 6)))
+        paragraphs.append(paragraph)
+        size += len(paragraph)
+    return "\n\n".join(paragraphs)
+
+def draw_financial_table(page: "fitz.Page", rng: random.Random, top: float = 90) -> float:
+    """
+    Ruled three-year table of the metrics FinancialTableExtractor / FinancialExtractor look for.
+    Returns the y coordinate below the table.
+    """
+    revenue = rng.uniform(800, 40_000)
+    header = ["Particulars", "March 31, 2025", "March 31, 2024", "March 31, 2023"]
+    rows = [header]
+    for label, share in TABLE_METRICS:
+        values = []
+        for year in range(3):
+            base = revenue * (0.85 ** year)
+            value = rng.uniform(5, 60) * (0.9 ** year) if share is None else base * share * rng.uniform(0.9, 1.1)
+            values.append(f"{value:,.2f}")
+        rows.append([label] + values)
+
+    columns = [50, 250, 350, 450, 550]
+    row_height = 20
+    for i, row in enumerate(rows):
+        for j, cell in enumerate(row):
+            page.insert_text((columns[j] + 3, top + i * row_height + 14), cell, fontsize=9)
+    for i in range(len(rows) + 1):
+        page.draw_line((columns[0], top + i * row_height), (columns[-1], top + i * row_height))
+    for x in columns:
+        page.draw_line((x, top), (x, top + len(rows) * row_height))
+    return top + len(rows) * row_height
+
+def make_rhp(path: str, pages: int = 300, seed: int = 0, table_every: int = 8) -> str:
+    """
+    Writes a `pages`-page synthetic RHP to `path` and returns the path.
+    Every `table_every`-th page of the financial section carries a ruled table.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    rect = fitz.Rect(50, 50, 560, 800)
+
+    cover = doc.new_page()
+    cover.insert_textbox(rect, "RED HERRING PROSPECTUS\n\nSYNTHETIC INDUSTRIES LIMITED\n\nInitial Public Offering of Equity Shares", fontsize=14)
+
+    counts = [max(1, round(share * (pages - 1))) for _, share, _ in SECTIONS]
+    counts[-1] = max(1, pages - 1 - sum(counts[:-1]))
+    for (header, _, sentences), count in zip(SECTIONS, counts):
+        financial = header == "RESTATED FINANCIAL INFORMATION"
+        for i in range(count):
+            page = doc.new_page()
+            # The header opens the section; later pages carry it as a running title
+            title = header if i == 0 else f"{header.title()} (continued)"
+            if financial and i % table_every == 0:
+                page.insert_text((50, 60), f"{title} (Consolidated) (in Rs million)", fontsize=10)
+                body_top = draw_financial_table(page, rng) + 20
+                page.insert_textbox(fitz.Rect(50, body_top, 560, 800), page_text(rng, sentences, PAGE_CHARS // 2), fontsize=8)
+            else:
+                page.insert_textbox(rect, f"{title}\n\n{page_text(rng, sentences)}", fontsize=8)
+
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic RHP-style PDF.")
+    parser.add_argument("path")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    make_rhp(args.path, args.pages, args.seed)
+    print(f"Wrote {args.pages}-page synthetic RHP to {args.path}")
@@ -1,7 +1,13 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from llm.groq_client import GroqClient
 from storage.vector_store import IPOVectorStore
 from storage.financial_db import FinancialDatabase
+from storage.answer_cache import SemanticAnswerCache, SHARED_ANSWER_CACHE
+from storage.reranker import CrossEncoderReranker
 from agents.router_agent import RouterAgent
+from agents.intent_classifier import IntentClassifier
 from agents.financial_agent import FinancialAgent
 from agents.risk_agent import RiskAgent
 from agents.business_agent import BusinessAgent
@@ -9,53 +15,173 @@ from agents.summary_agent import SummaryAgent
 from agents.citation_agent import CitationAgent
 
 from agents.chart_agent import ChartAgent
+from utils.telemetry import TELEMETRY, traced
+
+# Headings used when several agents answer one compound question
+INTENT_TITLES = {
+    "FINANCIAL": "Financials",
+    "RISK": "Risks",
+    "BUSINESS": "Business",
+    "SUMMARY": "Summary",
+}
 
 class IPOCrew:
-    def __init__(self):
+    # Process-wide thread pools handed out by shared_executor(), one per size
+    _executors = {}
+    _executors_lock = threading.Lock()
+
+    def __init__(self, doc_id=None, answer_cache: SemanticAnswerCache = None, concurrent=True, max_workers=8,
+                 reranker: CrossEncoderReranker = None):
         # Initialize Shared Resources
-        self.llm = GroqClient()
-        self.vector_store = IPOVectorStore()
-        self.db = FinancialDatabase()
+        # The LLM client, Chroma client, embedding model and DB connection are process-wide
+        # singletons, so a new crew (new session, new upload) loads nothing twice.
+        # Retrieval is scoped to the ingested document's own collection
+        self.doc_id = doc_id
+        self.llm = GroqClient.shared()
+        self.vector_store = IPOVectorStore(doc_id=doc_id)
+        self.db = FinancialDatabase(document_id=doc_id)
+        # Paraphrased questions about the same document skip routing and generation
+        self.answer_cache = answer_cache or SHARED_ANSWER_CACHE
+        # Concurrent mode: compound questions fan out to several agents in parallel.
+        # The pool is shared by every crew, so replaced crews leave no threads behind
+        # (the default size matches GroqClient's max_concurrency)
+        self.concurrent = concurrent
+        self.executor = self.shared_executor(max_workers) if concurrent else None
+        # Optional cross-encoder re-ranking of over-fetched candidates (IPO_RERANK=1 or pass one in)
+        if reranker is None and os.getenv("IPO_RERANK", "0") == "1":
+            reranker = CrossEncoderReranker.shared()
+        self.reranker = reranker
         
         # Initialize Agents
-        self.router = RouterAgent(self.llm)
-        self.financial_agent = FinancialAgent(self.llm, self.db, self.vector_store)
-        self.risk_agent = RiskAgent(self.llm, self.vector_store)
-        self.business_agent = BusinessAgent(self.llm, self.vector_store)
+        # Rules + embedding centroids resolve most intents without a Groq call
+        self.router = RouterAgent(self.llm, IntentClassifier(embed_fn=self.vector_store.embed))
+        self.financial_agent = FinancialAgent(self.llm, self.db, self.vector_store, reranker=self.reranker)
+        self.risk_agent = RiskAgent(self.llm, self.vector_store, reranker=self.reranker)
+        self.business_agent = BusinessAgent(self.llm, self.vector_store, reranker=self.reranker)
         self.citation_agent = CitationAgent(self.llm)
-        self.summary_agent = SummaryAgent(self.llm, self.vector_store, self.db)
-        self.chart_agent = ChartAgent(self.llm, self.vector_store) # NEW
+        self.summary_agent = SummaryAgent(self.llm, self.vector_store, self.db, reranker=self.reranker)
+        self.chart_agent = ChartAgent(self.llm, self.vector_store, self.db) # NEW
         self.citation_agent = CitationAgent(self.llm)
 
-    def process_query(self, query: str) -> str:
+    @classmethod
+    def shared_executor(cls, max_workers=8) -> ThreadPoolExecutor:
+        """
+        The process-wide pool of `max_workers` threads, created on first use.
+        """
+        with cls._executors_lock:
+            if max_workers not in cls._executors:
+                cls._executors[max_workers] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ipo-crew")
+            return cls._executors[max_workers]
+
+    @traced("query")
+    def process_query(self, query: str, stream=False):
         """
         Main entry point for the Streamlit app.
-        1. Route query
-        2. Execute specific agent
+        0. Serve from the semantic answer cache if possible (no Groq calls)
+        1. Route query (compound questions may get several intents in concurrent mode)
+        2. Execute the specific agent(s); independent branches run in parallel
         3. Verify citations
+        With stream=True, routing and retrieval still happen up front, but the
+        answer is returned as a generator of text deltas (citation check included).
+        Traced as a "query" span (routing, retrieval, embedding and LLM spans nested
+        under it); with stream=True the span closes when the stream does.
+        LLM failures raise LLMError (with stream=True, from the generator) and are never cached.
         """
+        span = TELEMETRY.current_span()
+        span.set(query=query[:80], doc_id=self.doc_id, stream=stream, cache_hit=False)
+        # Step 0: Semantic cache (similar query + same retrieved chunks => same answer)
+        query_embedding = self.vector_store.embed([query])[0]
+        cache_key = self.doc_id or ""
+        cached = self.answer_cache.lookup(cache_key, query_embedding)
+        if cached:
+            results_by_intent = self._retrieve_all(cached["intent"].split("+"), query)
+            chunk_ids = [r["id"] for results in results_by_intent.values() for r in results]
+            answer = self.answer_cache.confirm(cache_key, cached, chunk_ids)
+            if answer is not None:
+                print(f"♻️ Semantic cache hit ({cached['intent']})")
+                span.set(cache_hit=True, intents=cached["intent"])
+                return iter([answer]) if stream else answer
+
         # Step 1: Route
-        intent = self.router.route(query)
-        print(f"🤖 Detected Intent: {intent}")
-        
-        raw_response = ""
+        intents = self.router.route_multi(query) if self.concurrent else [self.router.route(query)]
+        print(f"🤖 Detected Intent: {'+'.join(intents)}")
+        span.set(intents="+".join(intents))
         
         # Step 2: Dispatch
-        if intent == "FINANCIAL":
-            raw_response = self.financial_agent.handle(query)
-        elif intent == "RISK":
-            raw_response = self.risk_agent.handle(query)
-        elif intent == "BUSINESS":
-            raw_response = self.business_agent.handle(query)
-        elif intent == "SUMMARY":
-            raw_response = self.summary_agent.handle()
-        elif intent == "OUT_OF_SCOPE":
-            return "I apologize, but this query seems outside the scope of this IPO document. Please ask about the specific IPO's financials, risks, or business."
+        if intents == ["OUT_OF_SCOPE"]:
+            message = "I apologize, but this query seems outside the scope of this IPO document. Please ask about the specific IPO's financials, risks, or business."
+            return iter([message]) if stream else message
+
+        intent_key = "+".join(intents)
+        results_by_intent = self._retrieve_all(intents, query)
+        chunk_ids = [r["id"] for results in results_by_intent.values() for r in results]
+
+        if len(intents) == 1:
+            agent = self._agent_for(intents[0])
+            vector_results = results_by_intent[intents[0]]
+            if stream:
+                tokens = agent.answer(query, vector_results, stream=True)
+                return self._stream_and_cache(tokens, cache_key, query_embedding, intent_key, chunk_ids)
+            raw_response = agent.answer(query, vector_results)
         else:
-            # Fallback
-            raw_response = self.business_agent.handle(query)
+            # Every branch generates concurrently, so latency tracks the slowest one
+            raw_response = self._answer_all(intents, query, results_by_intent)
+            if stream:
+                return self._stream_and_cache(iter([raw_response]), cache_key, query_embedding, intent_key, chunk_ids)
 
         # Step 3: Verify (The Silent Enforcer)
         final_response = self.citation_agent.verify(raw_response)
-        
+
+        self.answer_cache.store(cache_key, query_embedding, intent_key, chunk_ids, final_response)
         return final_response
+
+    def _retrieve_all(self, intents: list, query: str) -> dict:
+        """
+        Runs each intent's local retrieval, in parallel when there are several.
+        Returns {intent: results}.
+        """
+        agents = [self._agent_for(intent) for intent in intents]
+        if self.executor and len(agents) > 1:
+            # bind(): spans opened on the pool threads still nest under this query
+            retrievers = [TELEMETRY.bind(agent.retrieve) for agent in agents]
+            results = list(self.executor.map(lambda retrieve: retrieve(query), retrievers))
+        else:
+            results = [agent.retrieve(query) for agent in agents]
+        return dict(zip(intents, results))
+
+    def _answer_all(self, intents: list, query: str, results_by_intent: dict) -> str:
+        """
+        Generates one answer per intent concurrently and merges them under headings.
+        """
+        futures = [
+            self.executor.submit(TELEMETRY.bind(self._agent_for(intent).answer), query, results_by_intent[intent])
+            for intent in intents
+        ]
+        sections = []
+        for intent, future in zip(intents, futures):
+            sections.append(f"### {INTENT_TITLES.get(intent, intent.title())}\n{future.result()}")
+        return "\n\n".join(sections)
+
+    def _stream_and_cache(self, tokens, cache_key, query_embedding, intent, chunk_ids):
+        """
+        Yields the verified token stream and caches the full answer once it is complete.
+        An LLMError raised mid-stream propagates before the store, so partial answers aren't cached.
+        """
+        parts = []
+        for token in self.citation_agent.verify_stream(tokens):
+            parts.append(token)
+            yield token
+        self.answer_cache.store(cache_key, query_embedding, intent, chunk_ids, "".join(parts))
+
+    def _agent_for(self, intent: str):
+        """
+        Maps an intent to the agent that answers it.
+        """
+        agents = {
+            "FINANCIAL": self.financial_agent,
+            "RISK": self.risk_agent,
+            "BUSINESS": self.business_agent,
+            "SUMMARY": self.summary_agent,
+        }
+        # Fallback
+        return agents.get(intent, self.business_agent)
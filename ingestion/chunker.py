@@ -1,13 +1,32 @@
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 try:
     from langchain_text_splitters import RecursiveCharacterTextSplitter
 except ImportError:
     from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+from ingestion.layout import page_units
+
+CHUNK_MODES = ("page", "layout")
+
+_SENTENCE_END = re.compile(r"(?<=[.;:!?])\s+")
+
 class IPOChunker:
-    def __init__(self, chunk_size=1000, chunk_overlap=100):
+    def __init__(self, chunk_size=1000, chunk_overlap=100, mode="page"):
+        """
+        mode="page" (default): each page's flattened text is split on its own,
+        so chunks never cross pages.
+        mode="layout": needs IPOParser(layout=True) pages. Builds chunks from the page
+        layout (see ingestion/layout.py) in a single pass: table rows are never split
+        (a table too long for one chunk repeats its header row), prose runs on across
+        page breaks within a section, and every chunk records its page range
+        ("page" .. "page_end") and a "content_type" of "table", "prose" or "heading".
+        """
+        if mode not in CHUNK_MODES:
+            raise ValueError(f"mode must be one of {CHUNK_MODES}, got {mode!r}")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.mode = mode
         self.splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
@@ -19,61 +38,189 @@ class IPOChunker:
         Chunks the parsed page data while respecting section boundaries.
         We do NOT cross section boundaries with chunks.
         """
-        final_chunks = []
+        final_chunks = list(self.iter_chunks(parsed_pages))
 
-        # Group pages by section to ensure chunks stay within section context
-        current_section_pages = []
-        last_section = None
+        print(f"[SUCCESS] Created {len(final_chunks)} chunks.")
+        return final_chunks
 
+    def iter_chunks(self, parsed_pages: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of chunk_document(): consumes pages one at a time
+        (e.g. straight from IPOParser.iter_pages()) and yields chunks as soon
+        as they are complete.
+        In "page" mode that is after every page; in "layout" mode a chunk may wait
+        for the next page of its section (see chunk_page()).
+        """
+        carry = None
         for page in parsed_pages:
-            if last_section is not None and page['section'] != last_section:
-                # Process the previous section
-                final_chunks.extend(self._process_section_group(current_section_pages))
-                current_section_pages = []
-            
-            current_section_pages.append(page)
-            last_section = page['section']
-
-        # Process the final section
-        if current_section_pages:
-            final_chunks.extend(self._process_section_group(current_section_pages))
+            page_chunks, carry = self.chunk_page(page, carry)
+            yield from page_chunks
+        yield from self.finish(carry)
 
-        print(f"[SUCCESS] Created {len(final_chunks)} chunks.")
-        return final_chunks
+    def chunk_page(self, page: Dict[str, Any], carry: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Chunks one page. Returns (finished chunks, carry): `carry` is the chunk still
+        being filled ("layout" mode only, None otherwise), to pass in with the next page
+        and finally to finish(). It is plain JSON, so it can be checkpointed with the page.
+        """
+        if self.mode == "page":
+            return self._chunk_page(page), None
+
+        chunks = []
+        if carry is not None and carry["section"] != page["section"]:
+            chunks += self.finish(carry)
+            carry = None
+        if carry is None:
+            carry = {"section": page["section"], "source": page["source"], "parts": [], "fresh": 0, "table_header": None}
+
+        if "blocks" in page:
+            units = page_units(page["blocks"])
+        else:
+            # Pages parsed without layout: one paragraph of running text
+            text = " ".join(page["text"].split())
+            units = [{"type": "prose", "text": text}] if text else []
+        for unit in units:
+            chunks += self._add_unit(carry, unit, page["page"])
+        return chunks, carry
 
-    def _process_section_group(self, pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def finish(self, carry: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Takes a list of pages belonging to the same section and chunks them.
-        Propagates metadata (Page No) to each chunk.
+        The last chunk held in `carry`, if it has any new content.
+        """
+        if carry is None or not carry["fresh"]:
+            return []
+        return [self._emit(carry)]
+
+    def _chunk_page(self, page: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Splits a single page and attaches its metadata to every chunk.
         """
-        section_chunks = []
-        
-        # Combine text for better continuity, but track page boundaries? 
-        # Simpler approach for RAG: Chunk per page or small window of pages. 
-        # Flow.md suggests: "Never cross sections" and "Preserve page numbers".
-        # To strictly preserve "Page Number" for a specific chunk, it is safer to chunk strictly within a page 
-        # OR handle multi-page chunks carefully. 
-        
         # Strategy: Chunk PER PAGE to ensure precise citations. 
         # (Trade-off: Loss of context across page breaks, but vital for 'Page X' accuracy)
+        raw_text = page['text']
+        # Remove excessive whitespace
+        clean_text = " ".join(raw_text.split()) 
         
-        for page in pages:
-            raw_text = page['text']
-            # Remove excessive whitespace
-            clean_text = " ".join(raw_text.split()) 
-            
-            if not clean_text:
-                continue
-
-            chunks = self.splitter.split_text(clean_text)
-            
-            for chunk in chunks:
-                chunk_metadata = {
-                    "text": chunk,
-                    "section": page['section'],
-                    "page": page['page'],
-                    "source": page['source']
-                }
-                section_chunks.append(chunk_metadata)
-
-        return section_chunks
+        if not clean_text:
+            return []
+
+        page_chunks = []
+        for chunk in self.splitter.split_text(clean_text):
+            page_chunks.append({
+                "text": chunk,
+                "section": page['section'],
+                "page": page['page'],
+                "source": page['source']
+            })
+        return page_chunks
+
+    def _add_unit(self, carry: Dict[str, Any], unit: Dict[str, str], page_number: int) -> List[Dict[str, Any]]:
+        """
+        Appends one layout unit to the chunk being filled, emitting chunks as they fill up.
+        Headings open a new chunk and stay with what follows them; prose and tables
+        never share a chunk.
+        """
+        kind, text = unit["type"], unit["text"]
+        current = self._content_type(carry)
+        chunks = []
+
+        if kind == "heading":
+            if current not in (None, "heading"):
+                chunks += self._flush(carry)
+            carry["table_header"] = None
+            self._append(carry, text, kind, page_number, "\n")
+            return chunks
+
+        if kind == "table":
+            if current == "prose":
+                chunks += self._flush(carry)
+            if carry["table_header"] is None:
+                carry["table_header"] = text
+            elif current == "table" and self._length(carry) + 1 + len(text) > self.chunk_size:
+                chunks += self._flush(carry)
+                # Continuation chunks repeat the header row, so their columns stay labelled
+                self._append(carry, carry["table_header"], kind, page_number, "\n", fresh=False)
+            self._append(carry, text, kind, page_number, "\n")
+            return chunks
+
+        carry["table_header"] = None
+        if current == "table":
+            chunks += self._flush(carry)
+            current = None
+        separator = "\n"
+        for piece in self._pieces(text):
+            # A heading stays with the text after it, even if that overfills the chunk a little
+            if self._length(carry) + 1 + len(piece) > self.chunk_size and current != "heading":
+                chunks += self._flush(carry, overlap=True)
+                if self._length(carry) + 1 + len(piece) > self.chunk_size:
+                    # No room for the overlap in front of this sentence
+                    carry["parts"] = []
+            self._append(carry, piece, kind, page_number, separator)
+            current = "prose"
+            separator = " "
+        return chunks
+
+    def _flush(self, carry: Dict[str, Any], overlap=False) -> List[Dict[str, Any]]:
+        """
+        Emits the chunk being filled (unless it holds only overlap or a repeated header)
+        and empties it. With `overlap`, the next chunk starts with the last prose
+        sentences that fit in chunk_overlap.
+        """
+        chunks = [self._emit(carry)] if carry["fresh"] else []
+        kept, size = [], 0
+        if overlap and carry["fresh"]:
+            for part in reversed(carry["parts"]):
+                if part["type"] != "prose" or size + len(part["text"]) + 1 > self.chunk_overlap:
+                    break
+                kept.insert(0, part)
+                size += len(part["text"]) + 1
+        carry["parts"] = kept
+        carry["fresh"] = 0
+        return chunks
+
+    def _pieces(self, text: str) -> List[str]:
+        """
+        A paragraph as sentences, the unit prose chunks are filled and overlapped with.
+        Sentences longer than a chunk are cut at the last space that fits.
+        """
+        pieces = []
+        for sentence in _SENTENCE_END.split(text):
+            while len(sentence) > self.chunk_size:
+                cut = sentence.rfind(" ", 0, self.chunk_size)
+                cut = cut if cut > 0 else self.chunk_size
+                pieces.append(sentence[:cut])
+                sentence = sentence[cut:].lstrip()
+            if sentence:
+                pieces.append(sentence)
+        return pieces
+
+    def _append(self, carry: Dict[str, Any], text: str, kind: str, page_number: int, separator: str, fresh=True):
+        carry["parts"].append({"text": text, "type": kind, "page": page_number, "sep": separator})
+        if fresh:
+            carry["fresh"] += 1
+
+    @staticmethod
+    def _content_type(carry: Dict[str, Any]) -> Optional[str]:
+        types = {part["type"] for part in carry["parts"]}
+        if not types:
+            return None
+        if "table" in types:
+            return "table"
+        return "prose" if "prose" in types else "heading"
+
+    @staticmethod
+    def _length(carry: Dict[str, Any]) -> int:
+        parts = carry["parts"]
+        return sum(len(part["text"]) + 1 for part in parts) - 1 if parts else 0
+
+    def _emit(self, carry: Dict[str, Any]) -> Dict[str, Any]:
+        parts = carry["parts"]
+        text = parts[0]["text"] + "".join(part["sep"] + part["text"] for part in parts[1:])
+        return {
+            "text": text,
+            "section": carry["section"],
+            "page": parts[0]["page"],
+            "page_end": parts[-1]["page"],
+            "source": carry["source"],
+            "content_type": self._content_type(carry),
+        }
@@ -0,0 +1,203 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from storage.ingestion_cache import IngestionCache
+
+# Job lifecycle: queued -> running -> done | failed
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+class IngestionJobQueue:
+    def __init__(self, db_path="ingestion_jobs.db", stale_after=120.0):
+        """
+        SQLite-backed queue of ingestion jobs shared by the Streamlit app (which
+        enqueues and polls) and the worker process(es) (which claim and run them).
+        A running job whose worker has not sent a heartbeat for `stale_after`
+        seconds is handed to another worker; ingestion checkpoints make that a resume.
+        """
+        self.db_path = db_path
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        # One connection per queue object; timeout covers other processes holding the write lock
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30.0)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._init_db()
+
+    def _init_db(self):
+        with self._lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    pdf_path TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    worker_id TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    heartbeat_at REAL
+                )
+            ''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)")
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker_id TEXT PRIMARY KEY,
+                    pid INTEGER,
+                    heartbeat_at REAL NOT NULL
+                )
+            ''')
+            self.conn.commit()
+
+    def enqueue(self, pdf_path: str) -> int:
+        """
+        Queues `pdf_path` for ingestion and returns the job id.
+        If the same document (by content hash) is already queued or running, that job's id is returned.
+        """
+        doc_id = IngestionCache.hash_file(pdf_path)[:16]
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT id FROM jobs WHERE doc_id = ? AND status IN ('queued', 'running') ORDER BY id LIMIT 1",
+                    (doc_id,)
+                ).fetchone()
+                if row:
+                    job_id = row["id"]
+                else:
+                    job_id = self.conn.execute(
+                        "INSERT INTO jobs (pdf_path, doc_id, status, message, created_at) VALUES (?, ?, 'queued', 'Waiting for a worker...', ?)",
+                        (os.path.abspath(pdf_path), doc_id, time.time())
+                    ).lastrowid
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically takes the oldest runnable job: a queued one, or a running one
+        whose worker went silent. Jobs for a document that another worker is
+        currently ingesting are skipped (they share one checkpoint directory).
+        Returns the job or None.
+        """
+        stale_before = time.time() - self.stale_after
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute('''
+                    SELECT * FROM jobs AS j
+                    WHERE (j.status = 'queued' OR (j.status = 'running' AND j.heartbeat_at < ?))
+                      AND NOT EXISTS (
+                          SELECT 1 FROM jobs AS other
+                          WHERE other.doc_id = j.doc_id AND other.id != j.id
+                            AND other.status = 'running' AND other.heartbeat_at >= ?
+                      )
+                    ORDER BY j.id LIMIT 1
+                ''', (stale_before, stale_before)).fetchone()
+                if row is None:
+                    self.conn.commit()
+                    return None
+                now = time.time()
+                self.conn.execute('''
+                    UPDATE jobs SET status = 'running', worker_id = ?, attempts = attempts + 1,
+                        started_at = COALESCE(started_at, ?), heartbeat_at = ?, message = 'Starting...'
+                    WHERE id = ?
+                ''', (worker_id, now, now, row["id"]))
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+        return self.get(row["id"])
+
+    def update_progress(self, job_id: int, message: str):
+        self._execute(
+            "UPDATE jobs SET message = ?, heartbeat_at = ? WHERE id = ? AND status = 'running'",
+            (message, time.time(), job_id)
+        )
+
+    def complete(self, job_id: int, worker_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Records the job's result, if `worker_id` still owns it. A job reclaimed from a
+        worker that went silent belongs to its new worker, so a late finish by the old
+        one changes nothing. Returns whether the job was updated.
+        """
+        return self._execute(
+            "UPDATE jobs SET status = 'done', message = 'Done', result = ?, error = NULL, finished_at = ? "
+            "WHERE id = ? AND worker_id = ? AND status = 'running'",
+            (json.dumps(result, default=str), time.time(), job_id, worker_id)
+        ) > 0
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> bool:
+        """
+        Records the job's failure, if `worker_id` still owns it (see complete()).
+        """
+        return self._execute(
+            "UPDATE jobs SET status = 'failed', message = 'Failed', error = ?, finished_at = ? "
+            "WHERE id = ? AND worker_id = ? AND status = 'running'",
+            (error, time.time(), job_id, worker_id)
+        ) > 0
+
+    def heartbeat(self, worker_id: str):
+        """
+        Marks a worker (and every job it is running) as alive.
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO workers (worker_id, pid, heartbeat_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(worker_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+                (worker_id, os.getpid(), now)
+            )
+            self.conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE worker_id = ? AND status = 'running'", (now, worker_id))
+            self.conn.commit()
+
+    def live_workers(self) -> int:
+        """
+        Number of workers that sent a heartbeat within `stale_after` seconds.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) FROM workers WHERE heartbeat_at >= ?", (time.time() - self.stale_after,)
+            ).fetchone()
+        return row[0]
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        The job as a dict ("result" decoded), or None.
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list_jobs(self, limit=20) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def _execute(self, sql: str, params: tuple) -> int:
+        """
+        Runs one write and returns the number of rows it changed.
+        """
+        with self._lock:
+            cursor = self.conn.execute(sql, params)
+            self.conn.commit()
+        return cursor.rowcount
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+if __name__ == "__main__":
+    # Test stub
+    pass
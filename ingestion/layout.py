@@ -0,0 +1,114 @@
+import re
+import statistics
+from typing import Any, Dict, List
+
+# Lines whose vertical centres are this close (points) sit on the same row
+ROW_TOLERANCE = 2.5
+# A gap this many line heights tall between two lines of a block starts a new paragraph
+PARAGRAPH_GAP = 0.8
+HEADING_MAX_CHARS = 100
+HEADING_SIZE_RATIO = 1.15
+
+# One table cell holding a figure: "29,493.80", "(1,204.5)", "12.5%", "-", "₹ 23.43"
+_NUMBER_CELL = re.compile(r"^(?:₹|Rs\.?)?\s*\(?-?[\d,]*\.?\d+\)?%?$|^[-–—]$")
+# A line ending in two or more figures: a table row whose cells PyMuPDF returned as one line
+_NUMERIC_TAIL = re.compile(r"\S.*?(?:\s+\(?-?[\d,]*\.?\d+\)?%?){2,}\s*$")
+
+def page_units(blocks: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    Splits one page's layout blocks (IPOParser(layout=True)) into units, in reading order:
+    - {"type": "table", "text": "cell | cell | ..."}: one per table row. Cells on the same
+      row are joined left to right even when PyMuPDF put them in separate blocks.
+    - {"type": "heading", "text"}: short title lines (larger or bold type, or all caps).
+    - {"type": "prose", "text"}: one per paragraph, lines joined into running text.
+    """
+    lines = [dict(line, block=b) for b, block in enumerate(blocks) for line in block["lines"] if line["text"].strip()]
+    if not lines:
+        return []
+    row_of = _table_rows(lines)
+    body_size = statistics.median(line["size"] for line in lines)
+
+    units, paragraph, emitted_rows = [], [], set()
+
+    def flush_paragraph():
+        if paragraph:
+            units.append({"type": "prose", "text": _join_lines(paragraph)})
+            paragraph.clear()
+
+    previous = None
+    for i, line in enumerate(lines):
+        text = " ".join(line["text"].split())
+        if i in row_of:
+            flush_paragraph()
+            row_id, row_text = row_of[i]
+            if row_id not in emitted_rows:
+                emitted_rows.add(row_id)
+                units.append({"type": "table", "text": row_text})
+            previous = None
+            continue
+        if previous is not None and (previous["block"] != line["block"] or _gap(previous, line) > PARAGRAPH_GAP):
+            flush_paragraph()
+        if _is_heading(line, text, body_size):
+            flush_paragraph()
+            units.append({"type": "heading", "text": text})
+        elif _NUMERIC_TAIL.match(text):
+            flush_paragraph()
+            units.append({"type": "table", "text": text})
+        else:
+            paragraph.append(text)
+        previous = line
+    flush_paragraph()
+    return units
+
+def _table_rows(lines: List[Dict[str, Any]]) -> Dict[int, tuple]:
+    """
+    Groups lines into rows by vertical position and keeps the rows that look like
+    table rows (3+ cells, or 2+ cells with a figure after the label).
+    Returns {line index: (row id, "cell | cell | ...")}.
+    """
+    order = sorted(range(len(lines)), key=lambda i: _center(lines[i]))
+    rows, current = [], []
+    for i in order:
+        if current and _center(lines[i]) - _center(lines[current[0]]) > ROW_TOLERANCE:
+            rows.append(current)
+            current = []
+        current.append(i)
+    rows.append(current)
+
+    row_of = {}
+    for row_id, row in enumerate(rows):
+        if len(row) < 2:
+            continue
+        cells = sorted(row, key=lambda i: lines[i]["bbox"][0])
+        texts = [" ".join(lines[i]["text"].split()) for i in cells]
+        if len(cells) >= 3 or any(_NUMBER_CELL.match(text) for text in texts[1:]):
+            for i in cells:
+                row_of[i] = (row_id, " | ".join(texts))
+    return row_of
+
+def _is_heading(line: Dict[str, Any], text: str, body_size: float) -> bool:
+    if len(text) > HEADING_MAX_CHARS or text.endswith((".", ",", ";", ":")) or not any(c.isalpha() for c in text):
+        return False
+    return line["size"] >= body_size * HEADING_SIZE_RATIO or line["bold"] or (text.isupper() and len(text.split()) <= 12)
+
+def _join_lines(lines: List[str]) -> str:
+    """
+    Running text from wrapped lines; words hyphenated across a line break are rejoined.
+    """
+    text = ""
+    for line in lines:
+        if text.endswith("-") and line[:1].islower():
+            text = text[:-1] + line
+        else:
+            text = f"{text} {line}" if text else line
+    return text
+
+def _center(line: Dict[str, Any]) -> float:
+    return (line["bbox"][1] + line["bbox"][3]) / 2
+
+def _gap(previous: Dict[str, Any], line: Dict[str, Any]) -> float:
+    """
+    Blank space between two consecutive lines, in line heights.
+    """
+    height = max(previous["bbox"][3] - previous["bbox"][1], 1.0)
+    return (line["bbox"][1] - previous["bbox"][3]) / height
@@ -1,11 +1,60 @@
 import fitz  # PyMuPDF
 import re
-from typing import List, Dict, Any
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+def _extract_page_range(pdf_path: str, start: int, end: int, layout: bool = False) -> List[Tuple[str, Optional[list]]]:
+    """
+    Worker entry point for parallel parsing.
+    Opens its own fitz handle (documents cannot be shared across processes)
+    and returns (text, blocks) for pages [start, end) (see _extract_page).
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        return [_extract_page(doc[i], layout) for i in range(start, end)]
+    finally:
+        doc.close()
+
+def _extract_page(page: "fitz.Page", layout: bool = False) -> Tuple[str, Optional[list]]:
+    """
+    Plain text of the page, plus its text blocks when `layout` is set:
+    [{"bbox": [x0, y0, x1, y1], "lines": [{"text", "bbox", "size", "bold"}, ...]}, ...]
+    in PyMuPDF reading order. The text is then rebuilt from the same blocks
+    (one line per line, as get_text("text") gives it), so the page is read once.
+    """
+    if not layout:
+        return page.get_text("text"), None
+
+    blocks = []
+    for block in page.get_text("dict")["blocks"]:
+        if block.get("type") != 0:  # images
+            continue
+        lines = []
+        for line in block["lines"]:
+            spans = line["spans"]
+            if not spans:
+                continue
+            lines.append({
+                "text": "".join(span["text"] for span in spans),
+                "bbox": [round(v, 1) for v in line["bbox"]],
+                "size": round(max(span["size"] for span in spans), 1),
+                # PyMuPDF span flag 16 = bold
+                "bold": any(span["flags"] & 16 for span in spans),
+            })
+        if lines:
+            blocks.append({"bbox": [round(v, 1) for v in block["bbox"]], "lines": lines})
+    text = "".join(line["text"] + "\n" for block in blocks for line in block["lines"])
+    return text, blocks
 
 class IPOParser:
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, workers: int = 1, layout: bool = False):
         self.pdf_path = pdf_path
         self.doc = fitz.open(pdf_path)
+        # Number of worker processes used for text extraction (1 = sequential)
+        self.workers = max(1, workers or 1)
+        # Also return each page's text blocks and lines with their positions (for IPOChunker(mode="layout"))
+        self.layout = layout
         
         # Define regex patterns for major sections based on standard RHP structure
         # Updated to be more flexible with spacing and case
@@ -24,17 +73,33 @@ class IPOParser:
         Parses the PDF page by page, extracting text and identifying sections.
         Returns a list of dictionaries containing text, page number, and section metadata.
         """
-        extracted_data = []
-        current_section = "INTRODUCTION" # Default start section
+        extracted_data = list(self.iter_pages(max_pages=max_pages))
+        print(f"[SUCCESS] Parsed {len(extracted_data)} pages from {self.pdf_path}")
+        return extracted_data
+
+    def iter_pages(self, max_pages=None, start_page=1, section=None) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of parse(): yields one page dictionary at a time,
+        so downstream stages can start before the whole PDF has been read.
+        `start_page` (1-based) and `section` (the section in effect on the page
+        before it) let an interrupted parse resume where it stopped.
+        """
+        current_section = section or "INTRODUCTION" # Default start section
 
         # Limit pages if requested
-        pages_to_process = list(enumerate(self.doc, start=1))
+        page_count = len(self.doc)
         if max_pages:
-            pages_to_process = pages_to_process[:max_pages]
+            page_count = min(page_count, max_pages)
 
-        for page_num, page in pages_to_process:
-            text = page.get_text("text")  # Extract plain text
-            
+        # Text extraction is the expensive part and may run in parallel.
+        # Section detection stays sequential because sections carry over between pages.
+        first = max(0, start_page - 1)
+        if self.workers > 1 and page_count - first > 1:
+            page_texts = self._iter_texts_parallel(page_count, first)
+        else:
+            page_texts = (_extract_page(self.doc[i], self.layout) for i in range(first, page_count))
+
+        for page_num, (text, blocks) in enumerate(page_texts, start=first + 1):
             # Heuristic: Check the first 1000 characters for section headers
             # (Headers might not be at the very top)
             header_check_text = text[:1000]
@@ -43,16 +108,32 @@ class IPOParser:
             if detected_section:
                 current_section = detected_section
             
-            page_data = {
+            page = {
                 "text": text,
                 "page": page_num,
                 "section": current_section,
                 "source": "RHP"
             }
-            extracted_data.append(page_data)
-            
-        print(f"[SUCCESS] Parsed {len(extracted_data)} pages from {self.pdf_path}")
-        return extracted_data
+            if blocks is not None:
+                page["blocks"] = blocks
+            yield page
+
+    def _iter_texts_parallel(self, page_count: int, first: int = 0) -> Iterator[Tuple[str, Optional[list]]]:
+        """
+        Splits pages [first, page_count) into contiguous ranges and extracts
+        them concurrently, one fitz handle per worker process.
+        Yields (text, blocks) per page in document order as soon as each range is ready.
+        """
+        workers = min(self.workers, page_count - first)
+        range_size = math.ceil((page_count - first) / workers)
+        starts = list(range(first, page_count, range_size))
+        ends = [min(start + range_size, page_count) for start in starts]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map() yields results in submission order, so pages stay ordered
+            for range_texts in executor.map(_extract_page_range, [self.pdf_path] * len(starts), starts, ends,
+                                            [self.layout] * len(starts)):
+                yield from range_texts
 
     def _detect_section(self, text_snippet: str) -> str:
         """
@@ -0,0 +1,232 @@
+import json
+import os
+from typing import Dict, Any, Callable, Iterable, Iterator, Optional
+
+from ingestion.pdf_parser import IPOParser
+from ingestion.chunker import IPOChunker
+from ingestion.financial_extractor import FinancialExtractor
+from ingestion.table_extractor import FinancialTableExtractor
+from ingestion.trend_data import build_trend_data
+from storage.vector_store import IPOVectorStore, make_chunk_id
+from storage.financial_db import FinancialDatabase
+from storage.ingestion_cache import IngestionCache, IngestionJob, STAGES
+from storage.answer_cache import SemanticAnswerCache, SHARED_ANSWER_CACHE
+from utils.telemetry import TELEMETRY, traced
+
+class IngestionPipeline:
+    def __init__(self, vector_store: IPOVectorStore, db: FinancialDatabase,
+                 chunker: IPOChunker = None, extractor: FinancialExtractor = None,
+                 cache: IngestionCache = None, parse_workers=1, answer_cache: SemanticAnswerCache = None,
+                 table_extractor: FinancialTableExtractor = None):
+        """
+        Runs IPOParser -> IPOChunker -> FinancialExtractor / FinancialTableExtractor -> storage for one PDF,
+        short-circuiting the whole pipeline when the same PDF (with the same
+        settings) has been ingested before, and resuming from checkpoints when
+        an earlier run was interrupted.
+        """
+        self.vector_store = vector_store
+        self.db = db
+        self.chunker = chunker or IPOChunker()
+        self.extractor = extractor or FinancialExtractor()
+        self.table_extractor = table_extractor or FinancialTableExtractor()
+        self.cache = cache or IngestionCache()
+        self.parse_workers = parse_workers
+        self.answer_cache = answer_cache or SHARED_ANSWER_CACHE
+
+    @traced("ingestion.run")
+    def run(self, pdf_path: str, progress: Optional[Callable[[str], None]] = None, rerun: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Ingests `pdf_path` and returns a summary:
+        {"doc_id", "key", "pages", "chunks", "financials", "tables", "chart_data", "cached", "resumed", "rerun"}.
+        The document's chunks live in their own collection (see IPOVectorStore.for_document).
+        `progress` is called with a short status message before each stage.
+
+        Every stage (parse, chunk, extract, index) is checkpointed per page or batch
+        in the document's job directory, so a crashed or cancelled run resumes where it
+        stopped. A stage is redone only when its own settings change (e.g. a new
+        embedding model re-runs "index" alone) or when listed in `rerun`.
+        Traced as an "ingestion.run" span with one child span per stage.
+        """
+        progress = progress or (lambda message: None)
+        settings = {
+            "chunk_size": self.chunker.chunk_size,
+            "chunk_overlap": self.chunker.chunk_overlap,
+            "model_name": self.vector_store.model_name,
+            "chunk_mode": self.chunker.mode,
+        }
+        pdf_sha256 = IngestionCache.hash_file(pdf_path)
+        doc_id = pdf_sha256[:16]
+        key = IngestionCache.make_key(pdf_sha256, **settings)
+        vector_store = self.vector_store.for_document(doc_id)
+        # Answers generated against an earlier ingestion of this document must not be served again.
+        # This covers this process only: the app drops its own when the job's result comes back
+        self.answer_cache.invalidate(doc_id)
+        self.db.register_document(doc_id, os.path.basename(pdf_path))
+
+        job = self.cache.open_job(doc_id)
+        reset = job.prepare(IngestionCache.stage_fingerprints(pdf_sha256, **settings), rerun)
+        summary = {"doc_id": doc_id, "key": key, "rerun": reset}
+        TELEMETRY.current_span().set(doc_id=doc_id, rerun=reset)
+
+        if job.complete:
+            progress("Same document seen before: reusing cached ingestion results...")
+            TELEMETRY.current_span().set(cached=True)
+            with TELEMETRY.span("ingestion.reattach"):
+                return dict(summary, **self._reattach(job, doc_id, vector_store), cached=True, resumed=False)
+
+        resumed = any(job.stage(stage)["progress"] for stage in STAGES)
+        if not job.is_done("index"):
+            offset = job.stage("index")["progress"]
+            if offset:
+                progress(f"Resuming from checkpoint ({offset} chunks already indexed)...")
+                # Chroma kept the earlier batches, but the keyword index is only saved at the end
+                vector_store.add_keywords(job.read_jsonl("chunks.jsonl", stop=offset))
+
+            progress("Parsing, chunking & indexing (streaming)...")
+            # Pages flow straight into the chunker and chunks straight into the
+            # vector store, so embedding starts while later pages are still being read.
+            # Each stage appends to its checkpoint file as items pass through.
+            # "ingestion.index" spans the whole stream; the parse and chunk spans nested
+            # in it count only the time spent producing pages / chunks
+            with TELEMETRY.span("ingestion.index", offset=offset) as span:
+                vector_store.add_chunks(
+                    TELEMETRY.timed_iter("ingestion.chunk", self._chunk_stream(job, pdf_path, start=offset)),
+                    on_batch=lambda done: job.checkpoint("index", progress=offset + done),
+                )
+                chunk_ids = [make_chunk_id(doc_id, chunk) for chunk in job.read_jsonl("chunks.jsonl")]
+                # The collection is never dropped (open crews keep using it while this runs);
+                # chunks of an earlier ingestion (other chunker/model settings) go once the new set is in
+                stale = vector_store.prune(chunk_ids)
+                job.save_embeddings(vector_store.get_embeddings(chunk_ids))
+                job.mark_done("index", progress=len(chunk_ids), total=len(chunk_ids))
+                span.set(chunks=len(chunk_ids), pruned=stale)
+
+        if not job.is_done("extract"):
+            progress("Extracting financials...")
+            with TELEMETRY.span("ingestion.extract"):
+                self._extract(job, pdf_path)
+
+        progress("Populating financial database...")
+        TELEMETRY.current_span().set(cached=False, resumed=resumed)
+        with TELEMETRY.span("ingestion.store"):
+            return dict(summary, **self._store_results(job, doc_id), cached=False, resumed=resumed)
+
+    def _page_stream(self, job: IngestionJob, pdf_path: str, start: int) -> Iterator[Dict[str, Any]]:
+        """
+        Pages from number `start + 1` on: first those already parsed (from the
+        checkpoint file), then freshly parsed ones, each recorded as it passes.
+        """
+        state = job.stage("parse")
+        yield from job.read_jsonl("pages.jsonl", start=start, stop=state["progress"])
+        if job.is_done("parse"):
+            return
+
+        parser = IPOParser(pdf_path, workers=self.parse_workers, layout=self.chunker.mode == "layout")
+        total = len(parser.doc)
+        # Sections carry over between pages, so a resumed parse starts in the last recorded one
+        section = state.get("section") if state["progress"] else None
+        with job.appender("pages.jsonl") as out:
+            for page in parser.iter_pages(start_page=state["progress"] + 1, section=section):
+                out.write(json.dumps(page) + "\n")
+                out.flush()
+                job.checkpoint("parse", progress=page["page"], total=total, section=page["section"])
+                yield page
+        job.mark_done("parse", total=total)
+
+    def _chunk_stream(self, job: IngestionJob, pdf_path: str, start: int) -> Iterator[Dict[str, Any]]:
+        """
+        Chunks from index `start` on: first those already chunked (from the
+        checkpoint file), then chunks of the remaining pages, checkpointed per page.
+        In "layout" mode a chunk can run on to the next page; the unfinished one
+        ("carry") is checkpointed with the page, so a resumed run picks it up.
+        """
+        state = job.stage("chunk")
+        chunk_count = state.get("chunks", 0)
+        yield from job.read_jsonl("chunks.jsonl", start=start, stop=chunk_count)
+        if job.is_done("chunk"):
+            return
+
+        carry = state.get("carry")
+        with job.appender("chunks.jsonl") as out:
+            for page in TELEMETRY.timed_iter("ingestion.parse", self._page_stream(job, pdf_path, start=state["progress"])):
+                page_chunks, carry = self.chunker.chunk_page(page, carry)
+                for chunk in page_chunks:
+                    out.write(json.dumps(chunk) + "\n")
+                out.flush()
+                chunk_count += len(page_chunks)
+                job.checkpoint("chunk", progress=page["page"], chunks=chunk_count, carry=carry, total=job.stage("parse")["total"])
+                yield from page_chunks
+            last_chunks = self.chunker.finish(carry)
+            for chunk in last_chunks:
+                out.write(json.dumps(chunk) + "\n")
+            out.flush()
+        chunk_count += len(last_chunks)
+        job.mark_done("chunk", chunks=chunk_count, carry=None)
+        yield from last_chunks
+
+    def _extract(self, job: IngestionJob, pdf_path: str):
+        """
+        Regex metrics over all chunks, plus table extraction checkpointed per page.
+        """
+        chunks = list(job.read_jsonl("chunks.jsonl"))
+        financials = self.extractor.extract_metrics(chunks)
+
+        state = job.stage("extract")
+        # Multi-year grids (with page provenance) from the financial statement tables
+        pages = self.table_extractor.financial_pages(chunks)
+        remaining = [page for page in pages if page > state.get("table_pages_done", 0)]
+        table_count = state.get("tables", 0)
+        with job.appender("tables.jsonl") as out:
+            for page_number, records in self.table_extractor.iter_page_records(pdf_path, remaining):
+                for record in records:
+                    out.write(json.dumps(record) + "\n")
+                out.flush()
+                table_count += len(records)
+                job.checkpoint("extract", tables=table_count, table_pages_done=page_number,
+                               progress=pages.index(page_number) + 1, total=len(pages))
+
+        job.write_json("financials.json", financials)
+        job.mark_done("extract", progress=len(pages), total=len(pages))
+
+    def _reattach(self, job: IngestionJob, doc_id: str, vector_store: IPOVectorStore) -> Dict[str, Any]:
+        """
+        Restores a completed ingestion without re-parsing or re-encoding:
+        chunks are upserted with their stored embeddings (a no-op when the
+        collection is still there, thanks to content-hash IDs) and the metrics
+        are written back to SQLite. Chunks of other ingestions of the document are pruned.
+        """
+        chunk_ids = vector_store.add_chunks(job.read_jsonl("chunks.jsonl"), embeddings=job.load_embeddings())
+        vector_store.prune(chunk_ids)
+        return self._store_results(job, doc_id)
+
+    def _store_results(self, job: IngestionJob, doc_id: str) -> Dict[str, Any]:
+        """
+        Writes the extracted metrics, table records and chart data of a job to SQLite.
+        """
+        financials = job.read_json("financials.json")
+        tables = self.table_extractor.merge(job.read_jsonl("tables.jsonl"))
+        self.db.store_metrics(financials, document_id=doc_id)
+        self.db.store_records([dict(record, document_id=doc_id) for record in tables])
+        return {
+            "pages": job.stage("parse")["total"],
+            "chunks": job.stage("chunk").get("chunks", 0),
+            "financials": financials,
+            "tables": len(tables),
+            "chart_data": self._store_chart_data(doc_id, tables),
+        }
+
+    def _store_chart_data(self, doc_id: str, tables) -> bool:
+        """
+        Computes the document's trend dataset from its table records and stores it,
+        so charts never need an LLM call. Returns False when the tables give nothing
+        to chart (ChartAgent.start_fallback then covers it); any dataset stored
+        earlier for this document is left in place.
+        """
+        trend = build_trend_data(tables)
+        if trend is None:
+            return False
+        self.db.store_chart_data(trend, source="tables", document_id=doc_id)
+        return True
+
+if __name__ == "__main__":
+    pass
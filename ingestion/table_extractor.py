@@ -0,0 +1,273 @@
+import fitz  # PyMuPDF
+import re
+from datetime import date
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# Column headers that name a reporting period, most specific first.
+# Indian issuers report fiscal years ending 31 March, so "FY24" / "Fiscal 2024" / "2023-24" end on 2024-03-31.
+PERIOD_PATTERNS = [
+    # "March 31, 2024", "September 30 2025"
+    ("month_day_year", re.compile(r"\b([A-Za-z]{3})[a-z]*\.?\s+(\d{1,2}),?\s+(\d{4})\b")),
+    # "31 March 2024", "31st March, 2024"
+    ("day_month_year", re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3})[a-z]*\.?,?\s+(\d{4})\b")),
+    # "31.03.2024", "31/03/2024", "31-03-2024"
+    ("numeric_date", re.compile(r"\b(\d{1,2})[./-](\d{1,2})[./-](\d{4})\b")),
+    # "Mar-24", "Sep 2025", "Mar'24"
+    ("month_year", re.compile(r"\b([A-Za-z]{3})[a-z]*[\s'’-]+(\d{2}|\d{4})\b")),
+    # "2023-24", "2023-2024"
+    ("fiscal_range", re.compile(r"\b(\d{4})\s*[-–/]\s*(\d{2}|\d{4})\b")),
+    # "FY24", "FY 2024", "Fiscal 2024", "Fiscal Year 2024"
+    ("fiscal_year", re.compile(r"\b(?:FY|Fiscal(?:\s+Year)?)\s*['’]?(\d{2}|\d{4})\b", re.IGNORECASE)),
+]
+
+# Row labels of the metrics we keep, matched at the start of the first cell.
+# Keys line up with FinancialExtractor so both land on the same metric names in the DB.
+METRIC_LABELS = {
+    "revenue": re.compile(r"^revenue\s+from\s+operations", re.IGNORECASE),
+    "pat": re.compile(r"^(?:restated\s+)?(?:net\s+)?profit\s+(?:after\s+tax|for\s+the\s+(?:period|year))", re.IGNORECASE),
+    "eps": re.compile(r"^basic\s+(?:earnings\s+per\s+(?:equity\s+)?share|eps)", re.IGNORECASE),
+    "net_worth": re.compile(r"^(?:total\s+)?net\s+worth|^total\s+equity\b", re.IGNORECASE),
+    "total_borrowings": re.compile(r"^total\s+(?:borrowings|debt)\b", re.IGNORECASE),
+}
+# Cheap page prefilter run before the (slow) table finder
+LABEL_HINT = re.compile(r"revenue\s+from\s+operations|profit|net\s+worth|borrowings|earnings\s+per", re.IGNORECASE)
+
+NUMBER_PATTERN = re.compile(r"^\(?-?[\d,]*\d(?:\.\d+)?\)?$")
+DASHES = {"-", "–", "—", "nil", "Nil", "NIL"}
+
+def parse_period(text: str) -> Optional[Tuple[str, str]]:
+    """
+    Recognises a reporting-period column header.
+    Returns (label, period_end ISO date), e.g. "March 31, 2024" -> ("FY24", "2024-03-31"),
+    "Sep-25" -> ("Sep-25", "2025-09-30"), or None if `text` is not a period.
+    """
+    text = " ".join(str(text or "").split())
+    for kind, pattern in PERIOD_PATTERNS:
+        match = pattern.search(text)
+        if not match:
+            continue
+        try:
+            if kind == "month_day_year":
+                month, day, year = MONTHS.get(match.group(1)[:3].lower()), int(match.group(2)), int(match.group(3))
+            elif kind == "day_month_year":
+                day, month, year = int(match.group(1)), MONTHS.get(match.group(2)[:3].lower()), int(match.group(3))
+            elif kind == "numeric_date":
+                day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+            elif kind == "month_year":
+                month, year = MONTHS.get(match.group(1)[:3].lower()), _full_year(match.group(2))
+                day = None
+            elif kind == "fiscal_range":
+                start, end = int(match.group(1)), _full_year(match.group(2), century=int(match.group(1)) // 100 * 100)
+                if end != start + 1:
+                    continue
+                month, year, day = 3, end, None
+            else:
+                month, year, day = 3, _full_year(match.group(1)), None
+            if not month or not 1990 <= year <= 2100:
+                continue
+            period_end = _month_end(year, month) if day is None else date(year, month, day)
+        except ValueError:
+            continue
+        label = f"FY{period_end.year % 100:02d}" if period_end.month == 3 else f"{MONTH_NAMES[period_end.month - 1]}-{period_end.year % 100:02d}"
+        return label, period_end.isoformat()
+    return None
+
+def parse_number(text: str) -> Optional[float]:
+    """
+    "29,493.80" -> 29493.8, "(1,234.5)" -> -1234.5, "-" -> 0.0; None if not a number.
+    """
+    cleaned = str(text or "").replace("₹", "").replace("Rs.", "").replace("*", "").strip()
+    if cleaned in DASHES:
+        return 0.0
+    if not NUMBER_PATTERN.match(cleaned):
+        return None
+    negative = cleaned.startswith("(") and cleaned.endswith(")")
+    try:
+        value = float(cleaned.strip("()").replace(",", ""))
+    except ValueError:
+        return None
+    return -value if negative else value
+
+def _full_year(text: str, century: int = 2000) -> int:
+    year = int(text)
+    return year if year >= 100 else century + year
+
+def _month_end(year: int, month: int) -> date:
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    return date.fromordinal(next_month.toordinal() - 1)
+
+class FinancialTableExtractor:
+    def __init__(self, sections=("FINANCIAL_STATEMENTS", "SUMMARY_FINANCIALS"), row_tolerance=3.0, column_gap=12.0):
+        """
+        Structured extraction of multi-year financial grids.
+        On pages of the given sections it uses PyMuPDF's table finder, and falls back to
+        word positions (rows = words sharing a baseline, columns = header x-positions)
+        when no ruled table is found.
+        Produces DB-ready records: {"metric", "period", "period_end", "value", "unit", "basis", "source_page"}.
+        """
+        self.sections = set(sections)
+        self.row_tolerance = row_tolerance  # points between baselines still treated as one row
+        self.column_gap = column_gap  # horizontal gap (points) that separates two cells
+
+    def financial_pages(self, pages_or_chunks: Iterable[Dict[str, Any]]) -> List[int]:
+        """
+        Sorted 1-based page numbers whose section is one we extract tables from.
+        Works on parser pages or chunks (both carry "page" and "section"; layout chunks
+        spanning pages also "page_end").
+        """
+        pages = set()
+        for item in pages_or_chunks:
+            if item.get("section") in self.sections:
+                pages.update(range(int(item["page"]), int(item.get("page_end", item["page"])) + 1))
+        return sorted(pages)
+
+    def extract(self, pdf_path: str, page_numbers: Iterable[int]) -> List[Dict[str, Any]]:
+        """
+        Extracts metric records from the given 1-based pages of `pdf_path`.
+        When a (metric, period, basis, unit) appears more than once, the first page wins.
+        """
+        records = self.merge(
+            record for _, page_records in self.iter_page_records(pdf_path, page_numbers) for record in page_records
+        )
+        print(f"[SUCCESS] Extracted {len(records)} financial table values")
+        return records
+
+    def iter_page_records(self, pdf_path: str, page_numbers: Iterable[int]) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Streaming variant of extract(): yields (page_number, records) page by page
+        (unmerged), so callers can checkpoint between pages.
+        """
+        doc = fitz.open(pdf_path)
+        try:
+            for page_number in page_numbers:
+                if 1 <= page_number <= len(doc):
+                    yield page_number, self.extract_page(doc[page_number - 1], page_number)
+        finally:
+            doc.close()
+
+    @staticmethod
+    def merge(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Keeps the first record per (metric, period, basis, unit).
+        """
+        merged = {}
+        for record in records:
+            key = (record["metric"], record["period"], record["basis"], record["unit"])
+            merged.setdefault(key, record)
+        return list(merged.values())
+
+    def extract_page(self, page, page_number: int) -> List[Dict[str, Any]]:
+        text = page.get_text("text")
+        if not LABEL_HINT.search(text):
+            return []
+        basis = "Standalone" if re.search(r"\bstandalone\b", text, re.IGNORECASE) and not re.search(r"\bconsolidated\b", text, re.IGNORECASE) else "Consolidated"
+        unit = self._detect_unit(text)
+
+        records = []
+        try:
+            tables = page.find_tables().tables
+        except Exception as e:  # table detection is best effort; fall back to word positions
+            print(f"⚠️ Table detection failed on page {page_number}: {e}")
+            tables = []
+        for table in tables:
+            records.extend(self._records_from_grid(table.extract(), page_number, basis, unit))
+        if not records:
+            records = self._records_from_grid(self._grid_from_words(page), page_number, basis, unit)
+        return records
+
+    def _records_from_grid(self, rows: List[List[Any]], page_number: int, basis: str, unit: str) -> List[Dict[str, Any]]:
+        """
+        Finds the header row (>= 2 period cells) and reads each metric row against it.
+        """
+        columns = {}  # column index -> (label, period_end)
+        records = []
+        found = set()
+        for row in rows:
+            cells = [" ".join(str(cell or "").split()) for cell in row]
+            periods = {i: parse_period(cell) for i, cell in enumerate(cells) if cell and parse_number(cell) is None}
+            periods = {i: p for i, p in periods.items() if p}
+            if len(periods) >= 2:
+                columns = periods  # a new header (e.g. a second table on the page) replaces the old one
+                continue
+            if not columns or not cells:
+                continue
+
+            label = next((cell for cell in cells if cell), "")
+            metric = next((name for name, pattern in METRIC_LABELS.items() if pattern.match(label)), None)
+            if metric is None or metric in found:
+                continue
+            for index, (period, period_end) in columns.items():
+                value = parse_number(cells[index]) if index < len(cells) else None
+                if value is None:
+                    continue
+                records.append({
+                    "metric": metric, "period": period, "period_end": period_end, "value": value,
+                    "unit": "Per Share" if metric == "eps" else unit, "basis": basis, "source_page": page_number,
+                })
+                found.add(metric)
+        return records
+
+    def _grid_from_words(self, page) -> List[List[str]]:
+        """
+        Rebuilds a cell grid from word positions: words are grouped into rows by
+        baseline and into cells by horizontal gaps, then every cell is aligned to
+        the closest column of the nearest header row above it.
+        """
+        words = sorted(page.get_text("words"), key=lambda w: (round(w[3]), w[0]))
+        lines = []
+        for x0, y0, x1, y1, word, *_ in words:
+            if lines and abs(lines[-1]["y"] - y1) <= self.row_tolerance:
+                lines[-1]["words"].append((x0, x1, word))
+            else:
+                lines.append({"y": y1, "words": [(x0, x1, word)]})
+
+        grid = []
+        header_centres = None
+        for line in lines:
+            cells = []  # (x0, x1, text)
+            for x0, x1, word in sorted(line["words"]):
+                if cells and x0 - cells[-1][1] <= self.column_gap:
+                    cells[-1] = (cells[-1][0], x1, f"{cells[-1][2]} {word}")
+                else:
+                    cells.append((x0, x1, word))
+
+            period_cells = [(x0, x1, text) for x0, x1, text in cells if parse_number(text) is None and parse_period(text)]
+            if len(period_cells) >= 2:
+                header_centres = [(x0 + x1) / 2 for x0, x1, _ in period_cells]
+                grid.append([""] + [text for _, _, text in period_cells])
+                continue
+            if header_centres is None:
+                continue
+
+            # Leading text cells form the label; values snap to the nearest header column
+            label_parts, values = [], [""] * len(header_centres)
+            for x0, x1, text in cells:
+                if parse_number(text) is None and not any(values):
+                    label_parts.append(text)
+                    continue
+                centre = (x0 + x1) / 2
+                column = min(range(len(header_centres)), key=lambda i: abs(header_centres[i] - centre))
+                values[column] = text
+            grid.append([" ".join(label_parts)] + values)
+        return grid
+
+    @staticmethod
+    def _detect_unit(text: str) -> str:
+        head = text[:2000].lower()
+        if "lakh" in head:
+            return "Lakhs"
+        if "million" in head:
+            return "Millions"
+        if "billion" in head:
+            return "Billions"
+        return "Crores"
+
+if __name__ == "__main__":
+    # Test stub
+    pass
@@ -0,0 +1,97 @@
+import math
+from typing import Dict, Any, List
+
+# Chart series -> metric name in the financial DB
+TREND_SERIES = {"Revenue": "revenue", "Profit": "pat", "Net Worth": "net_worth"}
+# Table units (see TableExtractor._detect_unit) in ₹ Crores; mixed units are charted in Crores
+UNIT_IN_CRORES = {"Crores": 1.0, "Lakhs": 0.01, "Millions": 0.1, "Billions": 100.0}
+
+def validate_trend_data(data: Any) -> Dict[str, Any]:
+    """
+    Checks a trend dataset against the chart schema and returns a normalised copy:
+    {"years": [str, ...], "data": {series: [float, ...]}, ...extra keys kept as-is}
+    - "years" is a non-empty list of distinct, non-empty labels (earliest first)
+    - "data" has only known series (TREND_SERIES), each with one finite number per year,
+      or None for a year the series has no figure for
+    Raises ValueError when the dataset can't be used for charts.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Trend data must be an object")
+    years = data.get("years")
+    if not isinstance(years, list) or not years:
+        raise ValueError("'years' must be a non-empty list")
+    years = [str(year).strip() for year in years]
+    if not all(years) or len(set(years)) != len(years):
+        raise ValueError("'years' must be distinct, non-empty labels")
+
+    series = data.get("data")
+    if not isinstance(series, dict):
+        raise ValueError("'data' must be an object of series")
+    normalised = {}
+    for name, values in series.items():
+        if name not in TREND_SERIES:
+            continue
+        if not isinstance(values, list) or len(values) != len(years):
+            raise ValueError(f"Series '{name}' must have one value per year")
+        try:
+            values = [float(value) if value is not None else None for value in values]
+        except (TypeError, ValueError):
+            raise ValueError(f"Series '{name}' must contain numbers")
+        if not all(value is None or math.isfinite(value) for value in values):
+            raise ValueError(f"Series '{name}' must contain finite numbers")
+        normalised[name] = values
+    if not normalised or not any(any(values) for values in normalised.values()):
+        raise ValueError("Trend data has no usable series")
+
+    return dict(data, years=years, data=normalised)
+
+def build_trend_data(records: List[Dict[str, Any]], max_periods=3) -> Dict[str, Any]:
+    """
+    Deterministic trend dataset from dated financial records (see FinancialDatabase.get_records),
+    or None if there is nothing to chart. Uses a single basis (Consolidated preferred)
+    so periods aren't mixed up, and the latest `max_periods` periods, oldest first.
+    A period a series has no figure for is None (a gap in the chart, not a zero).
+    Figures in different units are converted to Crores; records in an unknown unit are left out.
+    """
+    records = [r for r in records if r.get("period_end") and r["metric"] in TREND_SERIES.values()]
+    if not records:
+        return None
+    bases = {r["basis"] for r in records}
+    basis = "Consolidated" if "Consolidated" in bases else sorted(bases)[0]
+    records = sorted((r for r in records if r["basis"] == basis), key=lambda r: r["period_end"])
+
+    units = {r["unit"] for r in records}
+    if len(units) == 1:
+        unit = units.pop()
+    else:
+        unit = "Crores"
+        records = [
+            dict(r, value=r["value"] * UNIT_IN_CRORES[r["unit"]], unit=unit)
+            for r in records if r["unit"] in UNIT_IN_CRORES and r["value"] is not None
+        ]
+
+    periods = []
+    for record in records:
+        if record["period"] not in periods:
+            periods.append(record["period"])
+    periods = periods[-max_periods:]
+
+    data = {}
+    for series, metric in TREND_SERIES.items():
+        values = {r["period"]: r["value"] for r in records if r["metric"] == metric}
+        if any(period in values for period in periods):
+            data[series] = [values.get(period) for period in periods]
+    try:
+        return validate_trend_data({
+            "years": periods,
+            "data": data,
+            "unit": unit,
+            "basis": basis,
+            "pages": sorted({r["source_page"] for r in records if r.get("source_page")}),
+        })
+    except ValueError:
+        return None
+
+if __name__ == "__main__":
+    # Test stub
+    pass
@@ -0,0 +1,111 @@
+"""
+Background ingestion worker.
+
+    python -m ingestion.worker --workers 2
+
+Claims jobs from the SQLite queue (ingestion/job_queue.py) and runs the
+IPOParser -> IPOChunker -> FinancialExtractor -> IPOVectorStore pipeline for each,
+reporting progress back to the queue for the Streamlit app to poll.
+`--workers` documents are ingested at the same time (one thread each, sharing one
+Chroma client, embedding model and financial DB).
+"""
+import argparse
+import os
+import socket
+import threading
+import traceback
+import uuid
+
+from ingestion.chunker import IPOChunker, CHUNK_MODES
+from ingestion.job_queue import IngestionJobQueue
+from ingestion.pipeline import IngestionPipeline
+from storage.vector_store import IPOVectorStore
+from storage.financial_db import FinancialDatabase
+from utils.telemetry import TELEMETRY
+
+class IngestionWorker:
+    def __init__(self, queue_path="ingestion_jobs.db", workers=1, parse_workers=1, poll_interval=1.0, heartbeat_interval=10.0,
+                 chunk_mode="page"):
+        self.queue_path = queue_path
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.queue = IngestionJobQueue(queue_path)
+        # One pipeline for every thread: the stages keep no per-run state
+        self.pipeline = IngestionPipeline(IPOVectorStore(), FinancialDatabase(), chunker=IPOChunker(mode=chunk_mode),
+                                          parse_workers=parse_workers)
+        self._stop = threading.Event()
+
+    def run(self):
+        """
+        Runs until stop() (or Ctrl+C).
+        """
+        print(f"🚀 Ingestion worker {self.worker_id}: {self.workers} thread(s), queue {self.queue_path}")
+        self.queue.heartbeat(self.worker_id)
+        threads = [threading.Thread(target=self._heartbeat_loop, daemon=True)]
+        threads += [threading.Thread(target=self._work_loop, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            while not self._stop.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            print("🛑 Stopping ingestion worker (interrupted jobs resume from their checkpoints)")
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_one(self, job):
+        """
+        Ingests one claimed job and records the outcome in the queue.
+        """
+        job_id = job["id"]
+        print(f"📄 Job {job_id}: ingesting {job['pdf_path']}")
+        try:
+            result = self.pipeline.run(job["pdf_path"], progress=lambda message: self.queue.update_progress(job_id, message))
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {e}")
+            if self.queue.fail(job_id, self.worker_id, f"{e}\n{traceback.format_exc()}"):
+                TELEMETRY.counter("ingestion_jobs_total", status="failed")
+            return
+        if not self.queue.complete(job_id, self.worker_id, result):
+            # Our heartbeat lapsed and another worker reclaimed the job; its outcome stands
+            print(f"⚠️ Job {job_id} was reclaimed by another worker; dropping this result")
+            TELEMETRY.counter("ingestion_jobs_total", status="superseded")
+            return
+        TELEMETRY.counter("ingestion_jobs_total", status="cached" if result["cached"] else "done")
+        print(f"✅ Job {job_id} done: {result['pages']} pages, {result['chunks']} chunks")
+
+    def _work_loop(self):
+        while not self._stop.is_set():
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self.run_one(job)
+
+    def _heartbeat_loop(self):
+        # Keeps long stages (e.g. embedding) from looking stalled to the queue
+        while not self._stop.wait(self.heartbeat_interval):
+            self.queue.heartbeat(self.worker_id)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the background ingestion worker.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("INGESTION_WORKERS", "1")),
+                        help="documents ingested concurrently")
+    parser.add_argument("--parse-workers", type=int, default=1, help="processes used to extract page text per document")
+    parser.add_argument("--queue", default="ingestion_jobs.db", help="path of the SQLite job queue")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--chunk-mode", choices=CHUNK_MODES, default=os.getenv("INGESTION_CHUNK_MODE", "page"),
+                        help="'layout' keeps table rows together and lets chunks cross page breaks")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("INGESTION_METRICS_PORT", "0")),
+                        help="serve Prometheus metrics for the ingestion stages on this port (0 = off)")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        print(f"📊 Metrics at {TELEMETRY.serve(args.metrics_port)}")
+
+    IngestionWorker(args.queue, workers=args.workers, parse_workers=args.parse_workers, poll_interval=args.poll_interval,
+                    chunk_mode=args.chunk_mode).run()
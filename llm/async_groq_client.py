@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import time
+from typing import AsyncIterator, Dict, List
+
+import httpx
+from dotenv import load_dotenv
+
+from llm.errors import (
+    LLMError, LLMAuthError, LLMConnectionError, LLMResponseError, backoff_delay, error_for_status
+)
+
+# Load env variables
+load_dotenv()
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float):
+        """
+        Classic token bucket: refills at `rate_per_second`, holds at most `capacity` tokens.
+        """
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0):
+        """
+        Waits until `tokens` are available, then takes them.
+        """
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+class AsyncGroqClient:
+    def __init__(self, api_key=None, model="llama-3.3-70b-versatile", base_url=None,
+                 max_concurrency=8, requests_per_minute=30, max_retries=4,
+                 backoff_base=0.5, backoff_max=20.0, timeout=60.0):
+        """
+        asyncio client for Groq's OpenAI-compatible chat API.
+        - One pooled httpx connection pool shared by every call on this instance.
+        - At most `max_concurrency` requests in flight (semaphore).
+        - Client-side token bucket at `requests_per_minute`.
+        - 429/5xx/network errors are retried with jittered exponential backoff
+          (honouring Retry-After), up to `max_retries` times.
+        Failures raise LLMError subclasses instead of returning strings.
+        `base_url` can point at any OpenAI-compatible server (e.g. llm/mock_server.py).
+        """
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.model = model
+        self.base_url = (base_url or os.getenv("GROQ_BASE_URL") or GROQ_BASE_URL).rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(requests_per_minute / 60.0, capacity=max(1, max_concurrency))
+        self._limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        self._http = None
+
+    async def chat(self, messages: List[Dict[str, str]], temperature=0.0) -> str:
+        """
+        Sends a chat completion request and returns the message content.
+        messages: List of dicts [{"role": "user", "content": "..."}]
+        """
+        payload = {"model": self.model, "messages": messages, "temperature": temperature, "stream": False}
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    await self._bucket.acquire()
+                    response = await self._client().post("/chat/completions", json=payload)
+                self._raise_for_status(response)
+                try:
+                    return response.json()["choices"][0]["message"]["content"]
+                except (ValueError, KeyError, IndexError) as e:
+                    raise LLMResponseError(f"Unexpected completion payload: {e}", response.status_code, response.text)
+            except httpx.HTTPError as e:
+                error = LLMConnectionError(f"Error communicating with LLM: {e}")
+                if attempt >= self.max_retries:
+                    raise error from e
+                await asyncio.sleep(self._backoff(attempt, error))
+            except LLMError as e:
+                if not e.retryable or attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt, e))
+
+    async def chat_stream(self, messages: List[Dict[str, str]], temperature=0.0) -> AsyncIterator[str]:
+        """
+        Streaming variant of chat(): yields text deltas from the SSE stream.
+        Retries only happen before the first delta has been yielded.
+        """
+        payload = {"model": self.model, "messages": messages, "temperature": temperature, "stream": True}
+        started = False
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    await self._bucket.acquire()
+                    async with self._client().stream("POST", "/chat/completions", json=payload) as response:
+                        if response.status_code >= 400:
+                            await response.aread()
+                        self._raise_for_status(response)
+                        async for line in response.aiter_lines():
+                            delta = self._parse_sse_line(line)
+                            if delta is None:
+                                break
+                            if delta:
+                                started = True
+                                yield delta
+                return
+            except httpx.HTTPError as e:
+                error = LLMConnectionError(f"Error communicating with LLM: {e}")
+                # Retrying after partial output would duplicate text
+                if started or attempt >= self.max_retries:
+                    raise error from e
+                await asyncio.sleep(self._backoff(attempt, error))
+            except LLMError as e:
+                if started or not e.retryable or attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt, e))
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def _client(self) -> httpx.AsyncClient:
+        if not self.api_key:
+            raise LLMAuthError("Missing API Key (set GROQ_API_KEY)")
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                limits=self._limits,
+                timeout=self.timeout,
+            )
+        return self._http
+
+    def _backoff(self, attempt: int, error: LLMError) -> float:
+        delay = backoff_delay(attempt, error, self.backoff_base, self.backoff_max)
+        print(f"⚠️ LLM call failed ({error}); retrying in {delay:.2f}s")
+        return delay
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response):
+        if response.status_code >= 400:
+            raise error_for_status(response.status_code, response.text, response.headers.get("retry-after"))
+
+    @staticmethod
+    def _parse_sse_line(line: str):
+        """
+        Returns the text delta of one SSE line, "" for lines without content,
+        or None at the end-of-stream marker.
+        """
+        if not line.startswith("data:"):
+            return ""
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return None
+        try:
+            choices = json.loads(data).get("choices") or [{}]
+        except ValueError as e:
+            raise LLMResponseError(f"Malformed stream chunk: {e}", body=data)
+        return (choices[0].get("delta") or {}).get("content") or ""
+
+if __name__ == "__main__":
+    pass
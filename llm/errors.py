@@ -0,0 +1,73 @@
+import random
+
+class LLMError(Exception):
+    """
+    Base class for LLM client failures.
+    status_code is the HTTP status (None for network errors);
+    retryable tells callers whether trying again later can help.
+    """
+    retryable = False
+
+    def __init__(self, message: str, status_code: int = None, body: str = None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.body = body
+
+    def __str__(self):
+        if self.status_code:
+            return f"{self.message} (HTTP {self.status_code})"
+        return self.message
+
+class LLMAuthError(LLMError):
+    """Missing or rejected API key (401/403)."""
+
+class LLMBadRequestError(LLMError):
+    """The request itself was rejected (400/404/422); retrying won't help."""
+
+class LLMRateLimitError(LLMError):
+    """429 from the provider. retry_after is the server's hint in seconds, if any."""
+    retryable = True
+
+    def __init__(self, message: str, status_code: int = 429, body: str = None, retry_after: float = None):
+        super().__init__(message, status_code, body)
+        self.retry_after = retry_after
+
+class LLMServerError(LLMError):
+    """5xx from the provider."""
+    retryable = True
+
+class LLMConnectionError(LLMError):
+    """Network failure or timeout before a response was received."""
+    retryable = True
+
+class LLMResponseError(LLMError):
+    """The provider answered 2xx but the payload could not be understood."""
+
+def error_for_status(status: int, body: str = None, retry_after: str = None) -> LLMError:
+    """
+    The LLMError subclass for an HTTP error status.
+    `retry_after` is the raw Retry-After header of a 429, if any.
+    """
+    if status == 429:
+        try:
+            seconds = float(retry_after) if retry_after else None
+        except ValueError:
+            seconds = None
+        return LLMRateLimitError("Rate limited by LLM provider", status, body, retry_after=seconds)
+    if status in (401, 403):
+        return LLMAuthError("LLM provider rejected the API key", status, body)
+    if status >= 500:
+        return LLMServerError("LLM provider server error", status, body)
+    return LLMBadRequestError("LLM provider rejected the request", status, body)
+
+def backoff_delay(attempt: int, error: LLMError, base: float, cap: float) -> float:
+    """
+    Full-jitter exponential backoff before retry `attempt` (0-based),
+    never shorter than the server's Retry-After (capped at `cap`).
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after:
+        delay = max(delay, min(retry_after, cap))
+    return delay
@@ -1,44 +1,220 @@
 import os
-from groq import Groq
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from llm.errors import (
+    LLMError, LLMAuthError, LLMConnectionError, LLMResponseError, backoff_delay, error_for_status
+)
+from utils.telemetry import TELEMETRY, traced
+
 # Load env variables
 load_dotenv()
 
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float):
+        """
+        Thread-safe token bucket (the blocking twin of async_groq_client.TokenBucket):
+        refills at `rate_per_second`, holds at most `capacity` tokens.
+        """
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """
+        Blocks until `tokens` are available, then takes them.
+        """
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                time.sleep((tokens - self.tokens) / self.rate)
+
 class GroqClient:
-    def __init__(self, api_key=None, model="llama-3.3-70b-versatile"):
+    # Process-wide clients handed out by shared(), one per model
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, api_key=None, model="llama-3.3-70b-versatile", base_url=None,
+                 max_concurrency=8, requests_per_minute=None, max_retries=4,
+                 backoff_base=0.5, backoff_max=20.0, timeout=60.0):
         """
         Wrapper for Groq API.
         Default model: llama-3.3-70b (High performance, low latency).
+        base_url overrides the API host (e.g. a local mock server, see llm/mock_server.py).
+        Same traffic shaping as AsyncGroqClient, for the threads of one process:
+        - At most `max_concurrency` requests in flight.
+        - Client-side token bucket at `requests_per_minute`
+          (default GROQ_REQUESTS_PER_MINUTE or 30; 0 disables it).
+        - 429/5xx/network errors are retried with jittered exponential backoff
+          (honouring Retry-After), up to `max_retries` times.
         """
         self.api_key = api_key or os.getenv("GROQ_API_KEY")
         self.model = model
+        self.base_url = base_url or os.getenv("GROQ_BASE_URL")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        if requests_per_minute is None:
+            requests_per_minute = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._bucket = TokenBucket(requests_per_minute / 60.0, capacity=max(1, max_concurrency)) if requests_per_minute > 0 else None
         
         if not self.api_key:
             print("⚠️ Warning: No GROQ_API_KEY found. LLM calls will fail.")
             self.client = None
         else:
-            self.client = Groq(api_key=self.api_key)
+            # Imported on first client rather than at module load
+            from groq import Groq
+            # Retries happen here (see chat()), not in the SDK as well
+            self.client = Groq(api_key=self.api_key, base_url=self.base_url, max_retries=0, timeout=timeout)
+
+    @classmethod
+    def shared(cls, model="llama-3.3-70b-versatile") -> "GroqClient":
+        """
+        The process-wide client for `model` (key and base URL from the environment),
+        so every session reuses one HTTP connection pool.
+        """
+        with cls._shared_lock:
+            if model not in cls._shared:
+                cls._shared[model] = cls(model=model)
+            return cls._shared[model]
 
+    @traced("llm.chat")
     def chat(self, messages, temperature=0.0):
         """
         Sends a chat completion request to Groq.
         messages: List of dicts [{"role": "user", "content": "..."}]
+        Failures raise LLMError subclasses (llm/errors.py), never an answer-shaped string.
+        """
+        client = self._require_client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._slot():
+                    completion = client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=temperature,
+                        stream=False
+                    )
+                content = completion.choices[0].message.content
+            except Exception as e:
+                error = self._failed(e, final=attempt >= self.max_retries)
+                if not error.retryable or attempt >= self.max_retries:
+                    raise error from e
+                time.sleep(self._backoff(attempt, error))
+                continue
+            self._record_usage(completion.usage, "ok")
+            return content
+
+    @traced("llm.chat_stream")
+    def chat_stream(self, messages, temperature=0.0):
+        """
+        Streaming variant of chat(): a generator yielding text deltas as Groq produces them,
+        so the UI can render the first tokens long before generation finishes.
+        Failures (before or during the stream) raise LLMError subclasses.
+        Retries only happen before the first delta has been yielded.
         """
+        client = self._require_client()
+        started = False
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._slot():
+                    stream = client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=temperature,
+                        stream=True
+                    )
+                    start = time.perf_counter()
+                    usage = None
+                    for chunk in stream:
+                        # Groq reports usage on the last chunk (x_groq.usage); OpenAI-style servers on chunk.usage
+                        usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or getattr(chunk, "usage", None) or usage
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            if not started:
+                                TELEMETRY.current_span().set(time_to_first_token_ms=round((time.perf_counter() - start) * 1000, 1))
+                                started = True
+                            yield chunk.choices[0].delta.content
+            except Exception as e:
+                # Retrying after partial output would duplicate text
+                final = started or attempt >= self.max_retries
+                error = self._failed(e, final=final)
+                if final or not error.retryable:
+                    raise error from e
+                time.sleep(self._backoff(attempt, error))
+                continue
+            self._record_usage(usage, "ok")
+            return
+
+    def _require_client(self):
         if not self.client:
-            return "Error: Missing API Key"
-
-        try:
-            completion = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                stream=False
-            )
-            return completion.choices[0].message.content
-        except Exception as e:
-            print(f"❌ Groq API Error: {e}")
-            return f"Error communicating with LLM: {str(e)}"
+            error = LLMAuthError("Missing API Key (set GROQ_API_KEY)")
+            self._record_usage(None, "error", error=error)
+            raise error
+        return self.client
+
+    @contextmanager
+    def _slot(self):
+        """
+        Holds one of the `max_concurrency` request slots (and a rate-limit token) for the block.
+        """
+        with self._semaphore:
+            if self._bucket is not None:
+                self._bucket.acquire()
+            yield
+
+    def _backoff(self, attempt: int, error: LLMError) -> float:
+        delay = backoff_delay(attempt, error, self.backoff_base, self.backoff_max)
+        print(f"⚠️ LLM call failed ({error}); retrying in {delay:.2f}s")
+        return delay
+
+    def _failed(self, error: Exception, final=True) -> LLMError:
+        """
+        Records a failed attempt ("retry" unless `final`) and maps the Groq SDK exception onto an LLMError.
+        """
+        import groq
+
+        if isinstance(error, LLMError):
+            llm_error = error
+        elif isinstance(error, groq.APIStatusError):
+            llm_error = error_for_status(error.status_code, error.response.text, error.response.headers.get("retry-after"))
+        elif isinstance(error, groq.APIConnectionError):
+            llm_error = LLMConnectionError(f"Error communicating with LLM: {error}")
+        else:
+            llm_error = LLMResponseError(f"Unexpected LLM response: {type(error).__name__}: {error}")
+        if final or not llm_error.retryable:
+            print(f"❌ Groq API Error: {llm_error}")
+            self._record_usage(None, "error", error=llm_error)
+        else:
+            self._record_usage(None, "retry")
+        return llm_error
+
+    def _record_usage(self, usage, status: str, error: Exception = None):
+        """
+        Adds the request and its token counts to the current span and the LLM counters.
+        """
+        TELEMETRY.counter("llm_requests_total", model=self.model, status=status)
+        span = TELEMETRY.current_span()
+        if error is not None and span:
+            span.error = f"{type(error).__name__}: {error}"
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        TELEMETRY.counter("llm_tokens_total", prompt_tokens, model=self.model, kind="prompt")
+        TELEMETRY.counter("llm_tokens_total", completion_tokens, model=self.model, kind="completion")
+        if span:
+            span.set(model=self.model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
 
 if __name__ == "__main__":
     pass
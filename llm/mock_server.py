@@ -0,0 +1,166 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class MockLLMServer:
+    def __init__(self, host="127.0.0.1", port=0, reply="Mock answer [Source: Page 1]",
+                 latency=0.0, token_delay=0.0, fail_times=0, fail_status=429, retry_after=None):
+        """
+        Local OpenAI-compatible chat server for tests and benchmarks.
+        Answers POST .../chat/completions (plain or SSE streaming) with `reply`
+        after `latency` seconds. The first `fail_times` requests fail with
+        `fail_status` (optionally sending a Retry-After header) to exercise retries.
+        `max_in_flight` records the most requests ever handled at once (client concurrency limits).
+        Use as a context manager; `base_url` is what the clients should point at.
+        """
+        self.reply = reply
+        self.latency = latency
+        self.token_delay = token_delay
+        self.fail_times = fail_times
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/openai/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _next_failure(self):
+        """
+        Counts the request and returns the status to fail with, or None.
+        """
+        with self._lock:
+            self.request_count += 1
+            if self.request_count <= self.fail_times:
+                return self.fail_status
+            return None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass  # keep test/benchmark output quiet
+
+            def do_POST(self):
+                with server._lock:
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    self._handle_post()
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _handle_post(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with server._lock:
+                    server.requests.append(body)
+
+                if not self.path.endswith("/chat/completions"):
+                    return self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+                failure = server._next_failure()
+                if failure:
+                    headers = {"Retry-After": str(server.retry_after)} if server.retry_after is not None else {}
+                    return self._send_json(failure, {"error": {"message": "Injected failure"}}, headers)
+
+                time.sleep(server.latency)
+                prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages", []))
+                completion_tokens = len(server.reply.split())
+                if body.get("stream"):
+                    return self._send_stream(body.get("model"))
+
+                self._send_json(200, {
+                    "id": "chatcmpl-mock",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "mock"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": server.reply},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                })
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, model):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                words = server.reply.split(" ")
+                for i, word in enumerate(words):
+                    delta = word if i == 0 else " " + word
+                    chunk = {
+                        "id": "chatcmpl-mock",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model or "mock",
+                        "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    time.sleep(server.token_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local mock OpenAI-compatible chat server.")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-times", type=int, default=0)
+    parser.add_argument("--fail-status", type=int, default=429)
+    args = parser.parse_args()
+
+    server = MockLLMServer(port=args.port, latency=args.latency, fail_times=args.fail_times, fail_status=args.fail_status)
+    print(f"Mock LLM server listening on {server.base_url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+class SemanticAnswerCache:
+    def __init__(self, similarity_threshold=0.92, ttl_seconds=3600, max_entries_per_doc=256):
+        """
+        In-process cache of final answers, scoped per document.
+        An entry is reused when a new query embeds close to a cached query
+        (cosine >= similarity_threshold) AND retrieval for it still returns the
+        same chunk IDs, so paraphrases ("key risks?" / "top risks?") share one
+        answer while anything grounded in different text is regenerated.
+        Entries expire after `ttl_seconds`; each document keeps at most
+        `max_entries_per_doc` (least recently used evicted first).
+        """
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_doc = max_entries_per_doc
+
+        self._entries: Dict[str, "OrderedDict[int, Dict[str, Any]]"] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, doc_id: str, query_embedding: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Returns the most similar live entry for this document
+        ({"id", "intent", "chunk_ids", "answer", ...}) or None.
+        The caller must still confirm the chunk IDs with confirm().
+        """
+        query_vec = self._normalize(query_embedding)
+        now = time.time()
+        with self._lock:
+            entries = self._entries.get(doc_id)
+            if not entries:
+                self.misses += 1
+                return None
+
+            best, best_score = None, self.similarity_threshold
+            for entry_id in list(entries):
+                entry = entries[entry_id]
+                if now - entry["created_at"] > self.ttl_seconds:
+                    del entries[entry_id]
+                    continue
+                score = float(entry["embedding"] @ query_vec)
+                if score >= best_score:
+                    best, best_score = entry, score
+            if best is None:
+                self.misses += 1
+            return best
+
+    def confirm(self, doc_id: str, entry: Dict[str, Any], chunk_ids: List[str]) -> Optional[str]:
+        """
+        Returns the cached answer if `chunk_ids` (fresh retrieval for the new query)
+        match the entry's, counting the hit/miss either way.
+        """
+        with self._lock:
+            entries = self._entries.get(doc_id, {})
+            if entry["id"] in entries and entry["chunk_ids"] == tuple(chunk_ids):
+                entries.move_to_end(entry["id"])
+                self.hits += 1
+                return entry["answer"]
+            self.misses += 1
+            return None
+
+    def store(self, doc_id: str, query_embedding: np.ndarray, intent: str, chunk_ids: List[str], answer: str):
+        with self._lock:
+            entries = self._entries.setdefault(doc_id, OrderedDict())
+            entry_id = self._next_id
+            self._next_id += 1
+            entries[entry_id] = {
+                "id": entry_id,
+                "embedding": self._normalize(query_embedding),
+                "intent": intent,
+                "chunk_ids": tuple(chunk_ids),
+                "answer": answer,
+                "created_at": time.time(),
+            }
+            while len(entries) > self.max_entries_per_doc:
+                entries.popitem(last=False)
+
+    def invalidate(self, doc_id: str):
+        """
+        Drops every cached answer for a document (call when it is re-ingested).
+        """
+        with self._lock:
+            self._entries.pop(doc_id, None)
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+# Shared by every IPOCrew in the process, so analysts in different sessions
+# asking about the same document reuse each other's answers.
+SHARED_ANSWER_CACHE = SemanticAnswerCache()
+
+if __name__ == "__main__":
+    # Test stub
+    pass
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+class EmbeddingCache:
+    # Process-wide caches handed out by shared(), one per database file
+    _shared: Dict[str, "EmbeddingCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db_path="embedding_cache/embeddings.db", max_entries=200_000):
+        """
+        Persistent text -> embedding cache on local disk (SQLite).
+        Keys are a hash of the embedding model and the whitespace-normalised text,
+        so RHP boilerplate and the agents' fixed queries are encoded once across
+        uploads and sessions. Least-recently-used entries are evicted past `max_entries`,
+        down to 95% of it, so a full cache isn't trimmed on every write.
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        # Running estimate of the row count, so put_many() needn't count the table on every call.
+        # Other processes (app, worker) write to the same file, so it is only used to decide when
+        # to take an exact count.
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @classmethod
+    def shared(cls, db_path="embedding_cache/embeddings.db") -> "EmbeddingCache":
+        """
+        The process-wide cache for `db_path` (one SQLite connection however many stores use it).
+        """
+        key = os.path.abspath(db_path)
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(db_path=db_path)
+            return cls._shared[key]
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{model_name}|{normalized}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model_name: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Returns the cached float32 vector for each text, or None where missing.
+        """
+        keys = [self.make_key(model_name, t) for t in texts]
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            unique_keys = list(set(keys))
+            for i in range(0, len(unique_keys), 500):
+                part = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+                )
+                self._conn.commit()
+
+        results = [found.get(k) for k in keys]
+        hit_count = sum(1 for r in results if r is not None)
+        self.hits += hit_count
+        self.misses += len(results) - hit_count
+        return results
+
+    def put_many(self, model_name: str, texts: List[str], vectors: np.ndarray):
+        """
+        Stores float32 vectors for `texts` and evicts the least recently used entries if over capacity.
+        """
+        now = time.time()
+        rows = [
+            (self.make_key(model_name, t), np.asarray(v, dtype=np.float32).tobytes(), now)
+            for t, v in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            # Callers store texts that missed, so nearly every row is new
+            self._count += len(rows)
+            if self._count > self.max_entries:
+                self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                if self._count > self.max_entries:
+                    keep = self.max_entries - self.max_entries // 20
+                    self._conn.execute('''
+                        DELETE FROM embeddings WHERE key IN (
+                            SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?
+                        )
+                    ''', (self._count - keep,))
+                    self._count = keep
+            self._conn.commit()
+
+if __name__ == "__main__":
+    # Test stub
+    pass
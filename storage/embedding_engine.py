@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Dict, List
+
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+
+class EmbeddingEngine:
+    # Process-wide engines handed out by shared(), one per model
+    _shared: Dict[str, "EmbeddingEngine"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, model_name="all-MiniLM-L6-v2", batch_size=64, num_workers=1,
+                 num_threads=None, precision="float32", device="cpu"):
+        """
+        Local sentence-transformers encoder used for both chunks and queries.
+        - batch_size: texts per forward pass.
+        - num_workers: >1 encodes large inputs on several CPU processes at once.
+        - num_threads: caps torch intra-op threads (None = torch default).
+        - precision: "float32", "float16" or "int8" output from encode().
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, got {precision!r}")
+
+        from sentence_transformers import SentenceTransformer
+
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.num_workers = max(1, num_workers or 1)
+        self.precision = precision
+        self.device = device
+        self.model = SentenceTransformer(model_name, device=device)
+        self._pool = None
+
+        # Running totals for throughput reporting
+        self.total_texts = 0
+        self.total_seconds = 0.0
+
+    @classmethod
+    def shared(cls, model_name="all-MiniLM-L6-v2") -> "EmbeddingEngine":
+        """
+        The process-wide engine for `model_name` (default settings), loaded on first use.
+        Every session, crew and ingestion in the process reuses it instead of loading the model again.
+        """
+        with cls._shared_lock:
+            if model_name not in cls._shared:
+                cls._shared[model_name] = cls(model_name=model_name)
+            return cls._shared[model_name]
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encodes `texts` into an (n, dim) array in the configured precision.
+        Embeddings are L2-normalised, which is what makes int8 scaling by 127 lossless enough.
+        """
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=self._dtype())
+
+        start = time.perf_counter()
+        # The process pool only pays off once every worker gets at least one full batch
+        if self.num_workers > 1 and len(texts) >= self.batch_size * self.num_workers:
+            embeddings = self.model.encode_multi_process(
+                texts, self._get_pool(), batch_size=self.batch_size, normalize_embeddings=True
+            )
+        else:
+            embeddings = self.model.encode(
+                texts, batch_size=self.batch_size, convert_to_numpy=True,
+                normalize_embeddings=True, show_progress_bar=False
+            )
+        self.total_seconds += time.perf_counter() - start
+        self.total_texts += len(texts)
+
+        return self._quantize(np.asarray(embeddings, dtype=np.float32))
+
+    def to_float(self, embeddings: np.ndarray) -> np.ndarray:
+        """
+        Converts encode() output back to float32 (what Chroma stores and compares).
+        """
+        embeddings = np.asarray(embeddings)
+        if embeddings.dtype == np.int8:
+            return embeddings.astype(np.float32) / 127.0
+        return embeddings.astype(np.float32)
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def chunks_per_sec(self) -> float:
+        if not self.total_seconds:
+            return 0.0
+        return self.total_texts / self.total_seconds
+
+    def close(self):
+        """
+        Stops the multi-process pool if one was started.
+        """
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = self.model.start_multi_process_pool(target_devices=[self.device] * self.num_workers)
+        return self._pool
+
+    def _quantize(self, embeddings: np.ndarray) -> np.ndarray:
+        if self.precision == "float16":
+            return embeddings.astype(np.float16)
+        if self.precision == "int8":
+            return np.clip(np.rint(embeddings * 127.0), -127, 127).astype(np.int8)
+        return embeddings
+
+    def _dtype(self):
+        return {"float32": np.float32, "float16": np.float16, "int8": np.int8}[self.precision]
+
+if __name__ == "__main__":
+    pass
@@ -1,78 +1,322 @@
+import json
+import os
 import sqlite3
-import pandas as pd
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Iterable, List, Tuple
+
+class _SharedConnection:
+    """
+    One long-lived connection per database file, shared by every FinancialDatabase
+    (and thread) in the process, plus the read-through cache that sits on top of it.
+    """
+    _registry: Dict[str, "_SharedConnection"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, db_path: str):
+        self.lock = threading.RLock()
+        # check_same_thread=False is safe because every use goes through self.lock;
+        # the statement cache keeps our handful of queries prepared.
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=256)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.cache: Dict[Any, Any] = {}
+        self.data_version = None
+        # Schema creation / legacy migration runs once per process, not per FinancialDatabase
+        self.schema_ready = False
+
+    @classmethod
+    def get(cls, db_path: str) -> "_SharedConnection":
+        key = os.path.abspath(db_path)
+        with cls._registry_lock:
+            if key not in cls._registry:
+                cls._registry[key] = _SharedConnection(db_path)
+            return cls._registry[key]
+
+# Rows written before per-document storage existed (and unscoped callers) live under this id
+LEGACY_DOCUMENT_ID = "legacy"
 
 class FinancialDatabase:
-    def __init__(self, db_path="financials.db"):
+    def __init__(self, db_path="financials.db", document_id=None):
+        """
+        SQLite store for extracted financial metrics across many IPO documents.
+        `document_id` is the default scope for reads and writes (methods accept an override).
+        """
         self.db_path = db_path
+        self.document_id = document_id
+        self._shared = _SharedConnection.get(db_path)
         self._init_db()
 
     def _init_db(self):
         """
         Initialize the SQLite database schema.
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Table to store basic extracted metrics
-        # We store them as a single row for the current IPO
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS financials (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                metric_name TEXT UNIQUE,
-                value REAL,
-                unit TEXT DEFAULT 'Crores',
-                period TEXT DEFAULT 'Latest Year'
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self._shared.lock:
+            if self._shared.schema_ready:
+                return
+            conn = self._shared.conn
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    document_id TEXT PRIMARY KEY,
+                    name TEXT,
+                    ingested_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # One row per (document, metric, period, consolidation basis, unit)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS financial_metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    document_id TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    period_end TEXT,
+                    basis TEXT NOT NULL DEFAULT 'Consolidated',
+                    unit TEXT NOT NULL DEFAULT 'Crores',
+                    value REAL,
+                    source_page INTEGER,
+                    UNIQUE (document_id, metric, period, basis, unit)
+                )
+            ''')
+            # The UNIQUE index serves per-document lookups; these serve time series and cross-document comparisons
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_doc_metric_period_end ON financial_metrics (document_id, metric, period_end)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_metric_period ON financial_metrics (metric, period, document_id)")
+
+            # Chart-ready trend dataset per document (JSON), computed once at ingestion
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS chart_data (
+                    document_id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            self._migrate_legacy(conn)
+
+            conn.commit()
+            self._invalidate()
+            self._shared.schema_ready = True
+
+    @staticmethod
+    def _migrate_legacy(conn: sqlite3.Connection):
+        """
+        Copies rows of the legacy single-IPO `financials` table (one row per metric) into
+        the new schema under LEGACY_DOCUMENT_ID, then renames the table to `financials_legacy`
+        so the original data is kept but not migrated again.
+        """
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "financials" not in tables:
+            return
+        conn.execute('''
+            INSERT OR IGNORE INTO financial_metrics (document_id, metric, period, unit, value)
+            SELECT ?, metric_name, COALESCE(period, 'Latest Year'), COALESCE(unit, 'Crores'), value
+            FROM financials WHERE value IS NOT NULL
+        ''', (LEGACY_DOCUMENT_ID,))
+        if "financials_legacy" not in tables:
+            conn.execute("ALTER TABLE financials RENAME TO financials_legacy")
+
+    def register_document(self, document_id: str, name: str = None):
+        """
+        Records (or refreshes) a document in the `documents` table.
+        """
+        with self._shared.lock:
+            self._shared.conn.execute('''
+                INSERT INTO documents (document_id, name) VALUES (?, ?)
+                ON CONFLICT(document_id) DO UPDATE SET
+                    name = COALESCE(excluded.name, documents.name),
+                    ingested_at = CURRENT_TIMESTAMP
+            ''', (document_id, name))
+            self._shared.conn.commit()
+            self._invalidate()
 
-    def store_metrics(self, metrics: Dict[str, Any]):
+    def store_metrics(self, metrics: Dict[str, Any], document_id=None, period="Latest Year",
+                      basis="Consolidated", unit="Crores"):
         """
         Stores the extracted dictionary of metrics into the DB.
         metrics: {'revenue': 100.5, 'pat': 10.2, ...}
+        All values share one period/basis/unit; use store_records() for multi-period data.
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for key, value in metrics.items():
-            if value is not None:
-                try:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO financials (metric_name, value)
-                        VALUES (?, ?)
-                    ''', (key, value))
-                except sqlite3.Error as e:
-                    print(f"⚠️ DB Error inserting {key}: {e}")
-
-        conn.commit()
-        conn.close()
+        document_id = self._scope(document_id)
+        self.store_records(
+            {"document_id": document_id, "metric": key, "period": period, "basis": basis, "unit": unit, "value": value}
+            for key, value in metrics.items() if value is not None
+        )
         print(f"✅ Stored {len(metrics)} financial metrics in SQLite.")
 
-    def get_metric(self, metric_name: str) -> float:
+    def store_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Bulk upsert of metric records, in one executemany and one transaction.
+        Each record: {"document_id", "metric", "period", "value"} plus optional
+        "basis", "unit", "period_end" (ISO date, used to order time series) and "source_page".
+        Returns the number of rows written.
+        """
+        rows = [
+            (
+                r.get("document_id") or self._scope(None), r["metric"], r["period"], r.get("period_end"),
+                r.get("basis") or "Consolidated", r.get("unit") or "Crores", r["value"], r.get("source_page"),
+            )
+            for r in records
+        ]
+        if not rows:
+            return 0
+
+        with self._shared.lock:
+            try:
+                self._shared.conn.executemany('''
+                    INSERT INTO financial_metrics (document_id, metric, period, period_end, basis, unit, value, source_page)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(document_id, metric, period, basis, unit) DO UPDATE SET
+                        value = excluded.value,
+                        period_end = COALESCE(excluded.period_end, financial_metrics.period_end),
+                        source_page = COALESCE(excluded.source_page, financial_metrics.source_page)
+                ''', rows)
+                self._shared.conn.commit()
+            except sqlite3.Error as e:
+                self._shared.conn.rollback()
+                print(f"⚠️ DB Error inserting metrics: {e}")
+                return 0
+            finally:
+                self._invalidate()
+        return len(rows)
+
+    def get_metric(self, metric_name: str, document_id=None, period=None) -> float:
         """
-        Retrieve a specific metric value.
+        Retrieve a specific metric value (latest period unless `period` is given).
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT value FROM financials WHERE metric_name = ?", (metric_name,))
-        row = cursor.fetchone()
-        
-        conn.close()
-        return row[0] if row else None
+        if period:
+            rows = self._cached_query(
+                "SELECT value FROM financial_metrics WHERE document_id = ? AND metric = ? AND period = ? ORDER BY id DESC LIMIT 1",
+                (self._scope(document_id), metric_name, period)
+            )
+            return rows[0][0] if rows else None
+        return self.get_all_metrics(document_id).get(metric_name)
 
-    def get_all_metrics(self) -> Dict[str, float]:
+    def get_all_metrics(self, document_id=None) -> Dict[str, float]:
         """
-        Retrieve all metrics as a dictionary.
+        Retrieve all metrics of a document as a dictionary, using each metric's latest period (Consolidated figures preferred).
         """
-        conn = sqlite3.connect(self.db_path)
-        df = pd.read_sql_query("SELECT metric_name, value FROM financials", conn)
-        conn.close()
-        
-        return dict(zip(df.metric_name, df.value))
+        rows = self._cached_query('''
+            SELECT metric, value FROM (
+                SELECT metric, value, ROW_NUMBER() OVER (
+                    PARTITION BY metric ORDER BY period_end IS NULL, period_end DESC, basis != 'Consolidated', id DESC
+                ) AS rn
+                FROM financial_metrics WHERE document_id = ?
+            ) WHERE rn = 1
+        ''', (self._scope(document_id),))
+        return dict(rows)
+
+    def get_time_series(self, metric: str, document_id=None, basis=None, dated_only=True) -> List[Tuple[str, float]]:
+        """
+        [(period, value), ...] for one metric of one document, oldest period first.
+        Only periods with an end date (i.e. from financial tables) unless `dated_only` is False:
+        the regex extractor's single "Latest Year" value has no date and an assumed unit.
+        """
+        sql = "SELECT period, value FROM financial_metrics WHERE document_id = ? AND metric = ?"
+        params = [self._scope(document_id), metric]
+        if dated_only:
+            sql += " AND period_end IS NOT NULL"
+        if basis:
+            sql += " AND basis = ?"
+            params.append(basis)
+        sql += " ORDER BY period_end IS NULL, period_end, id"
+        return self._cached_query(sql, tuple(params))
+
+    def get_records(self, document_id=None, metrics: List[str] = None, dated_only=False) -> List[Dict[str, Any]]:
+        """
+        Full rows for one document ({"metric", "period", "period_end", "basis", "unit",
+        "value", "source_page"}), oldest period first. `dated_only` skips rows without a
+        period end date (e.g. the single "Latest Year" values from the regex extractor).
+        """
+        sql = "SELECT metric, period, period_end, basis, unit, value, source_page FROM financial_metrics WHERE document_id = ?"
+        params = [self._scope(document_id)]
+        if metrics:
+            sql += f" AND metric IN ({', '.join('?' * len(metrics))})"
+            params.extend(metrics)
+        if dated_only:
+            sql += " AND period_end IS NOT NULL"
+        sql += " ORDER BY period_end IS NULL, period_end, id"
+        columns = ("metric", "period", "period_end", "basis", "unit", "value", "source_page")
+        return [dict(zip(columns, row)) for row in self._cached_query(sql, tuple(params))]
+
+    def store_chart_data(self, payload: Dict[str, Any], source: str, document_id=None):
+        """
+        Saves a document's (already validated) trend dataset.
+        `source` records how it was produced: "tables" or "llm".
+        """
+        with self._shared.lock:
+            self._shared.conn.execute('''
+                INSERT INTO chart_data (document_id, payload, source) VALUES (?, ?, ?)
+                ON CONFLICT(document_id) DO UPDATE SET
+                    payload = excluded.payload, source = excluded.source, created_at = CURRENT_TIMESTAMP
+            ''', (self._scope(document_id), json.dumps(payload), source))
+            self._shared.conn.commit()
+            self._invalidate()
+
+    def get_chart_data(self, document_id=None) -> Dict[str, Any]:
+        """
+        The stored trend dataset (with its "source" added), or None.
+        """
+        rows = self._cached_query("SELECT payload, source FROM chart_data WHERE document_id = ?", (self._scope(document_id),))
+        if not rows:
+            return None
+        return dict(json.loads(rows[0][0]), source=rows[0][1])
+
+    def compare_documents(self, metric: str, document_ids: List[str] = None, period=None, dated_only=True) -> Dict[str, float]:
+        """
+        {document_id: value} for one metric across documents
+        (a specific period, or each document's latest one).
+        As in get_time_series(), undated regex-extractor values are left out unless `dated_only` is False,
+        so documents are only compared on figures read from their tables.
+        """
+        dated = " AND period_end IS NOT NULL" if dated_only else ""
+        if period:
+            sql = f"SELECT document_id, value FROM financial_metrics WHERE metric = ? AND period = ?{dated}"
+            params = [metric, period]
+        else:
+            sql = f'''
+                SELECT document_id, value FROM (
+                    SELECT document_id, value, ROW_NUMBER() OVER (
+                        PARTITION BY document_id ORDER BY period_end IS NULL, period_end DESC, basis != 'Consolidated', id DESC
+                    ) AS rn
+                    FROM financial_metrics WHERE metric = ?{dated}
+                ) WHERE rn = 1
+            '''
+            params = [metric]
+        rows = self._cached_query(sql, tuple(params))
+        if document_ids is not None:
+            wanted = set(document_ids)
+            rows = [row for row in rows if row[0] in wanted]
+        return dict(rows)
+
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """
+        Every registered document, most recently ingested first.
+        """
+        rows = self._cached_query("SELECT document_id, name, ingested_at FROM documents ORDER BY ingested_at DESC", ())
+        return [{"document_id": d, "name": n, "ingested_at": t} for d, n, t in rows]
+
+    def _scope(self, document_id):
+        return document_id or self.document_id or LEGACY_DOCUMENT_ID
+
+    def _cached_query(self, sql: str, params: tuple) -> list:
+        """
+        Read-through cache over the shared connection.
+        Cleared on our own writes, and when PRAGMA data_version shows that
+        another connection (e.g. an ingestion worker process) has committed.
+        """
+        with self._shared.lock:
+            data_version = self._shared.conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._shared.data_version:
+                self._shared.cache.clear()
+                self._shared.data_version = data_version
+
+            key = (sql, params)
+            if key not in self._shared.cache:
+                self._shared.cache[key] = self._shared.conn.execute(sql, params).fetchall()
+            return list(self._shared.cache[key])
+
+    def _invalidate(self):
+        self._shared.cache.clear()
 
 if __name__ == "__main__":
     # Test stub
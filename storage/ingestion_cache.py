@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+# Ingestion stages, in dependency order
+STAGES = ("parse", "chunk", "extract", "index")
+# Stage -> the stage whose output it consumes (re-running an input re-runs its consumers)
+STAGE_INPUTS = {"parse": None, "chunk": "parse", "extract": "chunk", "index": "chunk"}
+# Files each stage writes inside the job directory
+STAGE_OUTPUTS = {
+    "parse": ["pages.jsonl"],
+    "chunk": ["chunks.jsonl"],
+    "extract": ["tables.jsonl", "financials.json"],
+    "index": ["embeddings.npy"],
+}
+# Bump when a stage's code changes its output, so old checkpoints are redone
+STAGE_VERSIONS = {"parse": 1, "chunk": 1, "extract": 2, "index": 1}
+
+class IngestionCache:
+    def __init__(self, cache_dir="ingestion_cache"):
+        """
+        Content-addressed store for ingestion results.
+        One job directory per document (see IngestionJob) holding the parsed pages,
+        chunks, extracted financials and chunk embeddings, with a manifest that
+        checkpoints every stage so interrupted runs resume instead of restarting.
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def hash_file(pdf_path: str) -> str:
+        """
+        SHA-256 of the PDF bytes (hex).
+        """
+        digest = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(pdf_sha256: str, chunk_size: int, chunk_overlap: int, model_name: str, chunk_mode: str = "page") -> str:
+        """
+        SHA-256 over the PDF hash plus every setting that changes the output.
+        The same RHP ingested with a different chunker or embedding model gets a new key.
+        """
+        settings = f"{pdf_sha256}|chunk_size={chunk_size}|chunk_overlap={chunk_overlap}|model={model_name}"
+        # Only non-default modes are spelled out, so existing keys stay valid
+        if chunk_mode != "page":
+            settings += f"|chunk_mode={chunk_mode}"
+        return hashlib.sha256(settings.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def stage_fingerprints(pdf_sha256: str, chunk_size: int, chunk_overlap: int, model_name: str, chunk_mode: str = "page") -> Dict[str, str]:
+        """
+        One fingerprint per stage covering only the inputs and settings that stage
+        depends on, so e.g. a new embedding model invalidates "index" but not "parse".
+        The "layout" chunk mode also changes "parse" (pages then carry their text blocks).
+        """
+        def digest(text: str) -> str:
+            return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+        layout = "|layout" if chunk_mode == "layout" else ""
+        mode = f"|mode={chunk_mode}" if chunk_mode != "page" else ""
+        parse = digest(f"{pdf_sha256}|parse-v{STAGE_VERSIONS['parse']}{layout}")
+        chunk = digest(f"{parse}|chunk-v{STAGE_VERSIONS['chunk']}|chunk_size={chunk_size}|chunk_overlap={chunk_overlap}{mode}")
+        return {
+            "parse": parse,
+            "chunk": chunk,
+            "extract": digest(f"{chunk}|extract-v{STAGE_VERSIONS['extract']}"),
+            "index": digest(f"{chunk}|index-v{STAGE_VERSIONS['index']}|model={model_name}"),
+        }
+
+    def open_job(self, doc_id: str) -> "IngestionJob":
+        return IngestionJob(os.path.join(self.cache_dir, doc_id), doc_id)
+
+class IngestionJob:
+    def __init__(self, job_dir: str, doc_id: str):
+        """
+        Checkpointed ingestion state of one document.
+        manifest.json records, per stage, its fingerprint, status
+        ("pending" / "running" / "done") and progress counters; the stage outputs
+        are append-only JSONL files, so progress survives a crash and a resumed
+        run continues from the last checkpoint.
+        """
+        self.dir = job_dir
+        self.doc_id = doc_id
+        os.makedirs(self.dir, exist_ok=True)
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"doc_id": doc_id, "stages": {}}
+        for stage in STAGES:
+            self.manifest["stages"].setdefault(stage, self._new_stage(None))
+
+    def prepare(self, fingerprints: Dict[str, str], rerun: Iterable[str] = ()) -> List[str]:
+        """
+        Resets every stage whose fingerprint changed, that is listed in `rerun`,
+        or whose input stage was reset; then trims output files back to the last
+        checkpoint (a crash can leave lines that were written but not checkpointed).
+        Returns the stages that were reset.
+        """
+        rerun = set(rerun)
+        unknown = rerun - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown ingestion stage(s) {sorted(unknown)}; expected {STAGES}")
+
+        reset = []
+        for stage in STAGES:
+            state = self.stage(stage)
+            if stage in rerun or state["fingerprint"] != fingerprints[stage] or STAGE_INPUTS[stage] in reset:
+                self._reset(stage, fingerprints[stage])
+                reset.append(stage)
+
+        self._truncate_jsonl("pages.jsonl", self.stage("parse")["progress"])
+        self._truncate_jsonl("chunks.jsonl", self.stage("chunk").get("chunks", 0))
+        self._truncate_jsonl("tables.jsonl", self.stage("extract").get("tables", 0))
+        self.save()
+        return reset
+
+    def stage(self, name: str) -> Dict[str, Any]:
+        return self.manifest["stages"][name]
+
+    def is_done(self, name: str) -> bool:
+        return self.stage(name)["status"] == "done"
+
+    @property
+    def complete(self) -> bool:
+        return all(self.is_done(stage) for stage in STAGES)
+
+    def checkpoint(self, name: str, **fields):
+        """
+        Records progress of a running stage. Call only after the matching output has been flushed.
+        """
+        self.stage(name).update(fields, status="running", updated_at=time.time())
+        self.save()
+
+    def mark_done(self, name: str, **fields):
+        self.stage(name).update(fields, status="done", updated_at=time.time())
+        self.save()
+
+    def save(self):
+        # Write-then-rename so a crash never leaves a half-written manifest
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        {stage: {"status", "progress", "total"}} for progress reporting.
+        """
+        return {
+            stage: {key: self.stage(stage).get(key) for key in ("status", "progress", "total")}
+            for stage in STAGES
+        }
+
+    def appender(self, name: str):
+        """
+        Append-mode handle on an output JSONL file (write, flush, then checkpoint).
+        """
+        return open(self._path(name), "a", encoding="utf-8")
+
+    def read_jsonl(self, name: str, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streams records [start, stop) of an output JSONL file.
+        """
+        path = self._path(name)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f):
+                if stop is not None and line_number >= stop:
+                    break
+                if line_number >= start and line.strip():
+                    yield json.loads(line)
+
+    def write_json(self, name: str, data: Any):
+        tmp_path = f"{self._path(name)}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._path(name))
+
+    def read_json(self, name: str) -> Any:
+        with open(self._path(name), encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_embeddings(self, embeddings: List[List[float]]):
+        np.save(self._path("embeddings.npy"), np.asarray(embeddings, dtype=np.float32))
+
+    def load_embeddings(self) -> np.ndarray:
+        return np.load(self._path("embeddings.npy"))
+
+    def _reset(self, stage: str, fingerprint: str):
+        for name in STAGE_OUTPUTS[stage]:
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+        self.manifest["stages"][stage] = self._new_stage(fingerprint)
+
+    def _truncate_jsonl(self, name: str, lines: int):
+        """
+        Cuts an output file back to its first `lines` complete lines.
+        """
+        path = self._path(name)
+        if not os.path.exists(path):
+            return
+        size = 0
+        with open(path, "rb") as f:
+            for _ in range(lines):
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                size += len(line)
+        if os.path.getsize(path) != size:
+            os.truncate(path, size)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    @staticmethod
+    def _new_stage(fingerprint: Optional[str]) -> Dict[str, Any]:
+        return {"status": "pending", "fingerprint": fingerprint, "progress": 0, "total": None, "updated_at": None}
+
+if __name__ == "__main__":
+    # Test stub
+    pass
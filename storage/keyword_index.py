@@ -0,0 +1,149 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import List, Dict, Any, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+class BM25Index:
+    def __init__(self, index_path: str, k1=1.5, b=0.75):
+        """
+        Local inverted index with Okapi BM25 scoring, persisted as JSON next to
+        the Chroma collection it mirrors. Good at exact terms ("Total Borrowings",
+        "EPS", case numbers) where MiniLM embeddings are weak, and needs no embedding.
+        """
+        self.index_path = index_path
+        self.k1 = k1
+        self.b = b
+
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_sections: Dict[str, str] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.total_length = 0
+        self._loaded = False
+        # Modification time of the file we last read or wrote, to pick up saves made elsewhere
+        self._mtime = None
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Indexes documents. Call save() to persist.
+        IDs are content hashes (see make_chunk_id), so an ID already present is skipped.
+        """
+        self._load()
+        for doc_id, text, meta in zip(ids, texts, metadatas):
+            if doc_id in self.doc_lengths:
+                continue
+
+            term_counts = Counter(tokenize(text))
+            for term, count in term_counts.items():
+                self.postings.setdefault(term, {})[doc_id] = count
+
+            length = sum(term_counts.values())
+            self.doc_lengths[doc_id] = length
+            self.doc_sections[doc_id] = meta.get("section", "Unknown")
+            self.total_length += length
+
+    def ids(self) -> List[str]:
+        self._load()
+        return list(self.doc_lengths)
+
+    def remove(self, ids: List[str]):
+        """
+        Drops documents from the index. Call save() to persist.
+        """
+        self._load()
+        removed = {doc_id for doc_id in ids if doc_id in self.doc_lengths}
+        if not removed:
+            return
+        for doc_id in removed:
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            self.doc_sections.pop(doc_id, None)
+        for term in list(self.postings):
+            docs = self.postings[term]
+            for doc_id in removed.intersection(docs):
+                del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+
+    def search(self, query_text: str, n_results=5, section_filter=None) -> List[Tuple[str, float]]:
+        """
+        Returns up to `n_results` (id, score) pairs, best first.
+        """
+        self._load()
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return []
+
+        avg_length = self.total_length / n_docs
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query_text)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                if section_filter and self.doc_sections.get(doc_id) != section_filter:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+
+    def clear(self):
+        self.doc_lengths = {}
+        self.doc_sections = {}
+        self.postings = {}
+        self.total_length = 0
+        self._loaded = True
+        self._mtime = None
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+
+    def save(self):
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "doc_lengths": self.doc_lengths,
+                "doc_sections": self.doc_sections,
+                "postings": self.postings,
+            }, f)
+        os.replace(tmp_path, self.index_path)
+        self._mtime = os.stat(self.index_path).st_mtime_ns
+
+    def __len__(self):
+        self._load()
+        return len(self.doc_lengths)
+
+    def _load(self):
+        """
+        Reads the index file on first use, and again whenever another store
+        (e.g. a re-ingestion of the document) has saved a newer one.
+        """
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._loaded and (mtime is None or mtime == self._mtime):
+            return
+        self._loaded = True
+        if mtime is None:
+            return
+        with open(self.index_path, encoding="utf-8") as f:
+            data = json.load(f)
+        self._mtime = mtime
+        self.doc_lengths = data["doc_lengths"]
+        self.doc_sections = data["doc_sections"]
+        self.postings = data["postings"]
+        self.total_length = sum(self.doc_lengths.values())
+
+if __name__ == "__main__":
+    # Test stub
+    pass
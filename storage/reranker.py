@@ -0,0 +1,150 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.telemetry import TELEMETRY, traced
+
+# Per-intent settings: candidates over-fetched from the vector store and the
+# re-ranking latency budget. Intents not listed keep plain vector retrieval.
+RERANK_SETTINGS = {
+    "FINANCIAL": {"fetch_k": 30, "latency_budget_ms": 400},
+    "RISK": {"fetch_k": 30, "latency_budget_ms": 400},
+    "BUSINESS": {"fetch_k": 30, "latency_budget_ms": 400},
+    "SUMMARY": {"fetch_k": 15, "latency_budget_ms": 300},
+}
+DEFAULT_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+class CrossEncoderReranker:
+    # Process-wide re-rankers handed out by shared(), one per model
+    _shared: Dict[str, "CrossEncoderReranker"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, model_name=DEFAULT_MODEL, settings: Dict[str, Dict[str, Any]] = None,
+                 batch_size=16, max_cache_entries=20_000, device="cpu"):
+        """
+        Second retrieval stage: over-fetches candidates from the vector store and
+        re-orders them with a small local cross-encoder (query and chunk scored together).
+        - settings: per-intent {"fetch_k", "latency_budget_ms"} merged over RERANK_SETTINGS;
+          an intent mapped to None is not re-ranked.
+        - batch_size: (query, chunk) pairs per forward pass.
+        - max_cache_entries: scores kept in memory (LRU), keyed by model, query and chunk text.
+        If the model can't be loaded (not installed, offline without cached files),
+        every call falls back to vector order.
+        """
+        self.model_name = model_name
+        self.settings = dict(RERANK_SETTINGS, **(settings or {}))
+        self.batch_size = batch_size
+        self.max_cache_entries = max_cache_entries
+        self._scores: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Seconds per scored batch (moving average), to skip a batch that can't finish in budget
+        self._batch_seconds = None
+
+        try:
+            from sentence_transformers import CrossEncoder
+            self.model = CrossEncoder(model_name, device=device)
+        except Exception as e:  # ImportError, offline without cached files, ...
+            print(f"⚠️ Re-ranker unavailable ({type(e).__name__}: {e}); using vector order")
+            self.model = None
+
+    @classmethod
+    def shared(cls, model_name=DEFAULT_MODEL) -> "CrossEncoderReranker":
+        """
+        The process-wide re-ranker for `model_name` (default settings), loaded on first use.
+        """
+        with cls._shared_lock:
+            if model_name not in cls._shared:
+                cls._shared[model_name] = cls(model_name=model_name)
+            return cls._shared[model_name]
+
+    def retrieve(self, vector_store, query: str, intent: str, n_results=5, section_filter=None, mode=None) -> List[Dict[str, Any]]:
+        """
+        Drop-in for vector_store.query(): the top `n_results` of `fetch_k` candidates
+        after re-ranking, or the store's own results if `intent` isn't configured.
+        `mode` is passed on to vector_store.query().
+        """
+        settings = self.settings.get(intent)
+        if not settings or self.model is None:
+            return vector_store.query(query, n_results=n_results, section_filter=section_filter, mode=mode)
+        candidates = vector_store.query(query, n_results=max(settings["fetch_k"], n_results), section_filter=section_filter, mode=mode)
+        return self.rerank(query, candidates, n_results, settings["latency_budget_ms"])
+
+    @traced("rerank")
+    def rerank(self, query: str, candidates: List[Dict[str, Any]], top_k=5, latency_budget_ms=None) -> List[Dict[str, Any]]:
+        """
+        Orders `candidates` (vector-store results) by cross-encoder score and keeps `top_k`.
+        Cached scores are reused; the rest are scored in batches, best vector rank first.
+        The first batch is always scored; a later one only if the moving average says it
+        fits in what is left of the budget. If the budget runs out before every candidate
+        has a score, the vector order is kept (the scores computed so far are still cached
+        for the next call).
+        """
+        start = time.perf_counter()
+        span = TELEMETRY.current_span()
+        keys = [self._key(query, c["text"]) for c in candidates]
+        scores = self._cached(keys)
+        cached = sum(score is not None for score in scores)
+        pending = [i for i, score in enumerate(scores) if score is None]
+
+        for offset in range(0, len(pending), self.batch_size):
+            elapsed = time.perf_counter() - start
+            # Never skip the first batch: a single slow batch would otherwise stop every later call
+            # from scoring anything, and the moving average would never come back down
+            if offset and latency_budget_ms is not None and (elapsed + (self._batch_seconds or 0)) * 1000 > latency_budget_ms:
+                break
+            batch = pending[offset:offset + self.batch_size]
+            batch_start = time.perf_counter()
+            predicted = self.model.predict([(query, candidates[i]["text"]) for i in batch],
+                                           batch_size=self.batch_size, show_progress_bar=False)
+            batch_seconds = time.perf_counter() - batch_start
+            self._batch_seconds = batch_seconds if self._batch_seconds is None else 0.7 * self._batch_seconds + 0.3 * batch_seconds
+            for i, score in zip(batch, np.asarray(predicted, dtype=np.float32).reshape(-1)):
+                scores[i] = float(score)
+            self._store([keys[i] for i in batch], [scores[i] for i in batch])
+
+        scored = sum(score is not None for score in scores)
+        fallback = scored < len(candidates)
+        span.set(candidates=len(candidates), cached=cached, scored=scored - cached, top_k=top_k, fallback=fallback)
+        if fallback:
+            TELEMETRY.counter("rerank_fallbacks_total")
+            print(f"⏱️ Re-rank budget ({latency_budget_ms} ms) exceeded after {scored}/{len(candidates)} candidates; using vector order")
+            return candidates[:top_k]
+
+        order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)[:top_k]
+        return [dict(candidates[i], rerank_score=scores[i]) for i in order]
+
+    def clear(self):
+        """
+        Drops all cached scores.
+        """
+        with self._lock:
+            self._scores.clear()
+
+    def _cached(self, keys: List[str]) -> List[Optional[float]]:
+        with self._lock:
+            scores = []
+            for key in keys:
+                score = self._scores.get(key)
+                if score is not None:
+                    self._scores.move_to_end(key)
+                scores.append(score)
+            return scores
+
+    def _store(self, keys: List[str], scores: List[float]):
+        with self._lock:
+            for key, score in zip(keys, scores):
+                self._scores[key] = score
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_cache_entries:
+                self._scores.popitem(last=False)
+
+    def _key(self, query: str, text: str) -> str:
+        normalized_query = " ".join(query.lower().split())
+        return hashlib.sha256(f"{self.model_name}|{normalized_query}|{text}".encode("utf-8")).hexdigest()
+
+if __name__ == "__main__":
+    pass
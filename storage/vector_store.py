@@ -1,65 +1,335 @@
-import chromadb
-from chromadb.utils import embedding_functions
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Callable, Optional
+import hashlib
 import os
+import threading
+import time
+
+import numpy as np
+
+from storage.embedding_engine import EmbeddingEngine
+from storage.embedding_cache import EmbeddingCache
+from storage.keyword_index import BM25Index, tokenize
+from utils.telemetry import TELEMETRY, traced
+
+SEARCH_MODES = ("vector", "keyword", "hybrid", "auto")
+
+# Words that mark a natural-language question rather than a keyword lookup
+QUESTION_WORDS = {"what", "why", "how", "who", "when", "where", "which", "is", "are", "the", "of", "a", "an", "does", "do", "explain", "tell", "me"}
+
+# Process-wide Chroma clients, one per persist_dir (see get_chroma_client)
+_CLIENTS: Dict[str, Any] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def get_chroma_client(persist_dir="chroma_db"):
+    """
+    The process-wide Chroma PersistentClient for `persist_dir`, created on first use.
+    chromadb is imported here rather than at module load: it takes most of a second.
+    """
+    key = os.path.abspath(persist_dir)
+    with _CLIENTS_LOCK:
+        if key not in _CLIENTS:
+            import chromadb
+            _CLIENTS[key] = chromadb.PersistentClient(path=persist_dir)
+        return _CLIENTS[key]
+
+def reopen_chroma_client(persist_dir="chroma_db"):
+    """
+    Replaces the process-wide client for `persist_dir` with a freshly opened one.
+    A PersistentClient keeps each collection's vector index in memory and does not see
+    writes made by other processes (the ingestion worker): after a document is indexed
+    elsewhere, its open collections keep returning the old contents. Stores created after
+    this call read the current data; stores still holding the old client are left working
+    as they were, so drop them (e.g. rebuild the IPOCrew) to pick up the new data.
+    """
+    key = os.path.abspath(persist_dir)
+    with _CLIENTS_LOCK:
+        if key in _CLIENTS:
+            from chromadb.api.client import SharedSystemClient
+            # chromadb hands every client of a path the same cached System; forget it so the
+            # next client opens a new one (the old System lives on with the clients using it)
+            SharedSystemClient.clear_system_cache()
+            del _CLIENTS[key]
+    return get_chroma_client(persist_dir)
+
+def make_chunk_id(doc_id: str, chunk: Dict[str, Any]) -> str:
+    """
+    Deterministic content-hash ID for a chunk.
+    Re-ingesting the same document produces the same IDs, so upserts are idempotent.
+    """
+    key = f"{doc_id}|{chunk.get('page', 0)}|{chunk.get('section', 'Unknown')}|{chunk['text']}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
 
 class IPOVectorStore:
-    def __init__(self, persist_dir="chroma_db"):
+    def __init__(self, persist_dir="chroma_db", model_name="all-MiniLM-L6-v2", doc_id=None, client=None, engine=None, embedding_cache=None,
+                 search_mode="vector", keyword_fast_path_max_terms=3, rrf_k=60):
+        """
+        Chroma wrapper scoped to one document.
+        Each document gets its own collection ("ipo_<doc_id>"), so queries never
+        scan (or return) chunks from other uploaded IPOs.
+        Without a doc_id the legacy shared "ipo_documents" collection is used.
+        A BM25 keyword index is kept alongside each collection; `search_mode`
+        picks the default retrieval path for query() (see SEARCH_MODES). The default,
+        "vector", is plain semantic search; callers opt into the others per query.
+        """
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"search_mode must be one of {SEARCH_MODES}, got {search_mode!r}")
         self.persist_dir = persist_dir
+        self.model_name = model_name
+        self.doc_id = doc_id
+        self.search_mode = search_mode
+        self.keyword_fast_path_max_terms = keyword_fast_path_max_terms
+        self.rrf_k = rrf_k
         
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(path=self.persist_dir)
+        # Initialize ChromaDB client (shared by every store in the process)
+        self.client = client or get_chroma_client(self.persist_dir)
         
         # Use Sentence Transformers for local, free embeddings
-        # This keeps the "Retail-Safe" design cost-effective and private
-        self.embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
-        )
+        # This keeps the "Retail-Safe" design cost-effective and private.
+        # Embeddings are computed by our own engine (batching / worker processes / precision
+        # are configurable there) and handed to Chroma precomputed.
+        # The model is loaded once per process (EmbeddingEngine.shared), not once per store.
+        self.engine = engine or EmbeddingEngine.shared(self.model_name)
+        # Identical text (boilerplate, the agents' fixed queries) is only ever encoded once
+        self.embedding_cache = embedding_cache or EmbeddingCache.shared()
         
+        self.collection_name = f"ipo_{doc_id}" if doc_id else "ipo_documents"
         self.collection = self.client.get_or_create_collection(
-            name="ipo_documents",
-            embedding_function=self.embedding_fn
+            name=self.collection_name,
+            embedding_function=None
+        )
+        self.keyword_index = BM25Index(os.path.join(self.persist_dir, "keyword_index", f"{self.collection_name}.json"))
+
+    def for_document(self, doc_id: str) -> "IPOVectorStore":
+        """
+        Returns a store scoped to `doc_id` that shares this store's client and embedding model.
+        """
+        return IPOVectorStore(
+            persist_dir=self.persist_dir,
+            model_name=self.model_name,
+            doc_id=doc_id,
+            client=self.client,
+            engine=self.engine,
+            embedding_cache=self.embedding_cache,
+            search_mode=self.search_mode,
+            keyword_fast_path_max_terms=self.keyword_fast_path_max_terms,
+            rrf_k=self.rrf_k
         )
 
-    def add_chunks(self, chunks: List[Dict[str, Any]]):
+    def reset(self):
+        """
+        Deletes every chunk of this document. The collection itself is kept, so
+        other stores (e.g. a crew answering questions) holding it stay valid.
+        """
+        self.prune([])
+
+    def prune(self, keep_ids: Iterable[str], batch_size=1000) -> int:
+        """
+        Deletes every chunk whose ID is not in `keep_ids`, from the collection and the
+        keyword index. A re-ingestion upserts its chunks (content-hash IDs, so unchanged
+        chunks are rewritten in place) and then prunes what the new chunk set no longer has.
+        Returns the number of chunks deleted.
+        """
+        keep = set(keep_ids)
+        stale = [chunk_id for chunk_id in self.collection.get(include=[])["ids"] if chunk_id not in keep]
+        for offset in range(0, len(stale), batch_size):
+            self.collection.delete(ids=stale[offset:offset + batch_size])
+        self.keyword_index.remove([chunk_id for chunk_id in self.keyword_index.ids() if chunk_id not in keep])
+        self.keyword_index.save()
+        return len(stale)
+
+    def add_chunks(self, chunks: Iterable[Dict[str, Any]], batch_size=256, embeddings=None,
+                   on_batch: Optional[Callable[[int], None]] = None) -> List[str]:
         """
         Adds parsed chunks to the Vector DB.
+        Accepts a list or any iterable (e.g. IPOChunker.iter_chunks()), and
+        embeds/upserts in batches of `batch_size` while the stream is still
+        being produced, so peak memory stays bounded by one batch.
+        If `embeddings` (aligned with `chunks`) is given, they are stored as-is
+        and nothing is re-encoded.
+        `on_batch` is called with the number of input chunks stored so far after
+        every batch (e.g. to checkpoint a resumable ingestion).
+        Returns the IDs of the indexed chunks, aligned with the input.
         """
-        if not chunks:
-            return
-            
-        ids = [f"id_{i}" for i in range(len(chunks))]
-        documents = [c['text'] for c in chunks]
-        
+        start = time.perf_counter()
+        encoded_before = self.engine.total_texts
+        indexed_ids = []
+        batch = []
+        batch_embeddings = []
+        items = zip(chunks, embeddings) if embeddings is not None else ((c, None) for c in chunks)
+        for chunk, embedding in items:
+            batch.append(chunk)
+            batch_embeddings.append(embedding)
+            if len(batch) >= batch_size:
+                indexed_ids.extend(self._upsert_batch(batch, batch_embeddings))
+                batch = []
+                batch_embeddings = []
+                if on_batch:
+                    on_batch(len(indexed_ids))
+
+        if batch:
+            indexed_ids.extend(self._upsert_batch(batch, batch_embeddings))
+            if on_batch:
+                on_batch(len(indexed_ids))
+
+        if indexed_ids:
+            self.keyword_index.save()
+            elapsed = time.perf_counter() - start
+            print(f"✅ Indexed {len(indexed_ids)} chunks into ChromaDB collection '{self.collection_name}' at {self.persist_dir} "
+                  f"({len(indexed_ids) / elapsed:.1f} chunks/sec end-to-end, "
+                  f"{self.engine.total_texts - encoded_before} encoded, {self.engine.chunks_per_sec:.1f} chunks/sec encoder)")
+        return indexed_ids
+
+    def _upsert_batch(self, chunks: List[Dict[str, Any]], embeddings: List[Any]) -> List[str]:
+        """
+        Embeds and upserts one batch of chunks.
+        Returns one ID per input chunk (identical chunks share an ID).
+        """
+        ids = [make_chunk_id(self.doc_id or "", c) for c in chunks]
+
+        # Chroma rejects duplicate IDs within one call; identical chunks are stored once
+        seen = set()
+        unique = []
+        for chunk_id, c, e in zip(ids, chunks, embeddings):
+            if chunk_id not in seen:
+                seen.add(chunk_id)
+                unique.append((chunk_id, c, e))
+
+        documents = [c['text'] for _, c, _ in unique]
+        metadatas = [self._metadata(c) for _, c, _ in unique]
+
+        args = {
+            "documents": documents,
+            "metadatas": metadatas,
+            "ids": [chunk_id for chunk_id, _, _ in unique]
+        }
+        if all(e is not None for _, _, e in unique):
+            vectors = [list(map(float, e)) for _, _, e in unique]
+        else:
+            vectors = self._embed(documents).tolist()
+        args["embeddings"] = vectors
+
+        self.collection.upsert(**args)
+        self.keyword_index.add(args["ids"], documents, metadatas)
+        return ids
+
+    def add_keywords(self, chunks: Iterable[Dict[str, Any]]):
+        """
+        Adds chunks to the keyword index only (no embedding, no Chroma write).
+        Used when resuming an ingestion whose earlier batches are already in Chroma
+        but whose keyword index was not saved before the interruption.
+        """
+        chunks = list(chunks)
+        ids = [make_chunk_id(self.doc_id or "", c) for c in chunks]
+        self.keyword_index.add(ids, [c['text'] for c in chunks], [self._metadata(c) for c in chunks])
+        self.keyword_index.save()
+
+    def _metadata(self, chunk: Dict[str, Any]) -> Dict[str, Any]:
         # Prepare metadata: Ensure all values are strings or numbers (flat dict)
-        metadatas = []
-        for c in chunks:
-            meta = {
-                "section": c.get("section", "Unknown"),
-                "page": str(c.get("page", 0)),
-                "source": c.get("source", "RHP")
-            }
-            metadatas.append(meta)
-
-        self.collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
-        print(f"✅ Indexed {len(chunks)} chunks into ChromaDB at {self.persist_dir}")
+        metadata = {
+            "section": chunk.get("section", "Unknown"),
+            "page": str(chunk.get("page", 0)),
+            "source": chunk.get("source", "RHP"),
+            "doc_id": self.doc_id or ""
+        }
+        # Layout chunks (IPOChunker(mode="layout")) also carry a page range and content type
+        if "page_end" in chunk:
+            metadata["page_end"] = str(chunk["page_end"])
+        if "content_type" in chunk:
+            metadata["content_type"] = chunk["content_type"]
+        return metadata
 
-    def query(self, query_text: str, n_results=5, section_filter=None) -> List[Dict[str, Any]]:
+    def embed(self, texts: List[str]) -> np.ndarray:
         """
-        Semantic search for the query text.
+        Public access to the cached query/chunk encoder (e.g. for the intent classifier).
+        """
+        return self._embed(texts)
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Returns float32 embeddings for `texts`, encoding only those not already in the embedding cache.
+        """
+        with TELEMETRY.span("embedding.embed", texts=len(texts)) as span:
+            cache_model = f"{self.engine.model_name}:{self.engine.precision}"
+            vectors = self.embedding_cache.get_many(cache_model, texts)
+
+            missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+            span.set(encoded=len(missing))
+            if missing:
+                encoded = self.engine.to_float(self.engine.encode(missing))
+                self.embedding_cache.put_many(cache_model, missing, encoded)
+                by_text = dict(zip(missing, encoded))
+                vectors = [v if v is not None else by_text[t] for t, v in zip(texts, vectors)]
+
+            TELEMETRY.counter("embedding_texts_total", len(texts) - len(missing), source="cache")
+            TELEMETRY.counter("embedding_texts_total", len(missing), source="model")
+            return np.vstack(vectors).astype(np.float32)
+
+    def get_embeddings(self, ids: List[str]) -> List[List[float]]:
+        """
+        Returns the stored embeddings for `ids`, in the same order.
+        """
+        if not ids:
+            return []
+        result = self.collection.get(ids=ids, include=["embeddings"])
+        by_id = dict(zip(result["ids"], result["embeddings"]))
+        return [by_id[i] for i in ids]
+
+    @traced("vector_store.query")
+    def query(self, query_text: str, n_results=5, section_filter=None, mode=None) -> List[Dict[str, Any]]:
+        """
+        Searches this document for the query text.
         Optionally filter by section (e.g., only search "Risk Factors").
+        mode (defaults to self.search_mode):
+        - "vector": semantic search only.
+        - "keyword": BM25 only (no query embedding).
+        - "hybrid": both lists merged by reciprocal rank fusion.
+        - "auto": keyword fast path for short keyword queries ("EPS", "Total Borrowings")
+          that the keyword index can answer, hybrid otherwise.
+        """
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"mode must be one of {SEARCH_MODES}, got {mode!r}")
+        span = TELEMETRY.current_span()
+        span.set(mode=mode, section=section_filter, n_results=n_results)
+
+        if mode == "vector":
+            return self._vector_query(query_text, n_results, section_filter)
+
+        keyword_hits = self.keyword_index.search(query_text, n_results=max(n_results * 4, 20), section_filter=section_filter)
+        if mode == "keyword" or (mode == "auto" and self._is_keyword_query(query_text) and len(keyword_hits) >= n_results):
+            span.set(path="keyword")
+            return self._fetch([doc_id for doc_id, _ in keyword_hits[:n_results]])
+
+        # Hybrid: reciprocal rank fusion of the vector and keyword rankings
+        span.set(path="hybrid")
+        vector_results = self._vector_query(query_text, max(n_results * 4, 20), section_filter)
+        fused: Dict[str, float] = {}
+        for rank, res in enumerate(vector_results):
+            fused[res["id"]] = fused.get(res["id"], 0.0) + 1.0 / (self.rrf_k + rank + 1)
+        for rank, (doc_id, _) in enumerate(keyword_hits):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+        top_ids = sorted(fused, key=fused.get, reverse=True)[:n_results]
+
+        known = {res["id"]: res for res in vector_results}
+        fetched = {res["id"]: res for res in self._fetch([i for i in top_ids if i not in known])}
+        return [known.get(i) or fetched[i] for i in top_ids if i in known or i in fetched]
+
+    def _is_keyword_query(self, query_text: str) -> bool:
+        terms = tokenize(query_text)
+        return 0 < len(terms) <= self.keyword_fast_path_max_terms and not QUESTION_WORDS.intersection(terms)
+
+    def _vector_query(self, query_text: str, n_results: int, section_filter=None) -> List[Dict[str, Any]]:
+        """
+        Semantic search for the query text.
         """
         where_filter = {}
         if section_filter:
             where_filter = {"section": section_filter}
         
         # If section_filter is None, pass None to 'where'
+        query_embedding = self._embed([query_text])[0].tolist()
         args = {
-            "query_texts": [query_text],
+            "query_embeddings": [query_embedding],
             "n_results": n_results
         }
         if section_filter:
@@ -73,12 +343,26 @@ class IPOVectorStore:
             for i, doc in enumerate(results['documents'][0]):
                 meta = results['metadatas'][0][i]
                 structured_results.append({
+                    "id": results['ids'][0][i],
                     "text": doc,
                     "metadata": meta
                 })
                 
         return structured_results
 
+    def _fetch(self, ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Loads chunks by ID (in the given order) in the same shape query() returns.
+        """
+        if not ids:
+            return []
+        results = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        by_id = {
+            doc_id: {"id": doc_id, "text": doc, "metadata": meta}
+            for doc_id, doc, meta in zip(results["ids"], results["documents"], results["metadatas"])
+        }
+        return [by_id[i] for i in ids if i in by_id]
+
 if __name__ == "__main__":
     # Test stub
     pass
@@ -0,0 +1,60 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic_rhp import make_rhp
+
+class HashingEngine:
+    """
+    Deterministic bag-of-words encoder with EmbeddingEngine's interface, passed to
+    IPOVectorStore(engine=...) so tests don't need the sentence-transformers model.
+    """
+    model_name = "hashing-test"
+    precision = "float32"
+    chunks_per_sec = 0.0
+    dimension = 64
+
+    def __init__(self):
+        self.total_texts = 0
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[i, int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dimension] += 1.0
+        self.total_texts += len(texts)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def to_float(self, embeddings):
+        return np.asarray(embeddings, dtype=np.float32)
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # Stores default to paths relative to the working directory (chroma_db/, embedding_cache/, ...)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture(scope="session")
+def synthetic_pdf(tmp_path_factory):
+    """
+    A small synthetic RHP (see benchmarks/synthetic_rhp.py) with a financial table on every other page of its financial section.
+    """
+    return make_rhp(str(tmp_path_factory.mktemp("rhp") / "rhp.pdf"), pages=24, seed=1, table_every=2)
+
+@pytest.fixture
+def hashing_engine():
+    return HashingEngine()
+
+@pytest.fixture
+def vector_store(tmp_path, hashing_engine):
+    from storage.embedding_cache import EmbeddingCache
+    from storage.vector_store import IPOVectorStore
+
+    return IPOVectorStore(
+        persist_dir=str(tmp_path / "chroma_db"),
+        engine=hashing_engine,
+        embedding_cache=EmbeddingCache(str(tmp_path / "embedding_cache" / "embeddings.db")),
+    )
@@ -0,0 +1,41 @@
+import numpy as np
+
+from storage.answer_cache import SemanticAnswerCache
+
+QUERY = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+PARAPHRASE = np.array([0.98, 0.05, 0.0], dtype=np.float32)
+OTHER = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+
+def cached_answer(cache, doc_id, embedding, chunk_ids):
+    entry = cache.lookup(doc_id, embedding)
+    return cache.confirm(doc_id, entry, chunk_ids) if entry else None
+
+def test_paraphrase_with_same_chunks_hits():
+    cache = SemanticAnswerCache()
+    cache.store("doc", QUERY, "RISK", ["c1", "c2"], "answer")
+    assert cached_answer(cache, "doc", PARAPHRASE, ["c1", "c2"]) == "answer"
+    assert cached_answer(cache, "doc", OTHER, ["c1", "c2"]) is None
+
+def test_changed_chunks_miss():
+    cache = SemanticAnswerCache()
+    cache.store("doc", QUERY, "RISK", ["c1", "c2"], "answer")
+    assert cached_answer(cache, "doc", QUERY, ["c1", "c3"]) is None
+
+def test_entries_are_scoped_per_document():
+    cache = SemanticAnswerCache()
+    cache.store("doc", QUERY, "RISK", ["c1"], "answer")
+    assert cached_answer(cache, "other-doc", QUERY, ["c1"]) is None
+
+def test_invalidate_drops_the_documents_answers():
+    cache = SemanticAnswerCache()
+    cache.store("doc", QUERY, "RISK", ["c1"], "answer")
+    cache.store("other-doc", QUERY, "RISK", ["c1"], "other answer")
+    cache.invalidate("doc")
+    assert cache.lookup("doc", QUERY) is None
+    assert cached_answer(cache, "other-doc", QUERY, ["c1"]) == "other answer"
+
+def test_expired_entries_are_dropped():
+    cache = SemanticAnswerCache(ttl_seconds=0)
+    cache.store("doc", QUERY, "RISK", ["c1"], "answer")
+    cache._entries["doc"][0]["created_at"] -= 1
+    assert cache.lookup("doc", QUERY) is None
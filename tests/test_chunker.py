@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from ingestion.chunker import IPOChunker
+from ingestion.layout import page_units
+from ingestion.pdf_parser import IPOParser
+
+@pytest.fixture(scope="module")
+def layout_pages(synthetic_pdf):
+    return list(IPOParser(synthetic_pdf, layout=True).iter_pages())
+
+def test_table_rows_are_never_split(layout_pages):
+    chunks = list(IPOChunker(chunk_size=400, chunk_overlap=50, mode="layout").iter_chunks(layout_pages))
+    rows = [unit["text"] for page in layout_pages for unit in page_units(page["blocks"]) if unit["type"] == "table"]
+    assert rows
+    table_lines = {line for chunk in chunks if chunk["content_type"] == "table" for line in chunk["text"].split("\n")}
+    assert set(rows) <= table_lines
+
+def test_chunks_record_their_page_range(layout_pages):
+    chunks = list(IPOChunker(mode="layout").iter_chunks(layout_pages))
+    assert all(chunk["page"] <= chunk["page_end"] for chunk in chunks)
+    assert any(chunk["page"] < chunk["page_end"] for chunk in chunks)
+    assert {chunk["content_type"] for chunk in chunks} >= {"table", "prose"}
+    # Prose runs on across pages, never across sections
+    sections = {page["page"]: page["section"] for page in layout_pages}
+    for chunk in chunks:
+        assert {sections[p] for p in range(chunk["page"], chunk["page_end"] + 1)} == {chunk["section"]}
+
+def test_checkpointed_carry_resumes_to_the_same_chunks(layout_pages):
+    chunker = IPOChunker(mode="layout")
+    expected = list(chunker.iter_chunks(layout_pages))
+
+    chunks, carry = [], None
+    for page in layout_pages:
+        page_chunks, carry = chunker.chunk_page(page, carry)
+        chunks += page_chunks
+        # As the pipeline does: the carry is stored as JSON between pages
+        carry = json.loads(json.dumps(carry))
+    chunks += chunker.finish(carry)
+    assert chunks == expected
+
+def test_page_mode_never_crosses_pages(synthetic_pdf):
+    pages = list(IPOParser(synthetic_pdf).iter_pages())
+    chunks = list(IPOChunker(mode="page").iter_chunks(pages))
+    assert chunks
+    assert all("page_end" not in chunk for chunk in chunks)
+    assert {chunk["page"] for chunk in chunks} <= {page["page"] for page in pages}
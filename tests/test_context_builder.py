@@ -0,0 +1,38 @@
+from utils.context_builder import ContextBuilder, page_label
+
+OVERLAP = "The company expects working capital needs to rise."
+
+def chunk(chunk_id, text, page, page_end=None, section="RISK_FACTORS"):
+    metadata = {"page": str(page), "section": section}
+    if page_end is not None:
+        metadata["page_end"] = str(page_end)
+    return {"id": chunk_id, "text": text, "metadata": metadata}
+
+def test_page_label():
+    assert page_label({"page": "12"}) == "Page 12"
+    assert page_label({"page": "12", "page_end": "12"}) == "Page 12"
+    assert page_label({"page": "12", "page_end": "13"}) == "Page 12–13"
+
+def test_continuation_across_a_page_break_merges_with_the_full_range():
+    first = chunk("a", "Risks carry on over the page. " + OVERLAP, 4, 5)
+    second = chunk("b", OVERLAP + " Margins may fall as a result.", 5, 6)
+    merged = ContextBuilder().merge_adjacent([second, first])
+    assert len(merged) == 1
+    assert merged[0]["text"] == "Risks carry on over the page. " + OVERLAP + " Margins may fall as a result."
+    assert merged[0]["merged_ids"] == ["a", "b"]
+    assert page_label(merged[0]["metadata"]) == "Page 4–6"
+
+def test_chunks_without_a_shared_page_or_section_stay_apart():
+    first = chunk("a", "Risks carry on over the page. " + OVERLAP, 4, 5)
+    later = chunk("b", OVERLAP + " Margins may fall as a result.", 7)
+    other_section = chunk("c", OVERLAP + " Margins may fall as a result.", 5, section="BUSINESS_OVERVIEW")
+    assert len(ContextBuilder().merge_adjacent([first, later])) == 2
+    assert len(ContextBuilder().merge_adjacent([first, other_section])) == 2
+
+def test_page_chunks_merge_on_the_same_page_only():
+    first = chunk("a", "Risks on one page. " + OVERLAP, 4)
+    same_page = chunk("b", OVERLAP + " More on the same page.", 4)
+    merged = ContextBuilder().merge_adjacent([first, same_page])
+    assert len(merged) == 1
+    assert merged[0]["metadata"] == {"page": "4", "section": "RISK_FACTORS"}
+    assert len(ContextBuilder().merge_adjacent([first, chunk("c", same_page["text"], 5)])) == 2
@@ -0,0 +1,36 @@
+import numpy as np
+
+from storage.embedding_cache import EmbeddingCache
+
+def vectors(n):
+    return np.ones((n, 4), dtype=np.float32)
+
+def rows(cache):
+    return cache._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+def test_evicts_least_recently_used_past_capacity(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.db"), max_entries=20)
+    cache.put_many("m", ["kept"], vectors(1))
+    for batch in range(5):
+        texts = [f"text {batch} {i}" for i in range(5)]
+        cache.put_many("m", texts, vectors(5))
+        # Touching "kept" makes it the most recently used entry
+        assert cache.get_many("m", ["kept"])[0] is not None
+    assert rows(cache) <= 20
+    assert cache.get_many("m", ["text 0 0"]) == [None]
+
+def test_table_is_counted_only_near_capacity(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.db"), max_entries=100)
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+    for batch in range(30):
+        cache.put_many("m", [f"text {batch} {i}" for i in range(5)], vectors(5))
+    counts = [sql for sql in statements if "COUNT(*)" in sql]
+    # 150 rows into a cache of 100: one count when it first overflows, then one per 5% freed
+    assert 1 <= len(counts) <= 12
+    assert rows(cache) <= 100
+
+def test_count_is_picked_up_from_an_existing_file(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    EmbeddingCache(path).put_many("m", ["a", "b", "c"], vectors(3))
+    assert EmbeddingCache(path)._count == 3
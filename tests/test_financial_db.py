@@ -0,0 +1,31 @@
+import sqlite3
+
+from storage.financial_db import FinancialDatabase, LEGACY_DOCUMENT_ID
+
+def test_legacy_table_is_migrated_and_kept(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE financials (id INTEGER PRIMARY KEY AUTOINCREMENT, metric_name TEXT UNIQUE, value REAL, unit TEXT, period TEXT)")
+    conn.execute("INSERT INTO financials (metric_name, value) VALUES ('revenue', 10.0)")
+    conn.commit()
+    conn.close()
+
+    db = FinancialDatabase(path)
+    assert db.get_all_metrics(LEGACY_DOCUMENT_ID) == {"revenue": 10.0}
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT metric_name, value FROM financials_legacy").fetchall() == [("revenue", 10.0)]
+    conn.close()
+
+def test_undated_values_are_not_compared(tmp_path):
+    db = FinancialDatabase(str(tmp_path / "metrics.db"))
+    db.store_metrics({"revenue": 12.0}, document_id="regex-only")
+    db.store_records([
+        {"document_id": "tables", "metric": "revenue", "period": "FY23", "period_end": "2023-03-31", "value": 40.0},
+        {"document_id": "tables", "metric": "revenue", "period": "FY24", "period_end": "2024-03-31", "value": 50.0},
+    ])
+    db.store_metrics({"revenue": 99.0}, document_id="tables")
+
+    assert db.get_time_series("revenue", "tables") == [("FY23", 40.0), ("FY24", 50.0)]
+    assert db.get_time_series("revenue", "regex-only") == []
+    assert db.compare_documents("revenue") == {"tables": 50.0}
+    assert db.compare_documents("revenue", dated_only=False) == {"regex-only": 12.0, "tables": 50.0}
@@ -0,0 +1,53 @@
+import pytest
+
+from ingestion.chunker import IPOChunker
+from ingestion.pipeline import IngestionPipeline
+from storage.answer_cache import SemanticAnswerCache
+from storage.financial_db import FinancialDatabase
+from storage.ingestion_cache import IngestionCache
+from storage.vector_store import IPOVectorStore
+
+class CrashingChunker(IPOChunker):
+    """
+    Fails once on `crash_page`, like a worker killed mid-ingestion.
+    """
+    def __init__(self, crash_page, **kwargs):
+        super().__init__(**kwargs)
+        self.crash_page = crash_page
+
+    def chunk_page(self, page, carry=None):
+        if page["page"] == self.crash_page:
+            self.crash_page = None
+            raise RuntimeError("worker died")
+        return super().chunk_page(page, carry)
+
+def make_pipeline(root, engine, chunker):
+    store = IPOVectorStore(persist_dir=str(root / "chroma_db"), engine=engine)
+    return IngestionPipeline(store, FinancialDatabase(str(root / "financials.db")), chunker=chunker,
+                             cache=IngestionCache(str(root / "ingestion_cache")), answer_cache=SemanticAnswerCache())
+
+@pytest.mark.parametrize("mode", ["page", "layout"])
+def test_interrupted_run_resumes_to_the_same_result(tmp_path, synthetic_pdf, hashing_engine, mode):
+    pipeline = make_pipeline(tmp_path / "resumed", hashing_engine, CrashingChunker(15, mode=mode))
+    with pytest.raises(RuntimeError):
+        pipeline.run(synthetic_pdf)
+    result = pipeline.run(synthetic_pdf)
+    assert result["resumed"] and not result["cached"]
+
+    clean = make_pipeline(tmp_path / "clean", hashing_engine, IPOChunker(mode=mode)).run(synthetic_pdf)
+    assert (result["chunks"], result["tables"], result["financials"]) == (clean["chunks"], clean["tables"], clean["financials"])
+
+    job = pipeline.cache.open_job(result["doc_id"])
+    clean_job = IngestionCache(str(tmp_path / "clean" / "ingestion_cache")).open_job(clean["doc_id"])
+    assert list(job.read_jsonl("chunks.jsonl")) == list(clean_job.read_jsonl("chunks.jsonl"))
+    # Nothing from the failed attempt was indexed twice
+    assert pipeline.vector_store.for_document(result["doc_id"]).collection.count() == result["chunks"]
+
+def test_second_run_reuses_the_cache_and_invalidates_answers(tmp_path, synthetic_pdf, hashing_engine):
+    pipeline = make_pipeline(tmp_path, hashing_engine, IPOChunker(mode="layout"))
+    first = pipeline.run(synthetic_pdf)
+    pipeline.answer_cache.store(first["doc_id"], hashing_engine.encode(["query"])[0], "RISK", ["c1"], "answer")
+
+    second = pipeline.run(synthetic_pdf)
+    assert second["cached"] and second["chunks"] == first["chunks"]
+    assert pipeline.answer_cache.lookup(first["doc_id"], hashing_engine.encode(["query"])[0]) is None
@@ -0,0 +1,46 @@
+import numpy as np
+
+from agents.intent_classifier import IntentClassifier
+
+RULES = {"RISK": [r"\bkey risks\b"], "BUSINESS": [r"\bbusiness model\b"]}
+EXAMPLES = {"RISK": ["example one"], "BUSINESS": ["example two"]}
+# Query texts below match no rule, so only the centroids decide
+VECTORS = {
+    "example one": [1.0, 0.0],
+    "example two": [0.0, 1.0],
+    "near one": [0.9, 0.1],
+    "wide enough": [0.6, 0.55],
+    "too close": [0.6, 0.58],
+    "far away": [0.3, -0.9],
+}
+
+def embed(texts):
+    return np.array([VECTORS[text] for text in texts], dtype=np.float32)
+
+def make_classifier(**kwargs):
+    return IntentClassifier(embed_fn=embed, rules=RULES, examples=EXAMPLES, **kwargs)
+
+def test_single_rule_match_wins():
+    assert make_classifier().classify("What are the key risks?") == ("RISK", 1.0, "rule")
+
+def test_several_rule_matches_fall_through():
+    # The default rules match both RISK and FINANCIAL; without embeddings nothing is confident
+    intent, _, method = IntentClassifier().classify("risks to revenue")
+    assert (intent, method) == (None, "none")
+
+def test_centroid_above_thresholds():
+    intent, confidence, method = make_classifier().classify("near one")
+    assert (intent, method) == ("RISK", "centroid")
+    assert confidence > 0.95
+
+def test_margin_threshold():
+    # Similarity ~0.74 vs ~0.68: a margin of ~0.06 passes the default 0.05 ...
+    assert make_classifier().classify("wide enough")[0] == "RISK"
+    # ... ~0.03 doesn't
+    assert make_classifier().classify("too close")[0] is None
+    assert make_classifier(min_margin=0.1).classify("wide enough")[0] is None
+
+def test_similarity_threshold():
+    intent, confidence, method = make_classifier().classify("far away")
+    assert (intent, method) == (None, "none")
+    assert confidence < 0.55
@@ -0,0 +1,68 @@
+import time
+
+from ingestion.job_queue import IngestionJobQueue
+
+def age_heartbeats(queue, seconds):
+    queue.conn.execute("UPDATE jobs SET heartbeat_at = heartbeat_at - ?", (seconds,))
+    queue.conn.commit()
+
+def test_claim_is_exclusive(synthetic_pdf):
+    queue = IngestionJobQueue("jobs.db")
+    job_id = queue.enqueue(synthetic_pdf)
+    # The same document is not queued twice while pending
+    assert queue.enqueue(synthetic_pdf) == job_id
+
+    job = queue.claim("worker-1")
+    assert job["id"] == job_id
+    assert job["status"] == "running"
+    assert job["worker_id"] == "worker-1"
+    assert job["attempts"] == 1
+    assert queue.claim("worker-2") is None
+
+def test_heartbeat_keeps_the_job(synthetic_pdf):
+    queue = IngestionJobQueue("jobs.db", stale_after=60)
+    queue.enqueue(synthetic_pdf)
+    queue.claim("worker-1")
+    age_heartbeats(queue, 120)
+
+    queue.heartbeat("worker-1")
+    assert queue.claim("worker-2") is None
+    assert queue.live_workers() == 1
+
+def test_stale_job_is_reclaimed(synthetic_pdf):
+    queue = IngestionJobQueue("jobs.db", stale_after=60)
+    job_id = queue.enqueue(synthetic_pdf)
+    queue.claim("worker-1")
+    age_heartbeats(queue, 120)
+
+    job = queue.claim("worker-2")
+    assert job["id"] == job_id
+    assert job["worker_id"] == "worker-2"
+    assert job["attempts"] == 2
+    assert job["heartbeat_at"] >= time.time() - 5
+
+def test_finished_jobs_are_not_claimed(synthetic_pdf):
+    queue = IngestionJobQueue("jobs.db")
+    job_id = queue.enqueue(synthetic_pdf)
+    queue.claim("worker-1")
+    assert queue.complete(job_id, "worker-1", {"chunks": 3})
+    assert queue.claim("worker-2") is None
+    assert queue.get(job_id)["result"] == {"chunks": 3}
+
+def test_reclaimed_job_ignores_the_old_worker(synthetic_pdf):
+    queue = IngestionJobQueue("jobs.db", stale_after=60)
+    job_id = queue.enqueue(synthetic_pdf)
+    queue.claim("worker-1")
+    age_heartbeats(queue, 120)
+    queue.claim("worker-2")
+
+    # The slow first worker finishes late: neither outcome may overwrite the new owner's
+    assert not queue.complete(job_id, "worker-1", {"chunks": 1})
+    assert not queue.fail(job_id, "worker-1", "boom")
+    assert queue.get(job_id)["status"] == "running"
+
+    assert queue.complete(job_id, "worker-2", {"chunks": 2})
+    assert queue.get(job_id)["result"] == {"chunks": 2}
+    # A finished job stays finished
+    assert not queue.fail(job_id, "worker-2", "late error")
+    assert queue.get(job_id)["status"] == "done"
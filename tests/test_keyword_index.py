@@ -0,0 +1,64 @@
+import os
+
+from storage.keyword_index import BM25Index
+
+def test_remove_drops_documents_and_their_terms(tmp_path):
+    index = BM25Index(str(tmp_path / "index.json"))
+    index.add(["a", "b"], ["total borrowings rose", "revenue from operations"], [{"section": "X"}, {"section": "X"}])
+    index.remove(["a"])
+    assert index.ids() == ["b"]
+    assert index.search("borrowings") == []
+    assert "borrowings" not in index.postings
+    assert index.total_length == 3
+
+def test_saved_changes_are_picked_up_by_other_instances(tmp_path):
+    path = str(tmp_path / "index.json")
+    writer = BM25Index(path)
+    writer.add(["old"], ["legacy chunk text"], [{"section": "X"}])
+    writer.save()
+    reader = BM25Index(path)
+    assert [doc_id for doc_id, _ in reader.search("legacy")] == ["old"]
+
+    writer.add(["new"], ["fresh chunk text"], [{"section": "X"}])
+    writer.remove(["old"])
+    writer.save()
+    # Make sure the file looks newer even on coarse-grained filesystems
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert reader.search("legacy") == []
+    assert [doc_id for doc_id, _ in reader.search("fresh")] == ["new"]
+
+CHUNKS = [
+    {"text": "Total Borrowings of the company stood at 1,200 crore", "section": "FINANCIAL_STATEMENTS", "page": 1, "source": "RHP"},
+    {"text": "Revenue from operations grew across all segments", "section": "FINANCIAL_STATEMENTS", "page": 2, "source": "RHP"},
+    {"text": "Borrowings were repaid from the proceeds of the issue", "section": "USE_OF_PROCEEDS", "page": 3, "source": "RHP"},
+    {"text": "The registered office is located in Mumbai", "section": "LEGAL_INFO", "page": 4, "source": "RHP"},
+]
+
+def indexed(vector_store):
+    store = vector_store.for_document("doc")
+    store.add_chunks(CHUNKS)
+    return store
+
+def test_bm25_ranks_the_rarer_terms_higher(tmp_path):
+    index = BM25Index(str(tmp_path / "index.json"))
+    index.add(["a", "b", "c"], [chunk["text"] for chunk in CHUNKS[:3]], CHUNKS[:3])
+    ranked = [doc_id for doc_id, _ in index.search("total borrowings")]
+    # Both mention borrowings; only "a" also has "total"
+    assert ranked == ["a", "c"]
+    assert [doc_id for doc_id, _ in index.search("borrowings", section_filter="USE_OF_PROCEEDS")] == ["c"]
+
+def test_keyword_and_hybrid_modes_put_the_exact_match_first(vector_store):
+    store = indexed(vector_store)
+    keyword = store.query("Total Borrowings", n_results=2, mode="keyword")
+    assert [r["text"] for r in keyword] == [CHUNKS[0]["text"], CHUNKS[2]["text"]]
+
+    hybrid = store.query("Total Borrowings", n_results=3, mode="hybrid")
+    assert hybrid[0]["text"] == CHUNKS[0]["text"]
+    assert len({r["id"] for r in hybrid}) == 3
+
+def test_section_filter_applies_to_every_mode(vector_store):
+    store = indexed(vector_store)
+    for mode in ("vector", "keyword", "hybrid"):
+        results = store.query("borrowings", n_results=3, section_filter="USE_OF_PROCEEDS", mode=mode)
+        assert [r["metadata"]["section"] for r in results] == ["USE_OF_PROCEEDS"], mode
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from llm.errors import LLMAuthError, LLMBadRequestError, LLMServerError
+from llm.groq_client import GroqClient, TokenBucket
+from llm.mock_server import MockLLMServer
+
+MESSAGES = [{"role": "user", "content": "What is the issue size?"}]
+
+def make_client(server, **kwargs):
+    # The Groq SDK appends /openai/v1 itself
+    base_url = server.base_url[:-len("/openai/v1")]
+    options = dict(requests_per_minute=0, backoff_base=0.01, backoff_max=2.0)
+    options.update(kwargs)
+    return GroqClient(api_key="test-key", base_url=base_url, **options)
+
+def test_429_is_retried_after_retry_after():
+    with MockLLMServer(reply="ok [Source: Page 1]", fail_times=2, fail_status=429, retry_after=0.2) as server:
+        client = make_client(server, max_retries=3)
+        start = time.perf_counter()
+        assert client.chat(MESSAGES) == "ok [Source: Page 1]"
+        elapsed = time.perf_counter() - start
+    assert server.request_count == 3
+    # Two waits, each at least the server's Retry-After
+    assert elapsed >= 0.4
+
+def test_5xx_retries_are_exhausted():
+    with MockLLMServer(fail_times=100, fail_status=503) as server:
+        client = make_client(server, max_retries=2)
+        with pytest.raises(LLMServerError) as raised:
+            client.chat(MESSAGES)
+    assert raised.value.status_code == 503
+    assert server.request_count == 3
+
+def test_stream_retries_before_first_token():
+    with MockLLMServer(reply="one two three", fail_times=1, fail_status=500) as server:
+        client = make_client(server, max_retries=1)
+        assert "".join(client.chat_stream(MESSAGES)) == "one two three"
+    assert server.request_count == 2
+
+def test_client_errors_are_not_retried():
+    with MockLLMServer(fail_times=100, fail_status=400) as server:
+        client = make_client(server, max_retries=3)
+        with pytest.raises(LLMBadRequestError):
+            client.chat(MESSAGES)
+    assert server.request_count == 1
+
+def test_missing_api_key_raises(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    with pytest.raises(LLMAuthError):
+        GroqClient(api_key=None).chat(MESSAGES)
+
+def test_concurrency_limit():
+    with MockLLMServer(latency=0.2) as server:
+        client = make_client(server, max_concurrency=2)
+        threads = [threading.Thread(target=client.chat, args=(MESSAGES,)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert server.request_count == 6
+    assert server.max_in_flight == 2
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate_per_second=20, capacity=1)
+    start = time.perf_counter()
+    for _ in range(5):
+        bucket.acquire()
+    # The first token is there already; the other four refill at 20/s
+    assert time.perf_counter() - start >= 0.19
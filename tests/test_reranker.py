@@ -0,0 +1,41 @@
+import sys
+import types
+
+import pytest
+
+from storage.reranker import CrossEncoderReranker
+
+class FakeCrossEncoder:
+    """
+    Scores a pair by how many query words the text contains.
+    """
+    def __init__(self, model_name, device="cpu"):
+        self.batches = 0
+
+    def predict(self, pairs, batch_size=16, show_progress_bar=False):
+        self.batches += 1
+        return [len(set(query.lower().split()) & set(text.lower().split())) for query, text in pairs]
+
+@pytest.fixture
+def reranker(monkeypatch):
+    monkeypatch.setitem(sys.modules, "sentence_transformers", types.SimpleNamespace(CrossEncoder=FakeCrossEncoder))
+    return CrossEncoderReranker(model_name="fake", batch_size=2)
+
+CANDIDATES = [{"text": text} for text in ["unrelated text", "total debt", "total borrowings rose", "other words"]]
+
+def test_orders_candidates_by_score(reranker):
+    ranked = reranker.rerank("total borrowings", CANDIDATES, top_k=2)
+    assert [c["text"] for c in ranked] == ["total borrowings rose", "total debt"]
+
+def test_slow_batches_still_score_one_batch_per_call(reranker):
+    # As if earlier batches had been slow: no later batch fits the budget
+    reranker._batch_seconds = 10.0
+    ranked = reranker.rerank("total borrowings", CANDIDATES, top_k=2, latency_budget_ms=100)
+    assert [c["text"] for c in ranked] == ["unrelated text", "total debt"]
+    assert reranker.model.batches == 1
+    # The fast batch pulled the moving average down
+    assert reranker._batch_seconds < 10.0
+
+    # Its scores were cached, so the next call only has the second batch to score
+    ranked = reranker.rerank("total borrowings", CANDIDATES, top_k=2, latency_budget_ms=100)
+    assert [c["text"] for c in ranked] == ["total borrowings rose", "total debt"]
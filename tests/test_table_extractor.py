@@ -0,0 +1,40 @@
+import pytest
+
+from ingestion.table_extractor import FinancialTableExtractor, parse_number, parse_period
+
+@pytest.mark.parametrize("text, expected", [
+    ("March 31, 2024", ("FY24", "2024-03-31")),
+    ("Fiscal 2023", ("FY23", "2023-03-31")),
+    ("FY 2025", ("FY25", "2025-03-31")),
+    ("Sep-25", ("Sep-25", "2025-09-30")),
+    ("Particulars", None),
+])
+def test_parse_period(text, expected):
+    assert parse_period(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("40,918.42", 40918.42),
+    ("(1,234.5)", -1234.5),
+    ("-", 0.0),
+    ("n.a.", None),
+])
+def test_parse_number(text, expected):
+    assert parse_number(text) == expected
+
+def test_extracts_dated_records_from_the_financial_tables(synthetic_pdf):
+    extractor = FinancialTableExtractor()
+    per_page = {page: records for page, records in extractor.iter_page_records(synthetic_pdf, range(13, 18))}
+    assert [page for page, records in per_page.items() if records] == [13, 15, 17]
+
+    # The tables repeat the same grid; merging keeps the first page's records
+    records = extractor.extract(synthetic_pdf, range(13, 18))
+    assert len(records) == len(per_page[13])
+    revenue = [record for record in records if record["metric"] == "revenue" and record["source_page"] == 13]
+    assert [record["period"] for record in revenue] == ["FY25", "FY24", "FY23"]
+    assert revenue[0] == {
+        "metric": "revenue", "period": "FY25", "period_end": "2025-03-31", "value": 40918.42,
+        "unit": "Millions", "basis": "Consolidated", "source_page": 13,
+    }
+
+def test_pages_without_tables_give_no_records(synthetic_pdf):
+    assert FinancialTableExtractor().extract(synthetic_pdf, [3, 14]) == []
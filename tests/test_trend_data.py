@@ -0,0 +1,36 @@
+import pytest
+
+from ingestion.trend_data import build_trend_data, validate_trend_data
+
+def record(metric, period, period_end, value, unit="Crores", basis="Consolidated"):
+    return {"metric": metric, "period": period, "period_end": period_end, "value": value,
+            "unit": unit, "basis": basis, "source_page": 7}
+
+def test_missing_period_is_a_gap_not_zero():
+    trend = build_trend_data([
+        record("revenue", "FY23", "2023-03-31", 100.0),
+        record("revenue", "FY24", "2024-03-31", 120.0),
+        record("pat", "FY24", "2024-03-31", 9.0),
+    ])
+    assert trend["years"] == ["FY23", "FY24"]
+    assert trend["data"] == {"Revenue": [100.0, 120.0], "Profit": [None, 9.0]}
+
+def test_mixed_units_are_normalised_to_crores():
+    trend = build_trend_data([
+        record("revenue", "FY23", "2023-03-31", 10_000.0, unit="Lakhs"),
+        record("revenue", "FY24", "2024-03-31", 1_200.0, unit="Millions"),
+        record("pat", "FY24", "2024-03-31", 5.0, unit="Thousands"),
+    ])
+    assert trend["unit"] == "Crores"
+    assert trend["data"] == {"Revenue": [100.0, 120.0]}
+
+def test_single_unit_is_kept():
+    trend = build_trend_data([record("revenue", "FY24", "2024-03-31", 500.0, unit="Millions")])
+    assert trend["unit"] == "Millions"
+    assert trend["data"] == {"Revenue": [500.0]}
+
+def test_validate_rejects_bad_series():
+    with pytest.raises(ValueError):
+        validate_trend_data({"years": ["FY24", "FY25"], "data": {"Revenue": [1.0]}})
+    with pytest.raises(ValueError):
+        validate_trend_data({"years": ["FY24"], "data": {"Revenue": [None]}})
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from storage.embedding_cache import EmbeddingCache
+from storage.vector_store import IPOVectorStore, get_chroma_client, reopen_chroma_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Re-indexes the document from another process, as the ingestion worker does
+WORKER = textwrap.dedent("""
+    import sys
+    from storage.embedding_cache import EmbeddingCache
+    from storage.vector_store import IPOVectorStore
+    from tests.conftest import HashingEngine
+
+    store = IPOVectorStore(persist_dir="chroma_db", doc_id="doc", engine=HashingEngine(),
+                           embedding_cache=EmbeddingCache("worker_cache.db"))
+    chunk_ids = store.add_chunks([{"text": text, "section": "RISK_FACTORS", "page": 2} for text in sys.argv[1:]])
+    store.prune(chunk_ids)
+""")
+
+def index_in_subprocess(workdir, *texts):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    subprocess.run([sys.executable, "-c", WORKER, *texts], cwd=workdir, env=env, check=True)
+
+def open_store(workdir, engine, mode="vector"):
+    return IPOVectorStore(persist_dir="chroma_db", doc_id="doc", engine=engine,
+                          embedding_cache=EmbeddingCache(str(workdir / "cache.db")), search_mode=mode)
+
+def test_reopened_client_sees_another_process_reindex(workdir, hashing_engine):
+    index_in_subprocess(workdir, "old litigation risk")
+    before = open_store(workdir, hashing_engine)
+    assert [r["text"] for r in before.query("litigation risk", n_results=1)] == ["old litigation risk"]
+
+    index_in_subprocess(workdir, "new litigation risk", "new currency risk")
+    client = reopen_chroma_client("chroma_db")
+    assert client is get_chroma_client("chroma_db")
+    for mode in ("vector", "keyword"):
+        after = open_store(workdir, hashing_engine, mode)
+        assert sorted(r["text"] for r in after.query("risk", n_results=5)) == ["new currency risk", "new litigation risk"]
+
+def test_default_query_is_plain_vector_search(vector_store):
+    store = vector_store.for_document("doc")
+    store.add_chunks([
+        {"text": text, "section": "RISK_FACTORS", "page": page}
+        for page, text in enumerate(["total borrowings", "borrowings repaid", "revenue grew", "eps rose"], start=1)
+    ])
+    for query in ("borrowings", "What was the revenue growth?"):
+        expected = [r["id"] for r in store._vector_query(query, 3)]
+        assert [r["id"] for r in store.query(query, n_results=3)] == expected
+        assert [r["id"] for r in store.query(query, n_results=3, mode="vector")] == expected
@@ -0,0 +1,271 @@
+import math
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.telemetry import TELEMETRY, traced
+
+# Context tokens per intent (retrieved text plus any fixed block such as DB metrics)
+INTENT_BUDGETS = {
+    "FINANCIAL": 1000,
+    "RISK": 1400,
+    "BUSINESS": 1400,
+    "SUMMARY": 1600,
+    "CHART": 1000,
+}
+DEFAULT_BUDGET = 1200
+TOKENIZER_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# Neighbouring chunks share up to chunk_overlap (100) characters; allow for separators
+MIN_OVERLAP_CHARS = 20
+MAX_OVERLAP_CHARS = 300
+SHINGLE_WORDS = 3
+
+_WORD_PIECES = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"(?<=[.;:!?])\s")
+
+def page_range(metadata: Dict[str, Any]):
+    """
+    (first, last) page of a chunk's metadata; layout chunks may run on to a later
+    "page_end". Chroma stores them as strings, so numeric ones come back as ints.
+    """
+    def number(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return value
+
+    first = number(metadata.get("page"))
+    last = number(metadata.get("page_end", first))
+    return first, last
+
+def page_label(metadata: Dict[str, Any]) -> str:
+    """
+    Citation label for a chunk: "Page 12", or "Page 12–13" when it crosses a page break.
+    """
+    first, last = page_range(metadata)
+    return f"Page {first}" if last == first else f"Page {first}–{last}"
+
+class TokenCounter:
+    def __init__(self, tokenizer_name=TOKENIZER_NAME):
+        """
+        Counts tokens with the local MiniLM (WordPiece) tokenizer from `transformers`,
+        loaded on first use. Without transformers (or the tokenizer files) it falls back
+        to a word/punctuation estimate, which tracks WordPiece counts within ~10-15% on RHP prose.
+        """
+        self.tokenizer_name = tokenizer_name
+        self._tokenizer = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def method(self) -> str:
+        return "tokenizer" if self._get_tokenizer() is not None else "heuristic"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        tokenizer = self._get_tokenizer()
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, add_special_tokens=False, verbose=False))
+        return math.ceil(len(_WORD_PIECES.findall(text)) * 1.1)
+
+    def _get_tokenizer(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        from transformers import AutoTokenizer
+                        self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+                    except Exception as e:  # ImportError, offline without cached files, ...
+                        print(f"⚠️ Tokenizer unavailable ({type(e).__name__}); estimating token counts")
+                        self._tokenizer = None
+                    self._loaded = True
+        return self._tokenizer
+
+class ContextBuilder:
+    def __init__(self, budgets: Dict[str, int] = None, default_budget=DEFAULT_BUDGET,
+                 counter: TokenCounter = None, duplicate_threshold=0.8, min_fragment_tokens=48):
+        """
+        Turns ranked retrieval results into a prompt context that fits a token budget:
+        1. drops exact and near-duplicate chunks (word-trigram overlap >= duplicate_threshold),
+        2. merges chunks that continue each other within a section and share a page
+           (the chunker's overlap is kept only once),
+        3. adds passages best-ranked first until the intent's budget is used up; the first
+           one that doesn't fit is cut at a sentence boundary if at least
+           `min_fragment_tokens` remain.
+        Every call reports the tokens it saved against plain concatenation.
+        """
+        self.budgets = dict(INTENT_BUDGETS, **(budgets or {}))
+        self.default_budget = default_budget
+        self.counter = counter or TokenCounter()
+        self.duplicate_threshold = duplicate_threshold
+        self.min_fragment_tokens = min_fragment_tokens
+
+    def budget_for(self, intent: str) -> int:
+        return self.budgets.get(intent, self.default_budget)
+
+    @traced("context.build")
+    def build(self, results: List[Dict[str, Any]], intent: str,
+              format_passage: Callable[[Dict[str, Any]], str] = None, reserved_text: str = "") -> Dict[str, Any]:
+        """
+        results: ranked vector-store results ({"id", "text", "metadata": {"page", "section", ...}}).
+        format_passage: renders one passage for the prompt (default: its text plus a newline).
+        reserved_text: fixed context (e.g. DB metrics) that is always included and counts against the budget.
+        Returns {"text", "passages", "tokens", "tokens_before", "tokens_saved", "budget"};
+        "text" is the formatted passages only, "tokens" includes reserved_text.
+        """
+        format_passage = format_passage or (lambda passage: passage["text"] + "\n")
+        budget = self.budget_for(intent)
+        reserved_tokens = self.counter.count(reserved_text)
+        tokens_before = reserved_tokens + self.counter.count("".join(format_passage(r) for r in results))
+
+        passages = self.merge_adjacent(self.deduplicate(results))
+        chosen, used = [], reserved_tokens
+        for passage in passages:
+            tokens = self.counter.count(format_passage(passage))
+            if used + tokens <= budget:
+                chosen.append(passage)
+                used += tokens
+                continue
+            fragment = self._truncate(passage, budget - used, format_passage)
+            if fragment is not None:
+                chosen.append(fragment)
+                used += self.counter.count(format_passage(fragment))
+            break
+
+        text = "".join(format_passage(passage) for passage in chosen)
+        tokens = reserved_tokens + self.counter.count(text)
+        saved = max(0, tokens_before - tokens)
+        TELEMETRY.counter("context_tokens_saved_total", saved, intent=intent)
+        # Reported on the "context.build" span only: this runs on every query
+        TELEMETRY.current_span().set(intent=intent, budget=budget, chunks=len(results), passages=len(chosen),
+                                     tokens_before=tokens_before, tokens=tokens, tokens_saved=saved)
+        return {
+            "text": text,
+            "passages": chosen,
+            "tokens": tokens,
+            "tokens_before": tokens_before,
+            "tokens_saved": saved,
+            "budget": budget,
+        }
+
+    def deduplicate(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Keeps the best-ranked of any exact or near-duplicate chunks.
+        A chunk is a near-duplicate when most of its word trigrams already appear in one kept chunk.
+        """
+        kept, kept_shingles, seen_texts = [], [], set()
+        for result in results:
+            normalized = " ".join(result["text"].split()).lower()
+            if normalized in seen_texts:
+                continue
+            shingles = self._shingles(normalized)
+            if shingles and any(len(shingles & other) / len(shingles) >= self.duplicate_threshold for other in kept_shingles):
+                continue
+            seen_texts.add(normalized)
+            kept_shingles.append(shingles)
+            kept.append(result)
+        return kept
+
+    def merge_adjacent(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Joins chunks of the same section that share a page, where one continues the other
+        (its start repeats the other's end, as the chunker's overlap produces).
+        The merged passage takes the position of its best-ranked part, and its page range
+        covers both parts (layout chunks carry "page_end" when they cross a page break).
+        """
+        passages = [dict(result) for result in results]
+        merged = True
+        while merged:
+            merged = False
+            for i, first in enumerate(passages):
+                for j, second in enumerate(passages):
+                    if i == j or not self._same_location(first, second):
+                        continue
+                    overlap = self._overlap(first["text"], second["text"])
+                    if overlap:
+                        joined = dict(passages[min(i, j)], text=first["text"] + second["text"][overlap:])
+                        joined["metadata"] = self._merged_metadata(passages[min(i, j)], first, second)
+                        joined["merged_ids"] = first.get("merged_ids", [first.get("id")]) + second.get("merged_ids", [second.get("id")])
+                        passages[min(i, j)] = joined
+                        del passages[max(i, j)]
+                        merged = True
+                        break
+                if merged:
+                    break
+        return passages
+
+    def _truncate(self, passage: Dict[str, Any], tokens_left: int, format_passage) -> Optional[Dict[str, Any]]:
+        """
+        The longest sentence-aligned prefix of the passage that fits in `tokens_left`, or None.
+        """
+        if tokens_left < self.min_fragment_tokens:
+            return None
+        sentences = _SENTENCE_END.split(passage["text"])
+        text = ""
+        for sentence in sentences:
+            candidate = f"{text} {sentence}".strip()
+            if self.counter.count(format_passage(dict(passage, text=candidate + " …"))) > tokens_left:
+                break
+            text = candidate
+        if not text:
+            return None
+        return dict(passage, text=text + " …", truncated=True)
+
+    @staticmethod
+    def _same_location(first: Dict[str, Any], second: Dict[str, Any]) -> bool:
+        """
+        Same section, and page ranges that share at least one page
+        (the overlap a continuation starts with comes from its predecessor's last page).
+        """
+        first_meta, second_meta = first.get("metadata") or {}, second.get("metadata") or {}
+        if first_meta.get("section") != second_meta.get("section"):
+            return False
+        (first_start, first_end), (second_start, second_end) = page_range(first_meta), page_range(second_meta)
+        if not all(isinstance(page, int) for page in (first_start, first_end, second_start, second_end)):
+            return (first_start, first_end) == (second_start, second_end)
+        return first_start <= second_end and second_start <= first_end
+
+    @staticmethod
+    def _merged_metadata(best: Dict[str, Any], first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The best-ranked part's metadata, with the page range widened to cover both parts.
+        """
+        metadata = dict(best.get("metadata") or {})
+        (first_start, first_end), (second_start, second_end) = page_range(first.get("metadata") or {}), page_range(second.get("metadata") or {})
+        start, end = min(first_start, second_start), max(first_end, second_end)
+        if (start, end) != page_range(metadata):
+            # Same string form as the vector store's metadata
+            metadata["page"], metadata["page_end"] = str(start), str(end)
+        return metadata
+
+    @staticmethod
+    def _overlap(first: str, second: str) -> int:
+        """
+        Length of the longest suffix of `first` that starts `second` (0 if under MIN_OVERLAP_CHARS).
+        """
+        probe = second[:MIN_OVERLAP_CHARS]
+        if len(probe) < MIN_OVERLAP_CHARS:
+            return 0
+        tail = first[-MAX_OVERLAP_CHARS:]
+        start = tail.find(probe)
+        while start != -1:
+            length = len(tail) - start
+            if second.startswith(tail[start:]) and length < len(second):
+                return length
+            start = tail.find(probe, start + 1)
+        return 0
+
+    @staticmethod
+    def _shingles(text: str) -> set:
+        words = text.split()
+        if len(words) < SHINGLE_WORDS:
+            return {" ".join(words)} if words else set()
+        return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+# Shared by every agent (the tokenizer is loaded once per process)
+CONTEXT_BUILDER = ContextBuilder()
+
+if __name__ == "__main__":
+    # Test stub
+    pass
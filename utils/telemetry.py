@@ -0,0 +1,318 @@
+"""
+Lightweight tracing and metrics for the ingestion and query paths.
+
+    from utils.telemetry import TELEMETRY, traced
+
+    with TELEMETRY.span("vector_store.query", mode="hybrid") as span:
+        ...
+        span.set(results=len(results))
+
+    @traced("agent.risk.answer")
+    def answer(self, query, vector_results, stream=False): ...
+
+- Spans nest per thread/context (contextvars) into traces; every finished span
+  feeds the `ipo_span_duration_seconds` histogram and, if a trace file is set
+  (IPO_TRACE_FILE or Telemetry(trace_path=...)), is appended to it as one JSON line.
+- Counters and histograms are exposed in Prometheus text format by
+  prometheus_text() / serve(port) (GET /metrics).
+- The last `max_traces` finished root spans are kept in memory (recent_traces())
+  for the Streamlit debug panel.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Latency buckets in seconds (Prometheus "le" bounds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+METRIC_PREFIX = "ipo_"
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("ipo_current_span", default=None)
+
+class Span:
+    def __init__(self, telemetry: "Telemetry", name: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.telemetry = telemetry
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attrs = dict(attrs)
+        self.error = None
+        self.children: List["Span"] = []
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+        self._token = None
+
+    def set(self, **attrs):
+        """
+        Adds attributes (e.g. result counts, token usage) to the span.
+        """
+        self.attrs.update(attrs)
+
+    def end(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._start
+            self.telemetry._finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.end()
+        return False
+
+class Telemetry:
+    def __init__(self, trace_path: Optional[str] = None, max_traces=200, buckets=DEFAULT_BUCKETS):
+        """
+        Process-wide collector of spans, counters and histograms (see module docstring).
+        """
+        self.trace_path = trace_path
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self._histograms: Dict[Tuple[str, Tuple], List[float]] = {}
+        self._traces = deque(maxlen=max_traces)
+        self._server = None
+
+    def span(self, name: str, **attrs) -> Span:
+        """
+        Starts a span under the current one; use as a context manager.
+        """
+        return Span(self, name, _current_span.get(), attrs)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def bind(self, fn: Callable) -> Callable:
+        """
+        Wraps `fn` to run in a copy of the caller's context, so spans it opens on a
+        worker thread (ThreadPoolExecutor) still nest under the caller's span.
+        """
+        context = contextvars.copy_context()
+        return functools.partial(context.run, fn)
+
+    def counter(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """
+        Records one histogram observation (seconds for latencies).
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            state = self._histograms.get(key)
+            if state is None:
+                state = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[len(self.buckets)] += 1
+            state[-1] += value
+
+    def timed_iter(self, name: str, iterable, **attrs) -> Iterator[Any]:
+        """
+        Yields from `iterable` under a span named `name` whose duration is only the
+        time spent producing items (recorded when the iterator is exhausted or closed).
+        Measures one stage of a streaming pipeline without counting its consumers;
+        stages nested inside it (an inner timed_iter) become its child spans.
+        """
+        span = Span(self, name, _current_span.get(), attrs)
+        busy, items = 0.0, 0
+        iterator = iter(iterable)
+        try:
+            while True:
+                token = _current_span.set(span)
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    busy += time.perf_counter() - start
+                    _current_span.reset(token)
+                items += 1
+                yield item
+        finally:
+            span.set(items=items)
+            span.duration = busy
+            self._finish(span)
+
+    def recent_traces(self, limit=20, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Newest finished root spans first, each as a dict with a "spans" list
+        (root first, then descendants in start order) for latency breakdowns.
+        """
+        with self._lock:
+            roots = [root for root in reversed(self._traces) if name is None or root.name == name][:limit]
+        traces = []
+        for root in roots:
+            spans, stack = [], [(root, 0)]
+            while stack:
+                span, depth = stack.pop()
+                spans.append(dict(span.to_dict(), depth=depth))
+                stack.extend((child, depth + 1) for child in sorted(span.children, key=lambda s: s.start_time, reverse=True))
+            traces.append(dict(root.to_dict(), spans=spans))
+        return traces
+
+    def prometheus_text(self) -> str:
+        """
+        All counters and histograms in the Prometheus text exposition format.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(state) for key, state in self._histograms.items()}
+
+        lines = []
+        for metric in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {METRIC_PREFIX}{metric} counter")
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f"{METRIC_PREFIX}{name}{self._labels(labels)} {value}")
+        for metric in sorted({name for name, _ in histograms}):
+            lines.append(f"# TYPE {METRIC_PREFIX}{metric} histogram")
+            for (name, labels), state in sorted(histograms.items()):
+                if name != metric:
+                    continue
+                for bound, count in zip(self.buckets, state):
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{self._labels(labels + (('le', repr(bound)),))} {count}")
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{self._labels(labels + (('le', '+Inf'),))} {state[len(self.buckets)]}")
+                lines.append(f"{METRIC_PREFIX}{name}_sum{self._labels(labels)} {state[-1]}")
+                lines.append(f"{METRIC_PREFIX}{name}_count{self._labels(labels)} {state[len(self.buckets)]}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9464, host="127.0.0.1") -> str:
+        """
+        Serves GET /metrics on a daemon thread (once per process); returns the URL.
+        """
+        with self._lock:
+            if self._server is None:
+                telemetry = self
+
+                class Handler(BaseHTTPRequestHandler):
+                    def log_message(self, format, *args):
+                        pass
+
+                    def do_GET(self):
+                        if self.path.rstrip("/") != "/metrics":
+                            self.send_error(404)
+                            return
+                        data = telemetry.prometheus_text().encode("utf-8")
+                        self.send_response(200)
+                        self.send_header("Content-Type", "text/plain; version=0.0.4")
+                        self.send_header("Content-Length", str(len(data)))
+                        self.end_headers()
+                        self.wfile.write(data)
+
+                self._server = ThreadingHTTPServer((host, port), Handler)
+                threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._traces.clear()
+
+    def _finish(self, span: Span):
+        self.observe("span_duration_seconds", span.duration, span=span.name)
+        if span.error:
+            self.counter("span_errors_total", span=span.name)
+        with self._lock:
+            if span.parent is not None:
+                span.parent.children.append(span)
+            else:
+                self._traces.append(span)
+            if self.trace_path:
+                directory = os.path.dirname(self.trace_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.trace_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    @staticmethod
+    def _labels(labels: Tuple) -> str:
+        if not labels:
+            return ""
+        def escape(value) -> str:
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+def traced(name: str):
+    """
+    Decorator: runs the function inside a TELEMETRY span named `name`.
+    When the function returns a generator (streaming answers), the span stays
+    open until the generator is exhausted or closed, so it covers the whole stream.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            span = TELEMETRY.span(name)
+            token = _current_span.set(span)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                span.error = f"{type(e).__name__}: {e}"
+                span.end()
+                raise
+            finally:
+                _current_span.reset(token)
+            if inspect.isgenerator(result):
+                return _traced_stream(span, result)
+            span.end()
+            return result
+        return wrapper
+    return decorator
+
+def _traced_stream(span: Span, stream: Iterator[Any]) -> Iterator[Any]:
+    """
+    Yields from `stream` with `span` as the current span while each item is produced.
+    """
+    try:
+        while True:
+            token = _current_span.set(span)
+            try:
+                item = next(stream)
+            except StopIteration:
+                return
+            finally:
+                _current_span.reset(token)
+            yield item
+    except Exception as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.end()
+
+# Process-wide collector used by the whole app
+TELEMETRY = Telemetry(trace_path=os.getenv("IPO_TRACE_FILE"))
+
+if __name__ == "__main__":
+    pass